@@ -0,0 +1,253 @@
+"""Throughput, memory and latency benchmarks for the minting and deposit pipelines.
+
+Every case runs in its own interpreter so peak RSS belongs to that case alone.
+Results are written as JSON tagged with the current commit so runs can be compared:
+
+    python benchmarks/run_benchmarks.py -o before.json
+    python benchmarks/run_benchmarks.py -o after.json --compare before.json
+"""
+import csv
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+import click
+
+# Checkout the benchmarks (and their child interpreters) import tamu_id_minter from
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+EZID_LATENCIES = [0.0, 0.01, 0.05]
+EZID_WORKERS = [1, 8, 32]
+CROSSREF_ROWS = [1_000, 10_000, 100_000]
+STARTUP_RUNS = 20
+STARTUP_COMMANDS = {
+    'help': ['--help'],
+    'get_ark_help': ['get_ark', '--help'],
+}
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[pct - 1]
+
+
+def peak_rss_mb():
+    # ru_maxrss is kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def write_ezid_csv(path, rows):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['who', 'what', 'when', 'where'])
+        for i in range(rows):
+            writer.writerow([f"Author {i}", f"Title {i}", "2025", f"https://example.com/item/{i}"])
+
+
+def write_crossref_csv(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Title', 'Contributor', 'Acceptance date', 'DOI', 'Resource'])
+        for i in range(rows):
+            writer.writerow([
+                f"Technical Report {i} on Things & Stuff",
+                f"Smith, Jane and Author{i % 50} Doe",
+                f"2025-{i % 12 + 1:02d}-{i % 28 + 1:02d}",
+                f"10.12345/report.{i}",
+                f"https://oaktrust.library.tamu.edu/handle/1969.1/{i}",
+            ])
+
+
+def timed_handler(**kwargs):
+    """EZIDARKHandler that records the latency of every HTTP request it sends."""
+    from tamu_id_minter.ezid import EZIDARKHandler
+
+    class TimedEZIDARKHandler(EZIDARKHandler):
+        latencies = []
+
+        def send(self, method, url, data=None):
+            start = time.perf_counter()
+            try:
+                return super().send(method, url, data)
+            finally:
+                self.latencies.append(time.perf_counter() - start)
+
+    return TimedEZIDARKHandler(**kwargs)
+
+
+def run_ezid_case(case, rows, latency, workers):
+    from tamu_id_minter.ezid.fake_server import FakeEZIDServer
+
+    with tempfile.TemporaryDirectory() as tmp, FakeEZIDServer(latency=latency) as server:
+        input_csv = os.path.join(tmp, 'input.csv')
+        output_csv = os.path.join(tmp, 'output.csv')
+        write_ezid_csv(input_csv, rows)
+        handler = timed_handler(shoulder_url=server.shoulder_url, base_url=server.url, workers=workers)
+        with handler:
+            if case == 'switch_status':
+                handler.stream_batch_from_csv(input_csv, output_csv)
+                handler.latencies.clear()
+                start = time.perf_counter()
+                handler.batch_switch_status(output_csv, 'public', output_csv=os.path.join(tmp, 'status.csv'))
+            else:
+                start = time.perf_counter()
+                handler.create_batch_from_csv(input_csv, output_csv)
+            elapsed = time.perf_counter() - start
+        latencies = sorted(handler.latencies)
+
+    return {
+        'elapsed_s': round(elapsed, 4),
+        'rows_per_s': round(rows / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def run_crossref_case(rows, content_type):
+    from tamu_id_minter.crossref import CrossrefDepositHandler
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_csv = os.path.join(tmp, 'input.csv')
+        write_crossref_csv(input_csv, rows)
+        handler = CrossrefDepositHandler()
+        start = time.perf_counter()
+        handler.create_batch_from_csv(input_csv, os.path.join(tmp, 'deposit.xml'), content_type)
+        elapsed = time.perf_counter() - start
+
+    return {
+        'elapsed_s': round(elapsed, 4),
+        'rows_per_s': round(rows / elapsed, 1),
+        'p50_ms': None,
+        'p99_ms': None,
+    }
+
+
+def run_startup_case(case, runs):
+    """Time fresh `tamu_mint` invocations, which is what scripts calling the CLI in a loop pay."""
+    code = f"from tamu_id_minter.mint import cli; cli({STARTUP_COMMANDS[case]!r})"
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], capture_output=True, check=True, env=repo_env())
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    elapsed = sum(latencies)
+
+    return {
+        'elapsed_s': round(elapsed, 4),
+        'rows_per_s': round(runs / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def cases(ezid_rows, crossref_rows, quick):
+    for case in STARTUP_COMMANDS:
+        yield {'suite': 'startup', 'case': case, 'rows': STARTUP_RUNS}
+    latencies = EZID_LATENCIES[:2] if quick else EZID_LATENCIES
+    workers = EZID_WORKERS[:2] if quick else EZID_WORKERS
+    for case in ('create_batch_from_csv', 'switch_status'):
+        for latency in latencies:
+            for worker_count in workers:
+                yield {'suite': 'ezid', 'case': case, 'rows': ezid_rows,
+                       'latency': latency, 'workers': worker_count}
+    for rows in crossref_rows:
+        yield {'suite': 'crossref', 'case': 'create_batch_from_csv', 'rows': rows, 'content_type': 'report'}
+
+
+def case_name(spec):
+    if spec['suite'] == 'startup':
+        return f"startup.{spec['case']}[runs={spec['rows']}]"
+    if spec['suite'] == 'ezid':
+        return f"ezid.{spec['case']}[rows={spec['rows']},latency={spec['latency']},workers={spec['workers']}]"
+    return f"crossref.{spec['case']}[rows={spec['rows']},type={spec['content_type']}]"
+
+
+def repo_env():
+    """Environment for child interpreters, with the checkout first on PYTHONPATH."""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [REPO_ROOT, env.get('PYTHONPATH')]))
+    return env
+
+
+def run_in_subprocess(spec):
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--run-case', json.dumps(spec)],
+        capture_output=True, text=True, check=True, env=repo_env(),
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True, cwd=REPO_ROOT).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_comparison(results, baseline_file):
+    with open(baseline_file) as f:
+        baseline = {r['name']: r for r in json.load(f)['results']}
+    print(f"\nCompared with {baseline_file}:")
+    for result in results:
+        before = baseline.get(result['name'])
+        if before:
+            change = (result['rows_per_s'] - before['rows_per_s']) / before['rows_per_s'] * 100
+            print(f"  {result['name']}: {before['rows_per_s']} -> {result['rows_per_s']} rows/s ({change:+.1f}%)")
+
+
+@click.command(help="Benchmark EZID minting, status switching and Crossref deposit generation")
+@click.option("--output", "-o", default="bench_results.json", help="Where to write JSON results")
+@click.option("--ezid_rows", default=500, type=int, help="Rows per EZID case")
+@click.option("--crossref_rows", multiple=True, type=int, help="Crossref row counts (default: 1k, 10k, 100k)")
+@click.option("--quick", is_flag=True, help="Run a reduced grid of EZID latencies and workers")
+@click.option("--compare", type=click.Path(exists=True), help="Earlier results file to compare throughput with")
+@click.option("--run-case", "run_case", hidden=True)
+def main(output, ezid_rows, crossref_rows, quick, compare, run_case):
+    sys.path.insert(0, REPO_ROOT)
+    if run_case:
+        spec = json.loads(run_case)
+        if spec['suite'] == 'startup':
+            result = run_startup_case(spec['case'], spec['rows'])
+        elif spec['suite'] == 'ezid':
+            result = run_ezid_case(spec['case'], spec['rows'], spec['latency'], spec['workers'])
+        else:
+            result = run_crossref_case(spec['rows'], spec['content_type'])
+        result['peak_rss_mb'] = peak_rss_mb()
+        print(json.dumps(result))
+        return
+
+    results = []
+    for spec in cases(ezid_rows, crossref_rows or CROSSREF_ROWS, quick):
+        result = {'name': case_name(spec), **spec, **run_in_subprocess(spec)}
+        results.append(result)
+        print(f"{result['name']}: {result['rows_per_s']} rows/s, peak RSS {result['peak_rss_mb']} MB, "
+              f"p50 {result['p50_ms']} ms, p99 {result['p99_ms']} ms")
+
+    with open(output, 'w') as f:
+        json.dump({
+            'commit': git_commit(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'results': results,
+        }, f, indent=2)
+    print(f"Wrote {output}")
+
+    if compare:
+        print_comparison(results, compare)
+
+
+if __name__ == "__main__":
+    main()
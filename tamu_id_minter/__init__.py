@@ -1,4 +1,20 @@
-from .ezid import EZIDARKHandler
-from .crossref import CrossrefDepositHandler
+from importlib import import_module
 
-__all__ = ['EZIDARKHandler', 'CrossrefDepositHandler']
\ No newline at end of file
+# Handlers are imported on first use so that loading the package (and the CLI)
+# doesn't pay for requests, tqdm and the XML machinery up front
+_LAZY = {
+    'EZIDARKHandler': '.ezid',
+    'CrossrefDepositHandler': '.crossref',
+}
+
+__all__ = ['EZIDARKHandler', 'CrossrefDepositHandler']
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        return getattr(import_module(_LAZY[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
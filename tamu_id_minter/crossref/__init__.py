@@ -1,3 +1,18 @@
-from .crossref import CrossrefDepositHandler
+from importlib import import_module
 
-__all__ = ['CrossrefDepositHandler']
+_LAZY = {
+    'CrossrefDepositHandler': '.crossref',
+    'CrossrefSubmissionHandler': '.submit',
+}
+
+__all__ = ['CrossrefDepositHandler', 'CrossrefSubmissionHandler']
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        return getattr(import_module(_LAZY[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -1,103 +1,360 @@
 import csv
+import json
 import os
+import re
+from collections import deque
 from datetime import datetime
+from functools import partial
+from urllib.parse import urlparse
 from xml.etree.ElementTree import Element, SubElement
-from .templates import PendingPublicationTemplate, ReportTemplate
+from .dates import DateParser
+from .duplicates import DuplicateIndex
+from .fingerprints import fingerprint
+from .names import ContributorCache
+from .templates import PendingPublicationTemplate, ReportTemplate, ResourceUpdateTemplate
+from .writer import DepositXMLWriter, render_record
+from ..pool import chunked, ordered_map
+from ..profiling import stage, timed_iter
+from ..registry import strip_doi_prefix
+
+
+DOI_PATTERN = re.compile(r"10\.\d{4,9}/\S+$")
+
+# Handlers kept alive in each worker process so contributor caches survive between chunks
+_worker_handlers = {}
+
+
+def render_chunk(content_type, indent, settings, chunk):
+    """Render a chunk of metadata rows to serialized records in a worker process.
+
+    Args:
+        content_type (str): 'pending_publication' or 'report'
+        indent (str): Indentation per level, or None for compact output
+        settings (tuple): Handler keyword arguments from CrossrefDepositHandler.worker_settings
+        chunk (list[dict]): Metadata dictionaries
+
+    Returns:
+        list[str]: Serialized records, in the order of the chunk
+    """
+    handler = _worker_handlers.get(settings)
+    if handler is None:
+        handler = CrossrefDepositHandler(**dict(settings))
+        _worker_handlers[settings] = handler
+    template = handler.create_template(content_type)
+    return [render_record(handler.build_record(template, content_type, metadata), indent) for metadata in chunk]
 
 
 class CrossrefDepositHandler:
     """Handler for generating Crossref XML deposit files.
 
-    Supports two content types:
+    Supports three content types:
     - pending_publication: For preprints/articles accepted but not yet published
     - report: For technical reports and working papers
+    - resource_update: Bulk URL update files that move existing DOIs to new URLs
     """
 
+    REQUIRED_COLUMNS = ['Title', 'Contributor', 'Acceptance date', 'DOI', 'Resource']
+    RESOURCE_UPDATE_COLUMNS = ['DOI', 'Resource']
+
     def __init__(self,
                  depositor_name=None,
                  depositor_email=None,
-                 registrant=None):
+                 registrant=None,
+                 processes=1,
+                 chunk_size=500,
+                 name_authority=None,
+                 name_cache_size=4096,
+                 date_order=None,
+                 registry=None,
+                 deposit_cache=None,
+                 incremental=False,
+                 check_registry=False):
         """Initialize with depositor credentials.
 
         Args:
             depositor_name (str): Name of depositor organization
             depositor_email (str): Contact email for depositor
             registrant (str): Name of registrant organization
+            processes (int): Worker processes used to render records (1 renders in this process)
+            chunk_size (int): Rows sent to a worker process at a time
+            name_authority (str): Optional CSV of curated contributor name splits
+            name_cache_size (int): Most contributor strings kept in the parse cache
+            date_order (str): 'MM/DD/YYYY' or 'DD/MM/YYYY' to skip detecting the batch's slash date order
+            registry (IdentifierRegistry): Optional registry of deposited DOIs, updated after
+                each deposit
+            deposit_cache (DepositCache): Optional store of each DOI's content hash and rendered
+                record, reused for rows whose content hasn't changed
+            incremental (bool): Leave rows unchanged since they were last deposited out of the
+                deposit (requires deposit_cache)
+            check_registry (bool): Flag new-record DOIs that are already in the registry as
+                duplicates, unless the deposit cache already holds them
         """
+        if incremental and deposit_cache is None:
+            raise ValueError("Incremental deposits need a deposit_cache")
+
         # Use environment variables with fallback to defaults
         self.depositor_name = depositor_name or os.getenv('CROSSREF_DEPOSITOR_NAME', 'TAMU Libraries')
         self.depositor_email = depositor_email or os.getenv('CROSSREF_DEPOSITOR_EMAIL', 'depositor@library.tamu.edu')
         self.registrant = registrant or os.getenv('CROSSREF_REGISTRANT', 'Texas A&M University')
+        self.processes = max(1, processes)
+        self.chunk_size = chunk_size
         self.completed = []
-
-    def process_csv(self, input_file):
-        """Process CSV file and build metadata list.
+        self.record_count = 0
+        self.deposit_files = []
+        self.validated_rows = 0
+        self.duplicates = []
+        self.batch_id = None
+        self.registry = registry
+        self.deposit_cache = deposit_cache
+        self.incremental = incremental
+        self.check_registry = check_registry
+        self.unchanged = 0
+        self.reused_fragments = 0
+        self.name_authority = name_authority
+        self.name_cache_size = name_cache_size
+        self.contributor_cache = ContributorCache(name_cache_size, name_authority)
+        self.date_parser = DateParser(slash_order=date_order)
+
+    def iter_csv(self, input_file, content_type=None):
+        """Lazily read and validate the metadata rows of a CSV file.
 
         Args:
             input_file (str): Path to CSV file
+            content_type (str): 'resource_update' only requires the DOI and Resource columns
 
-        Returns:
-            list[dict]: List of metadata dictionaries
+        A DOI repeated within the batch raises ValueError. Other duplicates (a
+        resource URL under two DOIs, or with check_registry a DOI already in
+        the registry) are collected in duplicates. A URL update re-sends
+        registered DOIs on purpose, so it is never checked against the
+        registry, and neither is a DOI the deposit cache already holds.
+
+        Yields:
+            dict: Metadata dictionary for each non-empty row
         """
-        metadata_list = []
+        self.duplicates = []
+        check_registry = self.check_registry and content_type != 'resource_update'
+        duplicate_index = DuplicateIndex(self.registry if check_registry else None)
 
         with open(input_file, 'r', newline='', encoding='utf-8') as csvfile:
             reader = csv.DictReader(csvfile)
 
             # Validate required columns
-            required_columns = ['Title', 'Contributor', 'Acceptance date', 'DOI', 'Resource']
-            if not all(col in reader.fieldnames for col in required_columns):
-                missing = [col for col in required_columns if col not in reader.fieldnames]
+            missing = self.missing_columns(reader.fieldnames, content_type)
+            if missing:
                 raise ValueError(f"CSV missing required columns: {', '.join(missing)}")
 
-            for row in reader:
-                # Normalize column names (case-insensitive matching)
-                metadata = {
-                    'title': row.get('Title', '').strip(),
-                    'contributor': row.get('Contributor', '').strip(),
-                    'acceptance_date': row.get('Acceptance date', '').strip(),
-                    'doi': row.get('DOI', '').strip(),
-                    'resource': row.get('Resource', '').strip(),
-                }
+            for index, row in timed_iter('read_csv', enumerate(reader, start=2)):
+                metadata = self.normalize_row(row)
 
                 # Skip empty rows
                 if not any(metadata.values()):
                     continue
 
                 # Validate required fields
-                if not metadata['title']:
+                if not metadata['title'] and content_type != 'resource_update':
                     raise ValueError(f"Missing Title in row: {row}")
                 if not metadata['doi']:
                     raise ValueError(f"Missing DOI in row: {row}")
                 if not metadata['resource']:
                     raise ValueError(f"Missing Resource in row: {row}")
 
-                metadata_list.append(metadata)
-                self.completed.append(metadata)
+                with stage('duplicates'):
+                    duplicates = duplicate_index.check(index, metadata)
+                for duplicate in duplicates:
+                    if duplicate['kind'] == 'batch' and duplicate['column'] == 'DOI':
+                        raise ValueError(f"{duplicate['reason']} in row: {row}")
+                    if duplicate['kind'] == 'registry' and self.deposit_cache is not None \
+                            and self.deposit_cache.get(metadata['doi']) is not None:
+                        continue
+                    self.duplicates.append(duplicate)
+
+                yield metadata
+
+    def missing_columns(self, fieldnames, content_type=None):
+        """Return the columns a content type requires that are absent from a CSV header."""
+        required = self.RESOURCE_UPDATE_COLUMNS if content_type == 'resource_update' else self.REQUIRED_COLUMNS
+        return [col for col in required if col not in (fieldnames or [])]
+
+    def normalize_row(self, row):
+        """Map a CSV row to a metadata dictionary with stripped values."""
+        return {
+            'title': (row.get('Title') or '').strip(),
+            'contributor': (row.get('Contributor') or '').strip(),
+            'acceptance_date': (row.get('Acceptance date') or '').strip(),
+            'doi': (row.get('DOI') or '').strip(),
+            'resource': (row.get('Resource') or '').strip(),
+        }
+
+    def iter_validation_errors(self, input_file):
+        """Check every row of a CSV in one pass, without building any XML.
+
+        Rows are numbered as in a spreadsheet: the header is row 1, so the
+        first record is row 2.
+
+        Args:
+            input_file (str): Path to CSV file
+
+        Yields:
+            dict: One error with its row, column and reason
+        """
+        with open(input_file, 'r', newline='', encoding='utf-8') as csvfile:
+            reader = csv.DictReader(csvfile)
+
+            missing = self.missing_columns(reader.fieldnames)
+            if missing:
+                for column in missing:
+                    yield {'row': 1, 'column': column, 'reason': 'Missing required column'}
+                return
+
+            def rows():
+                for index, row in enumerate(reader, start=2):
+                    metadata = self.normalize_row(row)
+                    if any(metadata.values()):
+                        yield dict(metadata, row=index)
+
+            self.validated_rows = 0
+            template = self.create_template('report')
+            duplicate_index = DuplicateIndex(self.registry)
+            self.date_parser.start_batch()
+            for metadata in self.date_parser.detect(rows()):
+                self.validated_rows += 1
+                for column, reason in self.check_metadata(template, metadata):
+                    yield {'row': metadata['row'], 'column': column, 'reason': reason}
+                for duplicate in duplicate_index.check(metadata['row'], metadata):
+                    yield {'row': duplicate['row'], 'column': duplicate['column'], 'reason': duplicate['reason']}
+
+    def check_metadata(self, template, metadata):
+        """Return (column, reason) pairs for every problem in one metadata row."""
+        problems = []
+        for column, key in [('Title', 'title'), ('DOI', 'doi'), ('Resource', 'resource')]:
+            if not metadata[key]:
+                problems.append((column, f"Missing {column}"))
+
+        if metadata['doi'] and not DOI_PATTERN.match(strip_doi_prefix(metadata['doi'])):
+            problems.append(('DOI', f"Invalid DOI: {metadata['doi']} (expected 10.<prefix>/<suffix>)"))
+
+        if metadata['resource']:
+            url = urlparse(metadata['resource'])
+            if url.scheme not in ('http', 'https') or not url.netloc:
+                problems.append(('Resource', f"Invalid resource URL: {metadata['resource']}"))
+
+        try:
+            template.parse_date(metadata['acceptance_date'])
+        except ValueError as e:
+            problems.append(('Acceptance date', str(e)))
+
+        contributors = template.parse_contributors(metadata['contributor'])
+        if not contributors:
+            problems.append(('Contributor', 'Missing Contributor'))
+        elif not all(surname for _, surname in contributors):
+            problems.append(('Contributor', f"Contributor without a surname: {metadata['contributor']}"))
+
+        return problems
+
+    def validate_csv(self, input_file):
+        """Validate a CSV and return every error found.
+
+        Args:
+            input_file (str): Path to CSV file
+
+        Returns:
+            list[dict]: Errors with row, column and reason, in row order
+        """
+        return list(self.iter_validation_errors(input_file))
+
+    def save_validation_report(self, errors, output_file):
+        """Write validation errors to a CSV with row, column and reason columns."""
+        with open(output_file, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=['row', 'column', 'reason'])
+            writer.writeheader()
+            writer.writerows(errors)
+
+    def process_csv(self, input_file):
+        """Process CSV file and build metadata list.
+
+        Args:
+            input_file (str): Path to CSV file
+
+        Returns:
+            list[dict]: List of metadata dictionaries
+        """
+        metadata_list = []
+
+        for metadata in self.iter_csv(input_file):
+            metadata_list.append(metadata)
+            self.completed.append(metadata)
 
         return metadata_list
 
+    def create_template(self, content_type):
+        """Return the template that renders records of a content type.
+
+        Args:
+            content_type (str): 'pending_publication', 'report' or 'resource_update'
+
+        Returns:
+            CrossrefXMLTemplate: Template instance
+        """
+        if content_type == 'pending_publication':
+            return PendingPublicationTemplate(self.contributor_cache, self.date_parser)
+        elif content_type == 'report':
+            return ReportTemplate(self.contributor_cache, self.date_parser)
+        elif content_type == 'resource_update':
+            return ResourceUpdateTemplate()
+        else:
+            raise ValueError(f"Invalid content_type: {content_type}. "
+                             f"Must be 'pending_publication', 'report' or 'resource_update'")
+
+    def check_xml_content_type(self, content_type):
+        """Raise ValueError for resource_update, which is written as a URL update file rather than XML."""
+        if content_type == 'resource_update':
+            raise ValueError("resource_update writes a bulk URL update file, not XML; use create_batch_from_csv")
+
+    def worker_settings(self):
+        """Return the keyword arguments a worker process needs to render records like this handler."""
+        return (
+            ('name_authority', self.name_authority),
+            ('name_cache_size', self.name_cache_size),
+            ('date_order', self.date_parser.slash_order),
+        )
+
+    def create_batch_id(self, content_type):
+        """Generate a batch ID with timestamp for a content type."""
+        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+        self.batch_id = f"TAMU-{content_type.upper().replace('_', '-')}-{timestamp}"
+        return self.batch_id
+
+    def add_record(self, template, content_type, parent, metadata):
+        """Add one content item for a metadata row to parent."""
+        if content_type == 'pending_publication':
+            template.create_pending_publication(parent, metadata)
+        elif content_type == 'report':
+            template.create_report_paper(parent, metadata)
+
+    def build_record(self, template, content_type, metadata):
+        """Build the element for one metadata row on its own, outside any document."""
+        with stage('build_record'):
+            scratch = Element('body')
+            self.add_record(template, content_type, scratch, metadata)
+        return scratch[0]
+
     def generate_deposit_xml(self, content_type, metadata_list):
         """Generate Crossref XML deposit file.
 
         Args:
-            content_type (str): Either 'pending_publication' or 'report'
+            content_type (str): 'pending_publication' or 'report'
             metadata_list (list[dict]): List of metadata dictionaries
 
         Returns:
             str: Complete XML deposit document
         """
+        self.check_xml_content_type(content_type)
+
         # Generate batch ID with timestamp
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        batch_id = f"TAMU-{content_type.upper().replace('_', '-')}-{timestamp}"
+        batch_id = self.create_batch_id(content_type)
 
         # Create template based on content type
-        if content_type == 'pending_publication':
-            template = PendingPublicationTemplate()
-        elif content_type == 'report':
-            template = ReportTemplate()
-        else:
-            raise ValueError(f"Invalid content_type: {content_type}. Must be 'pending_publication' or 'report'")
+        template = self.create_template(content_type)
 
         # Create root element with head
         root = template.create_doi_batch(
@@ -111,14 +368,315 @@ class CrossrefDepositHandler:
         body = SubElement(root, 'body')
 
         # Add content items
-        for metadata in metadata_list:
-            if content_type == 'pending_publication':
-                template.create_pending_publication(body, metadata)
-            elif content_type == 'report':
-                template.create_report_paper(body, metadata)
+        self.date_parser.start_batch()
+        for metadata in self.date_parser.detect(metadata_list):
+            self.add_record(template, content_type, body, metadata)
 
         # Format and return XML
-        return template.prettify_xml(root)
+        with stage('serialize'):
+            return template.prettify_xml(root)
+
+    def write_deposit_xml(self, content_type, metadata_iter, output_file, indent="  "):
+        """Stream a Crossref XML deposit to a file, one record at a time.
+
+        Produces the same document as generate_deposit_xml followed by save_xml,
+        without ever holding more than one record in memory.
+
+        Args:
+            content_type (str): 'pending_publication' or 'report'
+            metadata_iter (iterable[dict]): Metadata dictionaries, consumed lazily
+            output_file (str): Output XML path
+            indent (str): Indentation per level, or None for compact output
+
+        Returns:
+            int: Number of records written
+        """
+        self.check_xml_content_type(content_type)
+        template = self.create_template(content_type)
+        root = template.create_doi_batch(
+            self.depositor_name,
+            self.depositor_email,
+            self.registrant,
+            self.create_batch_id(content_type)
+        )
+
+        with open(output_file, 'w', encoding='utf-8') as f:
+            writer = DepositXMLWriter(f, indent=indent)
+            writer.start(root)
+            for fragment in self.iter_fragments(template, content_type, metadata_iter, indent):
+                with stage('write_xml'):
+                    writer.write_fragment(fragment)
+            writer.close()
+
+        return writer.records
+
+    def iter_fragments(self, template, content_type, metadata_iter, indent="  "):
+        """Lazily render each metadata row to its serialized record.
+
+        With more than one process, rows are rendered in chunks on a process
+        pool and the fragments are still yielded in input order. Rows carrying
+        a cached fragment (see fingerprint_records) are not rendered again,
+        and with a deposit cache every fresh fragment is stored in it.
+
+        Yields:
+            str: Serialized pending_publication or report-paper element
+        """
+        metadata_iter = self.date_parser.detect(metadata_iter)
+        if self.processes == 1:
+            for metadata in metadata_iter:
+                fragment = metadata.get('fragment')
+                if fragment is None:
+                    record = self.build_record(template, content_type, metadata)
+                    with stage('serialize'):
+                        fragment = render_record(record, indent)
+                    self.cache_fragment(content_type, metadata, indent, fragment)
+                yield fragment
+            return
+
+        # Only rows without a cached fragment go to the workers; the chunk is
+        # kept here until its results are back to put the two in order again
+        pending = deque()
+
+        def to_render():
+            for chunk in chunked(metadata_iter, self.chunk_size):
+                pending.append(chunk)
+                fresh = [metadata for metadata in chunk if metadata.get('fragment') is None]
+                self.note_dates(fresh)
+                yield fresh
+
+        rendered_chunks = ordered_map(
+            partial(render_chunk, content_type, indent, self.worker_settings()),
+            to_render(),
+            workers=self.processes,
+            processes=True
+        )
+        for rendered in timed_iter('render_pool', rendered_chunks):
+            rendered = iter(rendered)
+            for metadata in pending.popleft():
+                fragment = metadata.get('fragment')
+                if fragment is None:
+                    fragment = next(rendered)
+                    self.cache_fragment(content_type, metadata, indent, fragment)
+                yield fragment
+
+    def note_dates(self, chunk):
+        """Parse a chunk's dates here so the ambiguity report covers rows rendered by worker processes.
+
+        Workers parse in the order detected here but keep their own counts, so
+        the parent parses each date too; the cache keeps that cheap. Invalid
+        dates are left for the worker to raise.
+        """
+        for metadata in chunk:
+            try:
+                self.date_parser.parse(metadata['acceptance_date'])
+            except ValueError:
+                pass
+
+    def fingerprint_records(self, content_type, metadata_iter, indent="  "):
+        """Hash each row's content and look it up in the deposit cache.
+
+        Rows get a fingerprint and, when the cache holds a record rendered
+        from the same content with the same indent, that fragment. In
+        incremental mode unchanged rows whose deposit Crossref confirmed are
+        dropped and counted in unchanged; unconfirmed ones are sent again.
+
+        The batch's date order (detected by the caller before any row gets
+        here) is part of the fingerprint of slash dates, so a record rendered
+        month first is never reused in a batch read day first. Rows that
+        aren't rendered still have their dates parsed for the ambiguity report.
+
+        Yields:
+            dict: Metadata dictionaries of the rows to deposit
+        """
+        self.unchanged = 0
+        self.reused_fragments = 0
+        has_dates = content_type != 'resource_update'
+        for metadata in metadata_iter:
+            with stage('deposit_cache'):
+                metadata['fingerprint'] = self.record_fingerprint(content_type, metadata)
+                entry = self.deposit_cache.get(metadata['doi'])
+            if entry is not None and entry['fingerprint'] == metadata['fingerprint']:
+                if self.incremental and entry['confirmed']:
+                    self.unchanged += 1
+                    if has_dates:
+                        self.note_dates([metadata])
+                    continue
+                if entry['indent'] == indent:
+                    metadata['fragment'] = entry['fragment']
+                    self.reused_fragments += 1
+                    if has_dates:
+                        self.note_dates([metadata])
+            yield metadata
+
+    def record_fingerprint(self, content_type, metadata):
+        """Fingerprint a row together with the order its slash date is read in."""
+        date_order = None
+        if content_type != 'resource_update':
+            date_order = self.date_parser.order_for(metadata.get('acceptance_date') or '')
+        return fingerprint(content_type, metadata, date_order)
+
+    def cache_fragment(self, content_type, metadata, indent, fragment):
+        """Store a freshly rendered record in the deposit cache, if there is one."""
+        if self.deposit_cache is not None:
+            with stage('deposit_cache'):
+                self.deposit_cache.put(metadata['doi'], content_type,
+                                       metadata.get('fingerprint') or self.record_fingerprint(content_type, metadata),
+                                       indent, fragment, self.batch_id)
+
+    def write_split_deposits(self, content_type, metadata_iter, output_file,
+                             max_records=None, max_bytes=None, indent="  "):
+        """Stream records into as many deposit files as the size limits require.
+
+        Each file is a complete deposit with its own doi_batch_id (the batch ID
+        plus a part number).
+
+        Args:
+            content_type (str): 'pending_publication' or 'report'
+            metadata_iter (iterable[dict]): Metadata dictionaries, consumed lazily
+            output_file (str): Output XML path; parts are named <output>-001.xml, <output>-002.xml, ...
+            max_records (int): Most records to put in one file
+            max_bytes (int): Largest file size in bytes (a single larger record still gets its own file)
+            indent (str): Indentation per level, or None for compact output
+
+        Returns:
+            list[dict]: One entry per file with its path, doi_batch_id, record range, records and bytes
+        """
+        template = self.create_template(content_type)
+        batch_id = self.create_batch_id(content_type)
+        stem, extension = os.path.splitext(output_file)
+        files = []
+        f = writer = None
+
+        def open_part(first_record):
+            part_batch_id = f"{batch_id}-{len(files) + 1:03d}"
+            path = f"{stem}-{len(files) + 1:03d}{extension or '.xml'}"
+            files.append({'file': path, 'doi_batch_id': part_batch_id,
+                          'first_record': first_record, 'last_record': first_record - 1})
+            handle = open(path, 'w', encoding='utf-8')
+            part_writer = DepositXMLWriter(handle, indent=indent)
+            part_writer.start(template.create_doi_batch(
+                self.depositor_name, self.depositor_email, self.registrant, part_batch_id
+            ))
+            return handle, part_writer
+
+        def close_part():
+            writer.close()
+            f.close()
+            files[-1].update(records=writer.records, bytes=writer.bytes)
+
+        try:
+            number = 0
+            for number, fragment in enumerate(self.iter_fragments(template, content_type, metadata_iter, indent), start=1):
+                if writer is not None and (
+                    (max_records and writer.records >= max_records) or
+                    (max_bytes and writer.bytes + len(fragment.encode('utf-8')) + writer.closing_bytes() > max_bytes)
+                ):
+                    close_part()
+                    writer = None
+                if writer is None:
+                    f, writer = open_part(number)
+                with stage('write_xml'):
+                    writer.write_fragment(fragment)
+                files[-1]['last_record'] = number
+            if writer is None:
+                f, writer = open_part(number + 1)
+            close_part()
+        finally:
+            if f is not None and not f.closed:
+                f.close()
+
+        return files
+
+    def write_url_updates(self, metadata_iter, output_file, max_records=None, max_bytes=None):
+        """Stream rows into Crossref bulk URL update files, split when size limits are given.
+
+        Every file starts with a header naming the DOI prefix, so all rows
+        must share one prefix. Without limits the single file is output_file
+        itself; otherwise parts are named <output>-001.txt, <output>-002.txt, ...
+
+        Args:
+            metadata_iter (iterable[dict]): Metadata dictionaries with doi and resource, consumed lazily
+            output_file (str): Output text path
+            max_records (int): Most DOIs to put in one file
+            max_bytes (int): Largest file size in bytes (a header and one line always fit)
+
+        Returns:
+            list[dict]: One entry per file with its path, record range, records and bytes
+
+        Raises:
+            ValueError: When a DOI has another prefix than the first row's; the
+                files written so far are removed
+        """
+        template = self.create_template('resource_update')
+        self.create_batch_id('resource_update')
+        split = bool(max_records or max_bytes)
+        stem, extension = os.path.splitext(output_file)
+        files = []
+        f = header = prefix = None
+
+        def open_part(first_record):
+            path = f"{stem}-{len(files) + 1:03d}{extension or '.txt'}" if split else output_file
+            files.append({'file': path, 'doi_batch_id': None, 'first_record': first_record,
+                          'last_record': first_record - 1, 'records': 0, 'bytes': 0})
+            handle = open(path, 'w', encoding='utf-8')
+            if header:
+                handle.write(header)
+                files[-1]['bytes'] = len(header.encode('utf-8'))
+            return handle
+
+        try:
+            number = 0
+            for number, metadata in enumerate(metadata_iter, start=1):
+                doi_prefix = template.doi_prefix(metadata['doi'])
+                if prefix is None:
+                    prefix = doi_prefix
+                    header = template.create_header(self.depositor_email, prefix)
+                elif doi_prefix != prefix:
+                    raise ValueError(f"URL update files cover one DOI prefix: {metadata['doi']} is not under {prefix}")
+                line = template.render_line(metadata)
+                size = len(line.encode('utf-8'))
+                part = files[-1] if files else None
+                if part is not None and part['records'] and (
+                    (max_records and part['records'] >= max_records) or
+                    (max_bytes and part['bytes'] + size > max_bytes)
+                ):
+                    f.close()
+                    part = None
+                if part is None:
+                    f = open_part(number)
+                    part = files[-1]
+                with stage('write_txt'):
+                    f.write(line)
+                part.update(records=part['records'] + 1, bytes=part['bytes'] + size, last_record=number)
+            if f is None:
+                f = open_part(number + 1)
+        except Exception:
+            # Don't leave a truncated URL update file behind to be mistaken for a complete one
+            if f is not None:
+                f.close()
+            for part in files:
+                os.remove(part['file'])
+            raise
+        finally:
+            if f is not None:
+                f.close()
+
+        return files
+
+    def save_manifest(self, content_type, files, manifest_file):
+        """Write the JSON manifest describing a split deposit.
+
+        Args:
+            content_type (str): 'pending_publication', 'report' or 'resource_update'
+            files (list[dict]): Entries returned by write_split_deposits or write_url_updates
+            manifest_file (str): Output JSON path
+        """
+        with open(manifest_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                'content_type': content_type,
+                'records': sum(part['records'] for part in files),
+                'files': files,
+            }, f, indent=2)
 
     def save_xml(self, xml_content, output_file):
         """Save XML content to file.
@@ -130,29 +688,110 @@ class CrossrefDepositHandler:
         with open(output_file, 'w', encoding='utf-8') as f:
             f.write(xml_content)
 
-    def create_batch_from_csv(self, input_file, output_file, content_type):
+    def create_batch_from_csv(self, input_file, output_file, content_type, indent="  ",
+                              max_records=None, max_bytes=None):
         """Main method to process CSV and generate XML deposit file.
 
+        Rows are streamed from the CSV straight into the XML file (a bulk URL
+        update text file for resource_update); the number written is kept in
+        record_count. With max_records or max_bytes the records are split
+        across several files and a manifest is written.
+        With a deposit cache, unchanged rows reuse their cached record (or, in
+        incremental mode, are left out once confirmed) and new records are
+        stored as pending once the deposit is written. URL update files are
+        never confirmed, so they bypass the cache and can't be incremental.
+
         Args:
             input_file (str): Input CSV path
-            output_file (str): Output XML path (if None, generates default name)
-            content_type (str): Either 'pending_publication' or 'report'
+            output_file (str): Output path (if None, generates default name)
+            content_type (str): 'pending_publication', 'report' or 'resource_update'
+            indent (str): Indentation per level, or None for compact output
+            max_records (int): Most records per deposit file
+            max_bytes (int): Largest deposit file size in bytes
 
         Returns:
-            str: Path to generated XML file
+            str: Path to the generated file, or to the manifest when splitting
+
+        Raises:
+            ValueError: For an incremental resource_update, or a row that fails validation
         """
         # Generate default output filename if not provided
         if not output_file:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            output_file = f"crossref-deposit-{content_type}-{timestamp}.xml"
-
-        # Process CSV
-        metadata_list = self.process_csv(input_file)
-
-        # Generate XML
-        xml_content = self.generate_deposit_xml(content_type, metadata_list)
-
-        # Save to file
-        self.save_xml(xml_content, output_file)
+            extension = '.txt' if content_type == 'resource_update' else '.xml'
+            output_file = f"crossref-deposit-{content_type}-{timestamp}{extension}"
+
+        if self.incremental and content_type == 'resource_update':
+            raise ValueError("URL update files are never confirmed, so they can't be deposited incrementally")
+
+        metadata_iter = self.iter_csv(input_file, content_type)
+        if content_type != 'resource_update':
+            # Settle the date order before the cache is consulted, since fingerprints depend on it
+            self.date_parser.start_batch()
+            metadata_iter = self.date_parser.detect(metadata_iter)
+        if self.deposit_cache is not None and content_type != 'resource_update':
+            metadata_iter = self.fingerprint_records(content_type, metadata_iter, indent)
+        if self.registry is not None:
+            metadata_iter = self.record_deposits(metadata_iter)
+
+        stores = [store for store in (self.registry, self.deposit_cache) if store is not None]
+        try:
+            result_file = self.write_batch(content_type, metadata_iter, output_file, indent,
+                                           max_records, max_bytes)
+        except Exception:
+            for store in stores:
+                store.rollback()
+            raise
+
+        with stage('commit'):
+            for store in stores:
+                store.commit()
+        return result_file
+
+    def record_deposits(self, metadata_iter):
+        """Pass metadata through, adding each DOI to the registry under the current batch ID.
+
+        The additions are committed by create_batch_from_csv once the deposit is written.
+        """
+        for metadata in metadata_iter:
+            with stage('registry'):
+                self.registry.add(metadata['doi'], 'doi', metadata['resource'], self.batch_id)
+            yield metadata
+
+    def write_batch(self, content_type, metadata_iter, output_file, indent, max_records, max_bytes):
+        """Write the deposit as one file, or split with a manifest, and return the path to report."""
+        if content_type == 'resource_update':
+            files = self.write_url_updates(metadata_iter, output_file, max_records, max_bytes)
+            self.deposit_files = [part['file'] for part in files]
+            self.record_count = sum(part['records'] for part in files)
+            if not (max_records or max_bytes):
+                return output_file
+            manifest_file = f"{os.path.splitext(output_file)[0]}-manifest.json"
+            self.save_manifest(content_type, files, manifest_file)
+            return manifest_file
+
+        if max_records or max_bytes:
+            files = self.write_split_deposits(
+                content_type,
+                metadata_iter,
+                output_file,
+                max_records=max_records,
+                max_bytes=max_bytes,
+                indent=indent
+            )
+            manifest_file = f"{os.path.splitext(output_file)[0]}-manifest.json"
+            self.save_manifest(content_type, files, manifest_file)
+            self.deposit_files = [part['file'] for part in files]
+            self.record_count = sum(part['records'] for part in files)
+            return manifest_file
+
+        # Stream CSV rows into the XML file
+        self.deposit_files = [output_file]
+        self.record_count = self.write_deposit_xml(
+            content_type,
+            metadata_iter,
+            output_file,
+            indent=indent
+        )
 
         return output_file
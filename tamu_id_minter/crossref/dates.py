@@ -0,0 +1,186 @@
+import re
+from collections import Counter
+from datetime import date
+from itertools import chain, islice
+
+ISO_DATE = re.compile(r"(\d{4})-(\d{1,2})-(\d{1,2})$")
+YEAR_FIRST_SLASH_DATE = re.compile(r"(\d{4})/(\d{1,2})/(\d{1,2})$")
+SLASH_DATE = re.compile(r"(\d{1,2})/(\d{1,2})/(\d{4})$")
+
+MONTH_FIRST = 'MM/DD/YYYY'
+DAY_FIRST = 'DD/MM/YYYY'
+
+
+class DateParser:
+    """Parse the acceptance dates of a batch without strptime.
+
+    Supports formats:
+    - YYYY-MM-DD (ISO 8601)
+    - YYYY/MM/DD
+    - MM/DD/YYYY or DD/MM/YYYY, whichever the batch uses
+
+    Which of MM/DD and DD/MM a batch uses is detected from its first rows. A
+    slash date that reads either way (e.g. 03/04/2025) is parsed in the detected
+    order, falling back to MM/DD, and is recorded in ambiguous when the batch
+    gave no evidence for either order or evidence for both. A date that only
+    reads in the other order (e.g. 13/05/2024 in an MM/DD batch) is recorded in
+    mismatched. Both count rows, not distinct strings.
+    """
+
+    def __init__(self, slash_order=None, sample_size=100, cache_size=10000):
+        """Initialize the parser.
+
+        Args:
+            slash_order (str): MONTH_FIRST or DAY_FIRST to skip detection
+            sample_size (int): Rows looked at when detecting the batch's format
+            cache_size (int): Most distinct date strings remembered
+        """
+        self.slash_order = slash_order
+        self.detected = slash_order is not None
+        self.sampled = False
+        self.sample_size = sample_size
+        self.cache_size = cache_size
+        self.conflict = False
+        self.cache = {}
+        self.ambiguous = Counter()
+        self.mismatched = Counter()
+
+    def detect(self, metadata_iter, field='acceptance_date'):
+        """Detect the slash order from the first rows of a batch.
+
+        Args:
+            metadata_iter (iterable[dict]): Metadata dictionaries
+            field (str): Key holding the date string
+
+        Only the first call of a batch looks at rows (see start_batch), so a
+        batch whose first rows settle nothing isn't read in two orders.
+
+        Returns:
+            iterator[dict]: The same rows, none consumed
+        """
+        if self.sampled:
+            return metadata_iter
+        self.sampled = True
+        metadata_iter = iter(metadata_iter)
+        sample = list(islice(metadata_iter, self.sample_size))
+        if not self.detected:
+            month_first, day_first = self.count_slash_orders(row.get(field, '') for row in sample)
+            self.slash_order = self.detect_slash_order(month_first, day_first)
+            self.detected = self.slash_order is not None
+            self.conflict = bool(month_first and day_first)
+        return chain(sample, metadata_iter)
+
+    def start_batch(self):
+        """Let the next call to detect sample the rows of a new batch."""
+        self.sampled = False
+
+    def order_for(self, date_string):
+        """Return the slash order a date string is read in, or None when it isn't a slash date."""
+        if SLASH_DATE.match(date_string.strip()):
+            return self.slash_order or MONTH_FIRST
+        return None
+
+    @staticmethod
+    def detect_slash_order(month_first, day_first):
+        """Return the slash order the evidence counts favour, or None when there is none."""
+        if day_first > month_first:
+            return DAY_FIRST
+        if month_first:
+            return MONTH_FIRST
+        return None
+
+    @staticmethod
+    def count_slash_orders(date_strings):
+        """Count the slash dates that only read month first and those that only read day first.
+
+        Returns:
+            tuple: (month_first, day_first) counts
+        """
+        month_first = day_first = 0
+        for date_string in date_strings:
+            match = SLASH_DATE.match(date_string.strip())
+            if not match:
+                continue
+            first, second = int(match.group(1)), int(match.group(2))
+            if first > 12 >= second:
+                day_first += 1
+            elif second > 12 >= first:
+                month_first += 1
+        return month_first, day_first
+
+    def parse(self, date_string):
+        """Parse date string into (month, day, year) tuple.
+
+        Args:
+            date_string (str): Date string to parse
+
+        Returns:
+            tuple: (month, day, year) as strings
+        """
+        cached = self.cache.get(date_string)
+        if cached is None:
+            cached = self.parse_uncached(date_string)
+            if len(self.cache) >= self.cache_size:
+                self.cache.clear()
+            self.cache[date_string] = cached
+        parsed, counter = cached
+        if counter is not None:
+            counter[date_string] += 1
+        return parsed
+
+    def parse_uncached(self, date_string):
+        """Parse a date string without the cache.
+
+        Returns:
+            tuple: The (month, day, year) strings, and the counter its rows are
+            recorded in (ambiguous, mismatched or None)
+        """
+        value = date_string.strip()
+
+        match = ISO_DATE.match(value) or YEAR_FIRST_SLASH_DATE.match(value)
+        if match:
+            year, month, day = match.groups()
+            return self.checked(date_string, year, month, day), None
+
+        match = SLASH_DATE.match(value)
+        if match:
+            first, second, year = match.groups()
+            if self.slash_order == DAY_FIRST:
+                candidates = [(second, first), (first, second)]
+            else:
+                candidates = [(first, second), (second, first)]
+            if first != second and int(first) <= 12 and int(second) <= 12:
+                counter = self.ambiguous if not self.detected or self.conflict else None
+            else:
+                counter = None
+            for attempt, (month, day) in enumerate(candidates):
+                try:
+                    parsed = self.checked(date_string, year, month, day)
+                except ValueError:
+                    continue
+                if attempt and self.slash_order is not None:
+                    counter = self.mismatched
+                return parsed, counter
+
+        raise ValueError(f"Unable to parse date: {date_string}. Expected format: YYYY-MM-DD")
+
+    @staticmethod
+    def checked(date_string, year, month, day):
+        """Validate the parts form a real date and return them as (month, day, year) strings."""
+        try:
+            parsed = date(int(year), int(month), int(day))
+        except ValueError:
+            raise ValueError(f"Unable to parse date: {date_string}. Expected format: YYYY-MM-DD")
+        return (str(parsed.month), str(parsed.day), str(parsed.year))
+
+    def stats(self):
+        """Return the detected format, ambiguous dates and dates read against it for reporting."""
+        return {
+            'slash_order': self.slash_order,
+            'conflict': self.conflict or bool(self.mismatched),
+            'cached': len(self.cache),
+            'ambiguous_rows': sum(self.ambiguous.values()),
+            'ambiguous_dates': sorted(self.ambiguous),
+            'mismatched_rows': sum(self.mismatched.values()),
+            'mismatched_dates': sorted(self.mismatched),
+        }
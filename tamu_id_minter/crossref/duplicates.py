@@ -0,0 +1,53 @@
+from ..registry import normalize_identifier
+
+
+class DuplicateIndex:
+    """Hash index of the DOIs and resource URLs seen so far in a batch.
+
+    Rows are checked as the CSV streams, so only one entry per DOI and per
+    resource is held in memory. With a registry, DOIs deposited in earlier
+    batches are flagged as well.
+    """
+
+    def __init__(self, registry=None):
+        """Initialize the index.
+
+        Args:
+            registry (IdentifierRegistry): Optional registry of DOIs in deposits generated earlier
+        """
+        self.registry = registry
+        self.dois = {}
+        self.resources = {}
+
+    def check(self, row, metadata):
+        """Index one row and return the duplicates it introduces.
+
+        Args:
+            row (int): Spreadsheet row number of the metadata
+            metadata (dict): Metadata dictionary with doi and resource
+
+        Returns:
+            list[dict]: Duplicates with row, column, kind ('batch' or 'registry') and reason
+        """
+        duplicates = []
+        doi = normalize_identifier(metadata['doi'], 'doi')
+        resource = metadata['resource']
+
+        if doi:
+            first_row = self.dois.setdefault(doi, row)
+            if first_row != row:
+                duplicates.append({'row': row, 'column': 'DOI', 'kind': 'batch',
+                                   'reason': f"Duplicate DOI {metadata['doi']} (first seen in row {first_row})"})
+            elif self.registry is not None:
+                entry = self.registry.get(doi)
+                if entry is not None:
+                    duplicates.append({'row': row, 'column': 'DOI', 'kind': 'registry',
+                                       'reason': f"DOI {metadata['doi']} is already in generated deposit batch {entry['batch']}"})
+
+        if resource:
+            first_row, first_doi = self.resources.setdefault(resource, (row, doi))
+            if first_row != row and first_doi != doi:
+                duplicates.append({'row': row, 'column': 'Resource', 'kind': 'batch',
+                                   'reason': f"Resource {resource} is also used by DOI {first_doi} (row {first_row})"})
+
+        return duplicates
@@ -0,0 +1,244 @@
+import itertools
+import random
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from xml.etree.ElementTree import ParseError, fromstring
+import click
+from .submit import local_name
+from .writer import escape_text
+
+
+class FakeCrossrefServer:
+    """Local stand-in for the Crossref deposit and submission log endpoints.
+
+    Implements POST /servlet/deposit (multipart doMDUpload) and
+    GET /servlet/submissionDownload?doi_batch_id=...&type=result. A batch
+    is reported as queued for a few polls before its log is completed,
+    and a fraction of its DOIs can be made to fail.
+
+    Example:
+        >>> with FakeCrossrefServer(polls_until_complete=2) as server:
+        ...     handler = CrossrefSubmissionHandler(deposit_url=server.deposit_url, status_url=server.status_url)
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, polls_until_complete=1,
+                 failure_rate=0.0, seed=None, status_body=None):
+        """Configure the server; it listens once started.
+
+        Args:
+            host (str): Interface to bind
+            port (int): Port to bind (0 picks a free one)
+            latency (float): Seconds each request sleeps before answering
+            polls_until_complete (int): Status checks answered 'queued' before a batch's log is complete
+            failure_rate (float): Fraction of DOIs reported as failures
+            seed (int): Seed for the failure-rate random generator
+            status_body (str): Body every status check gets instead of the batch's log, e.g. an HTML error page
+        """
+        self.latency = latency
+        self.polls_until_complete = polls_until_complete
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.status_body = status_body
+        self.submissions = {}
+        self.counter = itertools.count(1)
+        self.lock = threading.Lock()
+        self.stats = {'requests': 0, 'uploads': 0, 'polls': 0}
+        self.httpd = ThreadingHTTPServer((host, port), self.request_handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        """Base URL of the running server."""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def deposit_url(self):
+        return f"{self.url}/servlet/deposit"
+
+    @property
+    def status_url(self):
+        return f"{self.url}/servlet/submissionDownload"
+
+    def start(self):
+        """Serve requests on a background thread."""
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the listening socket."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def count(self, stat):
+        with self.lock:
+            self.stats[stat] += 1
+
+    def accept(self, content):
+        """Queue a deposit file; returns its doi_batch_id, or None when it isn't a deposit."""
+        try:
+            root = fromstring(content)
+        except ParseError:
+            return None
+        batch_id = None
+        dois = []
+        for elem in root.iter():
+            name = local_name(elem.tag)
+            if name == 'doi_batch_id':
+                batch_id = (elem.text or '').strip()
+            elif name == 'doi':
+                dois.append((elem.text or '').strip())
+        if not batch_id:
+            return None
+        with self.lock:
+            failed = {doi for doi in dois if self.failure_rate and self.random.random() < self.failure_rate}
+            self.submissions[batch_id] = {
+                'submission_id': next(self.counter),
+                'dois': dois,
+                'failed': failed,
+                'polls_left': self.polls_until_complete,
+            }
+        self.count('uploads')
+        return batch_id
+
+    def submission_log(self, batch_id):
+        """Return the doi_batch_diagnostic document for a batch at this point in time."""
+        with self.lock:
+            submission = self.submissions.get(batch_id)
+            if submission is not None and submission['polls_left'] > 0:
+                submission['polls_left'] -= 1
+                submission = {'queued': True}
+        self.count('polls')
+        header = '<?xml version="1.0" encoding="UTF-8"?>\n'
+        if submission is None:
+            return header + '<doi_batch_diagnostic status="unknown_submission"/>\n'
+        if submission.get('queued'):
+            return header + '<doi_batch_diagnostic status="queued"/>\n'
+        lines = [
+            '<doi_batch_diagnostic status="completed" sp="fake-crossref">',
+            f"   <submission_id>{submission['submission_id']}</submission_id>",
+            f"   <batch_id>{escape_text(batch_id)}</batch_id>",
+        ]
+        for doi in submission['dois']:
+            if doi in submission['failed']:
+                status, msg = 'Failure', 'Record not processed because of an error'
+            else:
+                status, msg = 'Success', 'Successfully added'
+            lines += [
+                f'   <record_diagnostic status="{status}">',
+                f"      <doi>{escape_text(doi)}</doi>",
+                f"      <msg>{msg}</msg>",
+                '   </record_diagnostic>',
+            ]
+        failures = len(submission['failed'])
+        lines += [
+            '   <batch_data>',
+            f"      <record_count>{len(submission['dois'])}</record_count>",
+            f"      <success_count>{len(submission['dois']) - failures}</success_count>",
+            '      <warning_count>0</warning_count>',
+            f"      <failure_count>{failures}</failure_count>",
+            '   </batch_data>',
+            '</doi_batch_diagnostic>',
+        ]
+        return header + "\n".join(lines) + "\n"
+
+    def request_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def respond(self, status, body, content_type='text/html'):
+                data = body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', f'{content_type}; charset=UTF-8')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def admit(self):
+                server.count('requests')
+                if server.latency:
+                    time.sleep(server.latency)
+
+            def read_form(self):
+                """Parse a multipart/form-data body into {name: bytes}."""
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length)
+                header = f"Content-Type: {self.headers.get('Content-Type', '')}\r\n\r\n".encode('latin-1')
+                message = BytesParser(policy=HTTP).parsebytes(header + body)
+                if not message.is_multipart():
+                    return {}
+                return {
+                    part.get_param('name', header='content-disposition'): part.get_payload(decode=True)
+                    for part in message.iter_parts()
+                }
+
+            def do_POST(self):
+                form = self.read_form()
+                self.admit()
+                if urlsplit(self.path).path != '/servlet/deposit':
+                    self.respond(404, "Not found")
+                    return
+                batch_id = None
+                if form.get('operation') == b'doMDUpload' and form.get('fname'):
+                    batch_id = server.accept(form['fname'])
+                if batch_id is None:
+                    self.respond(400, "<html><body><h2>FAILURE</h2><p>No deposit file received.</p></body></html>")
+                    return
+                self.respond(200, "<html><body><h2>SUCCESS</h2>"
+                                  "<p>Your batch submission was successfully received.</p></body></html>")
+
+            def do_GET(self):
+                self.admit()
+                url = urlsplit(self.path)
+                if url.path != '/servlet/submissionDownload':
+                    self.respond(404, "Not found")
+                    return
+                if server.status_body is not None:
+                    self.respond(200, server.status_body)
+                    return
+                batch_id = parse_qs(url.query).get('doi_batch_id', [''])[0]
+                self.respond(200, server.submission_log(batch_id), content_type='text/xml')
+
+        return Handler
+
+
+@click.command(help="Run a local fake Crossref deposit endpoint for integration testing")
+@click.option("--host", default="127.0.0.1", help="Interface to bind")
+@click.option("--port", default=8081, type=int, help="Port to listen on")
+@click.option("--latency", default=0.0, type=float, help="Seconds to wait before answering each request")
+@click.option("--polls_until_complete", default=1, type=int, help="Status checks answered 'queued' per batch")
+@click.option("--failure_rate", default=0.0, type=float, help="Fraction of DOIs reported as failures")
+def main(host, port, latency, polls_until_complete, failure_rate):
+    server = FakeCrossrefServer(host=host, port=port, latency=latency,
+                                polls_until_complete=polls_until_complete, failure_rate=failure_rate)
+    print(f"Fake Crossref listening on {server.url}")
+    print(f"export CROSSREF_DEPOSIT_URL={server.deposit_url} CROSSREF_STATUS_URL={server.status_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(server.stats)
+
+
+if __name__ == "__main__":
+    main()
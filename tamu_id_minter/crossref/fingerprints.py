@@ -0,0 +1,150 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from ..registry import normalize_identifier
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS deposit_records (
+    doi TEXT PRIMARY KEY,
+    content_type TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    indent TEXT NOT NULL,
+    fragment TEXT NOT NULL,
+    batch TEXT,
+    updated TEXT NOT NULL,
+    confirmed INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+# Metadata that ends up in a record; a change to any of them means the record must be deposited again
+FINGERPRINT_FIELDS = ['title', 'contributor', 'acceptance_date', 'doi', 'resource']
+
+
+def fingerprint(content_type, metadata, date_order=None):
+    """Return a hash of a row's normalized content.
+
+    Whitespace is collapsed so reformatting a spreadsheet doesn't count as a
+    change, and the DOI is compared case-insensitively.
+
+    Args:
+        content_type (str): Content type the row is deposited as
+        metadata (dict): Metadata dictionary
+        date_order (str): Slash order the row's date is read in, when it is a slash date;
+            a record rendered in one order must not stand in for the other
+    """
+    values = [content_type]
+    for field in FINGERPRINT_FIELDS:
+        value = " ".join((metadata.get(field) or '').split())
+        values.append(normalize_identifier(value, 'doi') if field == 'doi' else value)
+    if date_order:
+        values.append(date_order)
+    return hashlib.sha256("\x1f".join(values).encode('utf-8')).hexdigest()
+
+
+class DepositCache:
+    """SQLite store of each deposited DOI's content hash and rendered XML fragment.
+
+    Lets CrossrefDepositHandler leave unchanged rows out of a deposit, and
+    reuse the rendered fragment of rows it does include. Fragments are
+    rendered from the parsed contributors and dates, so clear the cache
+    after changing the name authority or date order.
+
+    Entries are stored as pending when their deposit is generated and only
+    count as deposited once confirm records Crossref's success for them,
+    so a deposit that is never uploaded, or whose DOIs fail, is sent again.
+    """
+
+    def __init__(self, path):
+        """Initialize the cache; the database is opened on first use.
+
+        Args:
+            path (str): Path of the SQLite database, created if missing
+        """
+        self.path = path
+        self.connection = None
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        self.close()
+
+    def connect(self):
+        """Return the open connection, creating the database schema on first use."""
+        if self.connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.connection = sqlite3.connect(self.path, check_same_thread=False)
+            self.connection.executescript(SCHEMA)
+            columns = {row[1] for row in self.connection.execute("PRAGMA table_info(deposit_records)")}
+            if 'confirmed' not in columns:
+                # Caches written before confirmation existed; their entries were never checked against Crossref
+                self.connection.execute("ALTER TABLE deposit_records ADD COLUMN confirmed INTEGER NOT NULL DEFAULT 0")
+            self.connection.execute("PRAGMA journal_mode=WAL")
+        return self.connection
+
+    def get(self, doi):
+        """Return the stored fingerprint, indent, fragment and confirmed flag for a DOI, or None."""
+        with self.lock:
+            row = self.connect().execute(
+                "SELECT fingerprint, indent, fragment, confirmed FROM deposit_records WHERE doi = ?",
+                (normalize_identifier(doi, 'doi'),)
+            ).fetchone()
+        if row is None:
+            return None
+        return {'fingerprint': row[0], 'indent': json.loads(row[1]), 'fragment': row[2], 'confirmed': bool(row[3])}
+
+    def put(self, doi, content_type, fingerprint, indent, fragment, batch=None):
+        """Store the fingerprint and rendered fragment generated for a DOI as pending; held until commit."""
+        updated = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        with self.lock:
+            self.connect().execute(
+                "INSERT OR REPLACE INTO deposit_records VALUES (?, ?, ?, ?, ?, ?, ?, 0)",
+                (normalize_identifier(doi, 'doi'), content_type, fingerprint, json.dumps(indent), fragment, batch, updated)
+            )
+
+    def confirm(self, doi, batch_id):
+        """Mark a DOI's entry deposited after Crossref reported success for it; held until commit.
+
+        Only the entry generated for that batch is confirmed, so a result for
+        an older deposit can't vouch for content changed since. A part of a
+        split deposit (<batch>-002) confirms entries stored under <batch>.
+
+        Args:
+            doi (str): DOI from the submission log
+            batch_id (str): doi_batch_id of the deposit file the result came from
+
+        Returns:
+            bool: True when an entry was confirmed
+        """
+        updated = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        with self.lock:
+            cursor = self.connect().execute(
+                "UPDATE deposit_records SET confirmed = 1, updated = ? WHERE doi = ? AND batch IN (?, ?)",
+                (updated, normalize_identifier(doi, 'doi'), batch_id, batch_id.rsplit('-', 1)[0])
+            )
+        return cursor.rowcount > 0
+
+    def commit(self):
+        if self.connection is not None:
+            with self.lock:
+                self.connection.commit()
+
+    def rollback(self):
+        if self.connection is not None:
+            with self.lock:
+                self.connection.rollback()
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
@@ -0,0 +1,99 @@
+import csv
+import threading
+from collections import OrderedDict
+
+
+def normalize_name(name):
+    """Collapse runs of whitespace so trivially different spellings share a cache entry."""
+    return " ".join(name.split())
+
+
+class ContributorCache:
+    """Bounded LRU cache of parsed contributor strings with an optional name authority.
+
+    The authority maps a single contributor name (as it appears in the CSV) to a
+    curated (given_name, surname) split. Authority entries always win over the
+    default parsing rules and are never evicted.
+    """
+
+    def __init__(self, maxsize=4096, authority_file=None):
+        """Initialize the cache.
+
+        Args:
+            maxsize (int): Most contributor strings kept in the LRU cache
+            authority_file (str): Optional CSV with name, given_name and surname columns
+        """
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.authority = {}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        if authority_file:
+            self.load_authority(authority_file)
+
+    def load_authority(self, path):
+        """Load curated given/surname splits from a CSV with name, given_name and surname columns.
+
+        Returns:
+            int: Number of names loaded
+        """
+        with open(path, 'r', newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                self.authority[normalize_name(row['name'])] = (
+                    row.get('given_name', '').strip(),
+                    row.get('surname', '').strip()
+                )
+        return len(self.authority)
+
+    def save_authority(self, path):
+        """Write the authority plus every individually parsed name currently cached, for curation."""
+        names = dict(self.authority)
+        with self.lock:
+            cached = list(self.entries.items())
+        for contributor_string, contributors in cached:
+            if len(contributors) == 1:
+                names.setdefault(contributor_string, contributors[0])
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['name', 'given_name', 'surname'])
+            for name, (given_name, surname) in sorted(names.items()):
+                writer.writerow([name, given_name, surname])
+
+    def lookup_authority(self, name):
+        """Return the curated (given_name, surname) for a single name, or None."""
+        return self.authority.get(normalize_name(name))
+
+    def get(self, contributor_string):
+        """Return the cached contributors for a string, or None, counting the hit or miss."""
+        with self.lock:
+            contributors = self.entries.get(contributor_string)
+            if contributors is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(contributor_string)
+            self.hits += 1
+            return contributors
+
+    def put(self, contributor_string, contributors):
+        """Cache the parsed contributors for a string, evicting the least recently used entry."""
+        with self.lock:
+            self.entries[contributor_string] = tuple(contributors)
+            self.entries.move_to_end(contributor_string)
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        """Return hit/miss counters for reporting."""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hit_rate, 4),
+            'size': len(self.entries),
+            'authority': len(self.authority),
+        }
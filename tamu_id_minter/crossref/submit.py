@@ -0,0 +1,337 @@
+import csv
+import json
+import os
+import time
+from xml.etree.ElementTree import ParseError, XMLPullParser, iterparse
+import requests
+from ..net import RetryPolicy, build_session
+from ..pool import ordered_map
+
+# Batch statuses Crossref reports before a submission log is final
+PENDING_STATUSES = frozenset({'queued', 'in_process', 'unknown_submission'})
+
+# The only batch status whose log holds the per-DOI results
+COMPLETED_STATUS = 'completed'
+
+# Status of a batch whose status check answered with something other than a submission log
+INVALID_LOG_STATUS = 'invalid_log'
+
+
+def local_name(tag):
+    """Strip the {namespace} from an ElementTree tag."""
+    return tag.rsplit('}', 1)[-1]
+
+
+def read_batch_id(path):
+    """Read a deposit file only as far as its doi_batch_id.
+
+    Raises:
+        ValueError: When the file has no doi_batch_id
+    """
+    with open(path, 'rb') as f:
+        for _, elem in iterparse(f, events=('end',)):
+            if local_name(elem.tag) == 'doi_batch_id':
+                return (elem.text or '').strip()
+    raise ValueError(f"No doi_batch_id in {path}")
+
+
+def deposit_files(paths):
+    """Expand manifests written by a split deposit into the deposit files they list."""
+    for path in paths:
+        if path.endswith('.json'):
+            with open(path, encoding='utf-8') as f:
+                yield from (part['file'] for part in json.load(f)['files'])
+        else:
+            yield path
+
+
+def iter_submission_log(source):
+    """Stream-parse a Crossref submission log (doi_batch_diagnostic).
+
+    Args:
+        source (str or file): Path or binary stream of the log
+
+    Yields:
+        dict: doi, status and message of each record_diagnostic, in log order
+    """
+    root = None
+    for event, elem in iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = elem
+            continue
+        if local_name(elem.tag) == 'record_diagnostic':
+            doi = msg = ''
+            for child in elem:
+                if local_name(child.tag) == 'doi':
+                    doi = (child.text or '').strip()
+                elif local_name(child.tag) == 'msg':
+                    msg = (child.text or '').strip()
+            yield {'doi': doi, 'status': elem.get('status', ''), 'message': msg}
+            # Records are done with once read; drop them so memory stays flat
+            root.clear()
+
+
+class CrossrefSubmissionHandler:
+    """Upload Crossref deposit files and collect their submission logs.
+
+    Files are uploaded in parallel over one pooled session. Each batch's
+    submission log is then polled for with exponential backoff, saved next
+    to its deposit file, and stream-parsed into a per-DOI results CSV.
+    """
+
+    RESULT_FIELDS = ['file', 'doi_batch_id', 'doi', 'status', 'message']
+
+    DEFAULT_DEPOSIT_URL = 'https://doi.crossref.org/servlet/deposit'
+    DEFAULT_STATUS_URL = 'https://doi.crossref.org/servlet/submissionDownload'
+
+    def __init__(self, deposit_url=None, status_url=None, username=None, password=None,
+                 pool_size=10, workers=4, max_attempts=5,
+                 poll_interval=5.0, max_poll_interval=60.0, max_polls=60, metrics=None, deposit_cache=None):
+        """Initialize the handler and its pooled HTTP session.
+
+        Args:
+            deposit_url (str): Deposit endpoint (defaults to $CROSSREF_DEPOSIT_URL or doi.crossref.org)
+            status_url (str): Submission log endpoint (defaults to $CROSSREF_STATUS_URL or doi.crossref.org)
+            username (str): Crossref login (defaults to $CROSSREF_USERNAME)
+            password (str): Crossref password (defaults to $CROSSREF_PASSWORD)
+            pool_size (int): Number of keep-alive connections to hold open
+            workers (int): Number of files uploaded and polled in parallel
+            max_attempts (int): Attempts per request when the server answers 429/5xx or the connection fails
+            poll_interval (float): Seconds before the first status check, doubled after each pending answer
+            max_poll_interval (float): Longest wait between two status checks
+            max_polls (int): Status checks per batch before giving up on its log
+            metrics (RunMetrics): Optional collector for request, retry and per-DOI outcome metrics
+            deposit_cache (DepositCache): Optional cache whose entries are confirmed for every DOI
+                Crossref reports as Success, so incremental deposits can leave them out
+        """
+        self.deposit_url = deposit_url or os.getenv('CROSSREF_DEPOSIT_URL', self.DEFAULT_DEPOSIT_URL)
+        self.status_url = status_url or os.getenv('CROSSREF_STATUS_URL', self.DEFAULT_STATUS_URL)
+        self.username = username or os.getenv('CROSSREF_USERNAME')
+        self.password = password or os.getenv('CROSSREF_PASSWORD')
+        self.workers = max(1, workers)
+        self.retry_policy = RetryPolicy(max_attempts=max_attempts)
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.max_polls = max_polls
+        self.session = build_session(pool_size=max(pool_size, self.workers))
+        self.summary = {}
+        self.metrics = metrics
+        self.deposit_cache = deposit_cache
+        self.confirmed = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Close the pooled HTTP session and release its connections."""
+        self.session.close()
+
+    def send(self, method, url, **kwargs):
+        """Send a request through the pooled session, retrying 429/5xx and connection failures.
+
+        Returns:
+            requests.Response: The final response
+        """
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.measure_request(method, type(e).__name__, started)
+                if attempt + 1 >= self.retry_policy.max_attempts:
+                    raise
+                delay = self.retry_policy.delay(attempt)
+                reason = 'connection'
+            else:
+                self.measure_request(method, response.status_code, started)
+                if (not self.retry_policy.should_retry(response.status_code)
+                        or attempt + 1 >= self.retry_policy.max_attempts):
+                    return response
+                delay = self.retry_policy.delay(attempt, response.headers.get('Retry-After'))
+                reason = f"http_{response.status_code}"
+                response.close()
+            if self.metrics is not None:
+                self.metrics.count('retries', reason=reason)
+            time.sleep(delay)
+            attempt += 1
+
+    def measure_request(self, method, status, started):
+        """Report a request that began at perf_counter() time started, if metrics are kept."""
+        if self.metrics is not None:
+            self.metrics.observe_request(method, status, time.perf_counter() - started)
+
+    def upload(self, path):
+        """Upload one deposit file.
+
+        Args:
+            path (str): Deposit XML file
+
+        Returns:
+            dict: file, doi_batch_id, uploaded flag and the server's message
+        """
+        submission = {'file': path, 'doi_batch_id': '', 'uploaded': False, 'message': ''}
+        if path.endswith('.txt'):
+            submission['message'] = "error: not an XML deposit; bulk URL update files are not sent by this command"
+            return submission
+        try:
+            submission['doi_batch_id'] = read_batch_id(path)
+            with open(path, 'rb') as f:
+                content = f.read()
+            response = self.send(
+                'post', self.deposit_url,
+                data={'operation': 'doMDUpload', 'login_id': self.username, 'login_passwd': self.password},
+                files={'fname': (os.path.basename(path), content, 'application/xml')},
+            )
+        except (OSError, ValueError, ParseError, requests.RequestException) as e:
+            submission['message'] = f"error: {e}"
+            return submission
+        body = response.text
+        page = body.upper()
+        submission['uploaded'] = response.status_code == 200 and 'SUCCESS' in page and 'FAILURE' not in page
+        submission['message'] = f"{response.status_code} {' '.join(body.split())[:200]}"
+        return submission
+
+    def poll_delay(self, poll):
+        """Seconds to wait after the given zero-based pending status check."""
+        return min(self.max_poll_interval, self.poll_interval * (2 ** poll))
+
+    def fetch_log(self, submission, log_file):
+        """Check a batch's submission log once, saving it when it is completed.
+
+        The body is streamed: only its first bytes are parsed to read the batch
+        status, and a completed log is copied to log_file chunk by chunk.
+
+        Returns:
+            str: The batch status Crossref reported
+
+        Raises:
+            ParseError: When the body is not XML
+            ValueError: When the body is XML but not a doi_batch_diagnostic, e.g. an HTML error page
+        """
+        params = {'usr': self.username, 'pwd': self.password,
+                  'doi_batch_id': submission['doi_batch_id'], 'type': 'result'}
+        with self.send('get', self.status_url, params=params, stream=True) as response:
+            if response.status_code != 200:
+                return f"http_{response.status_code}"
+            parser = XMLPullParser(events=('start',))
+            chunks = response.iter_content(chunk_size=65536)
+            head = []
+            status = None
+            for chunk in chunks:
+                head.append(chunk)
+                parser.feed(chunk)
+                for _, elem in parser.read_events():
+                    if local_name(elem.tag) != 'doi_batch_diagnostic':
+                        raise ValueError(f"not a submission log: got a <{local_name(elem.tag)}> document")
+                    status = elem.get('status', '')
+                    break
+                if status is not None:
+                    break
+            if status is None or status in PENDING_STATUSES:
+                return status or 'unknown_submission'
+            if status != COMPLETED_STATUS:
+                return status
+            with open(log_file, 'wb') as f:
+                f.writelines(head)
+                for chunk in chunks:
+                    f.write(chunk)
+        return status
+
+    def wait_for_log(self, submission):
+        """Poll for an uploaded batch's submission log with exponential backoff.
+
+        Args:
+            submission (dict): Entry returned by upload
+
+        Returns:
+            dict: The submission with its final status and log_file (None when there is no log)
+        """
+        submission = dict(submission, status='upload_failed', log_file=None)
+        if not submission['uploaded']:
+            return submission
+        log_file = f"{os.path.splitext(submission['file'])[0]}-result.xml"
+        for poll in range(self.max_polls):
+            time.sleep(self.poll_delay(poll))
+            try:
+                status = self.fetch_log(submission, log_file)
+            except requests.RequestException as e:
+                status = 'pending'
+                submission['message'] = f"error: {e}"
+            except (ParseError, ValueError) as e:
+                status = INVALID_LOG_STATUS
+                submission['message'] = f"error: invalid submission log: {e}"
+            submission['status'] = status
+            if status not in PENDING_STATUSES and status != 'pending':
+                if os.path.exists(log_file):
+                    submission['log_file'] = log_file
+                return submission
+        submission['status'] = 'pending'
+        return submission
+
+    def iter_submission_results(self, paths):
+        """Upload deposit files and yield their outcomes as each batch's log arrives.
+
+        Polling for a batch starts as soon as its upload finishes.
+
+        Yields:
+            dict: Submission entry with status and log_file, in input order
+        """
+        uploads = ordered_map(self.upload, paths, workers=self.workers)
+        yield from ordered_map(self.wait_for_log, uploads, workers=self.workers)
+
+    def submit(self, paths, output_csv):
+        """Submit deposit files and write a per-DOI success/failure CSV.
+
+        Args:
+            paths (iterable[str]): Deposit XML files, or manifests of split deposits
+            output_csv (str): Where to write one row per DOI (or per file that has no log)
+
+        Returns:
+            dict: Count of result rows per status
+        """
+        self.summary = {}
+        self.confirmed = 0
+        with open(output_csv, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=self.RESULT_FIELDS)
+            writer.writeheader()
+            for submission in self.iter_submission_results(deposit_files(paths)):
+                rows = self.result_rows(submission)
+                for row in rows:
+                    writer.writerow(row)
+                    self.summary[row['status']] = self.summary.get(row['status'], 0) + 1
+                    if self.metrics is not None:
+                        self.metrics.row(row['status'].lower())
+                    if self.deposit_cache is not None and row['status'] == 'Success':
+                        self.confirmed += self.deposit_cache.confirm(row['doi'], row['doi_batch_id'])
+                csvfile.flush()
+                if self.deposit_cache is not None:
+                    self.deposit_cache.commit()
+        return self.summary
+
+    def result_rows(self, submission):
+        """Yield the CSV rows for one submission, streaming its log when there is one.
+
+        Every file gets at least one row: a log without record diagnostics, or
+        one that breaks off, is reported against the file itself.
+        """
+        base = {'file': submission['file'], 'doi_batch_id': submission['doi_batch_id']}
+        if submission['log_file'] is None:
+            yield dict(base, doi='', status=submission['status'], message=submission['message'])
+            return
+        records = 0
+        try:
+            for record in iter_submission_log(submission['log_file']):
+                records += 1
+                yield dict(base, **record)
+        except ParseError as e:
+            yield dict(base, doi='', status=INVALID_LOG_STATUS,
+                       message=f"error: invalid submission log {submission['log_file']}: {e}")
+            return
+        if not records:
+            yield dict(base, doi='', status=submission['status'],
+                       message=f"Submission log {submission['log_file']} has no record diagnostics")
@@ -1,6 +1,10 @@
-from xml.etree.ElementTree import Element, SubElement, tostring
-from xml.dom import minidom
+from xml.etree.ElementTree import Element, SubElement
 from datetime import datetime
+from .dates import DateParser
+from .names import ContributorCache, normalize_name
+from ..profiling import stage
+from ..registry import strip_doi_prefix
+from .writer import XML_DECLARATION, render_element
 
 
 class CrossrefXMLTemplate:
@@ -10,6 +14,16 @@ class CrossrefXMLTemplate:
     XSI_NAMESPACE = "http://www.w3.org/2001/XMLSchema-instance"
     SCHEMA_LOCATION = "http://www.crossref.org/schema/5.4.0 http://www.crossref.org/schemas/crossref5.4.0.xsd"
 
+    def __init__(self, contributor_cache=None, date_parser=None):
+        """Initialize the template.
+
+        Args:
+            contributor_cache (ContributorCache): Cache shared by every template of a batch
+            date_parser (DateParser): Date parser tuned to the batch's date format
+        """
+        self.contributor_cache = contributor_cache if contributor_cache is not None else ContributorCache()
+        self.date_parser = date_parser if date_parser is not None else DateParser()
+
     def create_doi_batch(self, depositor_name, depositor_email, registrant, batch_id):
         """Create root doi_batch element with proper namespaces.
 
@@ -71,29 +85,44 @@ class CrossrefXMLTemplate:
         - "First Last"
         - Multiple contributors separated by " and " or " ; "
 
+        Repeated strings are answered from the contributor cache, and names in
+        its authority file use their curated split.
+
         Args:
             contributor_string (str): Comma-separated contributor string
 
         Returns:
             list[tuple]: List of (given_name, surname) tuples
         """
+        key = normalize_name(contributor_string)
+        cached = self.contributor_cache.get(key)
+        if cached is not None:
+            return list(cached)
+
         contributors = []
 
-        # Split on common separators
-        if ' and ' in contributor_string:
-            parts = contributor_string.split(' and ')
-        elif ' ; ' in contributor_string:
-            parts = contributor_string.split(' ; ')
-        elif ' | ' in contributor_string:
-            parts = contributor_string.split(' | ')
+        # Split the normalized string, so the cached result doesn't depend on which spelling came first;
+        # the padding keeps a leading or trailing separator from sticking to a name
+        padded = f" {key} "
+        if ' and ' in padded:
+            parts = padded.split(' and ')
+        elif ' ; ' in padded:
+            parts = padded.split(' ; ')
+        elif ' | ' in padded:
+            parts = padded.split(' | ')
         else:
-            parts = [contributor_string]
+            parts = [key]
 
         for part in parts:
             part = part.strip()
             if not part:
                 continue
 
+            curated = self.contributor_cache.lookup_authority(part)
+            if curated is not None:
+                contributors.append(curated)
+                continue
+
             # Check if "Last, First" format
             if ',' in part:
                 surname, given_name = part.split(',', 1)
@@ -111,6 +140,7 @@ class CrossrefXMLTemplate:
 
             contributors.append((given_name, surname))
 
+        self.contributor_cache.put(key, contributors)
         return contributors
 
     def add_contributors(self, parent, contributor_string):
@@ -121,7 +151,8 @@ class CrossrefXMLTemplate:
             contributor_string (str): Contributor string to parse
         """
         contributors_elem = SubElement(parent, 'contributors')
-        contributors_list = self.parse_contributors(contributor_string)
+        with stage('parse_contributors'):
+            contributors_list = self.parse_contributors(contributor_string)
 
         for idx, (given_name, surname) in enumerate(contributors_list):
             sequence = "first" if idx == 0 else "additional"
@@ -155,6 +186,7 @@ class CrossrefXMLTemplate:
         - YYYY-MM-DD (ISO 8601)
         - MM/DD/YYYY
         - DD/MM/YYYY
+        - YYYY/MM/DD
 
         Args:
             date_string (str): Date string to parse
@@ -162,22 +194,8 @@ class CrossrefXMLTemplate:
         Returns:
             tuple: (month, day, year) as strings
         """
-        date_formats = [
-            "%Y-%m-%d",
-            "%m/%d/%Y",
-            "%d/%m/%Y",
-            "%Y/%m/%d",
-        ]
-
-        for fmt in date_formats:
-            try:
-                dt = datetime.strptime(date_string.strip(), fmt)
-                return (str(dt.month), str(dt.day), str(dt.year))
-            except ValueError:
-                continue
-
-        # If all formats fail, raise error
-        raise ValueError(f"Unable to parse date: {date_string}. Expected format: YYYY-MM-DD")
+        with stage('parse_dates'):
+            return self.date_parser.parse(date_string)
 
     def add_doi_data(self, parent, doi, resource):
         """Add doi_data element.
@@ -190,25 +208,22 @@ class CrossrefXMLTemplate:
         doi_data = SubElement(parent, 'doi_data')
 
         doi_elem = SubElement(doi_data, 'doi')
-        # Normalize DOI (remove https://doi.org/ prefix if present)
-        doi_clean = doi.replace('https://doi.org/', '').replace('http://doi.org/', '').strip()
-        doi_elem.text = doi_clean
+        doi_elem.text = strip_doi_prefix(doi)
 
         resource_elem = SubElement(doi_data, 'resource')
         resource_elem.text = resource
 
-    def prettify_xml(self, elem):
+    def prettify_xml(self, elem, indent="  "):
         """Return formatted XML string.
 
         Args:
             elem (Element): Element to format
+            indent (str): Indentation per level, or None for compact output
 
         Returns:
             str: Formatted XML string
         """
-        rough_string = tostring(elem, encoding='utf-8')
-        reparsed = minidom.parseString(rough_string)
-        return reparsed.toprettyxml(indent="  ", encoding='utf-8').decode('utf-8')
+        return XML_DECLARATION + ("\n" if indent else "") + render_element(elem, 0, indent)
 
 
 class PendingPublicationTemplate(CrossrefXMLTemplate):
@@ -331,3 +346,34 @@ class ReportTemplate(CrossrefXMLTemplate):
         institution = SubElement(parent, 'institution')
         institution_name_elem = SubElement(institution, 'institution_name')
         institution_name_elem.text = institution_name
+
+
+class ResourceUpdateTemplate:
+    """Template for Crossref's bulk URL update file, which points existing DOIs at new URLs.
+
+    The file is tab-separated text: a header line with the depositor's email
+    and the DOI prefix, then one DOI and its new URL per line. It replaces
+    the primary URL (doi_data/resource) without resending any other
+    metadata; a doi_resources deposit would only add secondary URLs.
+    """
+
+    def create_header(self, depositor_email, prefix):
+        """Return the header line of a URL update file.
+
+        Args:
+            depositor_email (str): Address Crossref sends the processing report to
+            prefix (str): DOI prefix every line of the file belongs to
+        """
+        return f"H: email={depositor_email};fromPrefix={prefix}\n"
+
+    def doi_prefix(self, doi):
+        """Return the prefix (10.xxxx) of a DOI."""
+        return strip_doi_prefix(doi).split('/', 1)[0]
+
+    def render_line(self, metadata):
+        """Return the line moving one DOI to its new URL.
+
+        Args:
+            metadata (dict): Contains doi and resource
+        """
+        return f"{strip_doi_prefix(metadata['doi'])}\t{metadata['resource']}\n"
@@ -0,0 +1,139 @@
+XML_DECLARATION = '<?xml version="1.0" encoding="utf-8"?>'
+
+
+def escape_xml(data):
+    """Escape text and attribute values the way minidom's writer does."""
+    return data.replace("&", "&amp;").replace("<", "&lt;").replace("\"", "&quot;").replace(">", "&gt;")
+
+
+def escape_text(data):
+    # A parser folds \r\n and lone \r into \n, so the old tostring/parse round-trip did too
+    return escape_xml(data.replace("\r\n", "\n").replace("\r", "\n"))
+
+
+def render_attributes(attrib):
+    """Serialize attributes, namespace declarations first as a namespace-aware parser orders them."""
+    names = sorted(attrib, key=lambda name: not (name == 'xmlns' or name.startswith('xmlns:')))
+    return "".join(f' {name}="{escape_xml(attrib[name])}"' for name in names)
+
+
+def render_element(elem, level=0, indent="  "):
+    """Serialize an element exactly as minidom's toprettyxml would.
+
+    Elements whose only content is text stay on one line, empty elements are
+    self-closing and everything else gets one element per line.
+
+    Args:
+        elem (Element): Element to serialize
+        level (int): Nesting depth of the element in the final document
+        indent (str): Indentation per level, or None for no whitespace at all
+
+    Returns:
+        str: Serialized element, ending in a newline when indenting
+    """
+    parts = []
+    _render(parts.append, elem, (indent or "") * level, indent or "", "\n" if indent else "")
+    return "".join(parts)
+
+
+def _render(write, elem, current, addindent, newl):
+    write(current + "<" + elem.tag + render_attributes(elem.attrib))
+
+    children = list(elem)
+    if not children:
+        if elem.text:
+            write(">" + escape_text(elem.text) + f"</{elem.tag}>{newl}")
+        else:
+            write("/>" + newl)
+        return
+
+    write(">" + newl)
+    inner = current + addindent
+    if elem.text:
+        write(inner + escape_text(elem.text) + newl)
+    for child in children:
+        _render(write, child, inner, addindent, newl)
+        if child.tail:
+            write(inner + escape_text(child.tail) + newl)
+    write(current + f"</{elem.tag}>{newl}")
+
+
+def render_record(elem, indent="  "):
+    """Serialize a record at the depth records sit at inside a deposit's body."""
+    return render_element(elem, 2, indent)
+
+
+def start_tag(elem):
+    """Serialize the opening tag of an element, attributes included."""
+    return f"<{elem.tag}{render_attributes(elem.attrib)}>"
+
+
+class DepositXMLWriter:
+    """Write a doi_batch deposit to a stream one record at a time.
+
+    The head is written when the writer starts and each record as soon as it
+    is added, so only one record is ever held in memory. Output is identical to
+    serializing the whole tree at once.
+
+    Example:
+        >>> with open('deposit.xml', 'w', encoding='utf-8') as f:
+        ...     writer = DepositXMLWriter(f)
+        ...     writer.start(root)
+        ...     for record in records:
+        ...         writer.write_record(record)
+        ...     writer.close()
+    """
+
+    def __init__(self, stream, indent="  "):
+        """Initialize the writer.
+
+        Args:
+            stream: Text stream to write to
+            indent (str): Indentation per level, or None for no whitespace at all
+        """
+        self.stream = stream
+        self.indent = indent or ""
+        self.newl = "\n" if indent else ""
+        self.root = None
+        self.records = 0
+        self.bytes = 0
+
+    def write(self, text):
+        """Write text to the stream, keeping count of the UTF-8 bytes written."""
+        self.stream.write(text)
+        self.bytes += len(text.encode('utf-8'))
+
+    def start(self, root):
+        """Write the XML declaration, the opening doi_batch tag and every child of root (the head)."""
+        self.root = root
+        self.write(XML_DECLARATION + self.newl)
+        self.write(start_tag(root) + self.newl)
+        for child in root:
+            self.write(render_element(child, 1, self.indent or None))
+
+    def render_record(self, elem):
+        """Serialize a record at the depth records sit at inside body."""
+        return render_record(elem, self.indent or None)
+
+    def write_fragment(self, fragment):
+        """Write an already serialized record."""
+        if not self.records:
+            self.write(self.indent + "<body>" + self.newl)
+        self.write(fragment)
+        self.records += 1
+
+    def write_record(self, elem):
+        """Serialize and write one pending_publication or report-paper record."""
+        self.write_fragment(self.render_record(elem))
+
+    def closing_bytes(self):
+        """Bytes close() will still add once at least one record has been written."""
+        return len(f"{self.indent}</body>{self.newl}</{self.root.tag}>{self.newl}".encode('utf-8'))
+
+    def close(self):
+        """Close body and doi_batch."""
+        if self.records:
+            self.write(self.indent + "</body>" + self.newl)
+        else:
+            self.write(self.indent + "<body/>" + self.newl)
+        self.write(f"</{self.root.tag}>{self.newl}")
@@ -1 +1,18 @@
-from .ezid import EZIDARKHandler
\ No newline at end of file
+from importlib import import_module
+
+_LAZY = {
+    'EZIDARKHandler': '.ezid',
+    'AsyncEZIDARKHandler': '.async_ezid',
+}
+
+__all__ = ['EZIDARKHandler', 'AsyncEZIDARKHandler']
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        return getattr(import_module(_LAZY[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
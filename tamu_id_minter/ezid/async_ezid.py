@@ -0,0 +1,243 @@
+import asyncio
+import csv
+import time
+from collections import deque
+from .base import EZIDBase
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - depends on the optional "async" extra
+    httpx = None
+
+
+async def async_ordered_map(fn, items, window):
+    """Run a coroutine function over items with at most window tasks alive, yielding results in input order.
+
+    The asyncio counterpart to pool.ordered_map: items are read lazily, so
+    neither memory nor the number of tasks grows with the input.
+
+    Args:
+        fn (callable): Coroutine function to call with each item
+        items (iterable): Items to process, consumed lazily
+        window (int): Maximum tasks created but not yet yielded
+
+    Yields:
+        The result of fn for each item, in the order the items were read
+    """
+    pending = deque()
+    try:
+        for item in items:
+            pending.append(asyncio.ensure_future(fn(item)))
+            if len(pending) >= window:
+                yield await pending.popleft()
+        while pending:
+            yield await pending.popleft()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+class AsyncEZIDARKHandler(EZIDBase):
+    """asyncio counterpart to EZIDARKHandler built on httpx.
+
+    Every request waits on a semaphore, so a batch keeps at most
+    max_in_flight calls open against EZID no matter how many rows it has.
+    Batches read their CSV lazily and only keep a small window of tasks
+    ahead of the results already written.
+    """
+
+    def __init__(self, shoulder_url=None,
+                 max_in_flight=50, timeout=30.0, transport=None,
+                 rate_limit=None, max_attempts=5, base_url=None, registry=None,
+                 skip_existing=False, metrics=None):
+        """Initialize the handler and its async HTTP client.
+
+        Args:
+            shoulder_url (str): EZID shoulder to mint new ARKs under (defaults to $EZID_SHOULDER_URL or ark:/81423/d2)
+            max_in_flight (int): Maximum number of concurrent requests to EZID
+            timeout (float): Per-request timeout in seconds
+            transport (httpx.AsyncBaseTransport): Optional transport, mainly for tests
+            rate_limit (float): Requests per second shared by all tasks (unlimited when None)
+            max_attempts (int): Attempts per request when EZID answers 429/5xx or the connection fails
+            base_url (str): EZID server the /id/ endpoints live on
+            registry (IdentifierRegistry): Optional local registry every minted ARK is recorded in
+            skip_existing (bool): Don't mint rows whose target already has an ARK in the registry
+            metrics (RunMetrics): Optional collector for request, retry and row outcome metrics
+        """
+        if httpx is None:
+            raise ImportError(
+                "AsyncEZIDARKHandler requires httpx. Install it with: pip install 'tamu-id-minter[async]'"
+            )
+        super().__init__(shoulder_url, rate_limit=rate_limit, max_attempts=max_attempts, base_url=base_url,
+                         registry=registry, skip_existing=skip_existing, metrics=metrics)
+        self.max_in_flight = max(1, max_in_flight)
+        self.semaphore = asyncio.Semaphore(self.max_in_flight)
+        self.client = httpx.AsyncClient(
+            headers=self.headers,
+            auth=self.auth if all(self.auth) else None,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=self.max_in_flight,
+                max_keepalive_connections=self.max_in_flight,
+            ),
+            transport=transport,
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        """Close the async HTTP client and release its connections."""
+        await self.client.aclose()
+
+    async def send(self, method, url, data=None):
+        """Send a request with the in-flight bound, rate limiting and retries.
+
+        Returns:
+            httpx.Response: The final response, retried on 429/5xx until attempts run out
+        """
+        attempt = 0
+        while True:
+            if self.rate_limiter:
+                await asyncio.sleep(self.rate_limiter.reserve())
+            try:
+                async with self.semaphore:
+                    started = time.perf_counter()
+                    response = await self.client.request(method, url, content=data)
+            except httpx.TransportError as e:
+                self.measure_request(method, type(e).__name__, started)
+                delay = self.backoff_for(attempt)
+                if delay is None:
+                    raise
+            else:
+                self.measure_request(method, response.status_code, started)
+                delay = self.backoff_for(attempt, response.status_code, response.headers.get('Retry-After'))
+                if delay is None:
+                    return response
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def create_ark(self, who, what, when, where):
+        """Create a single ARK identifier.
+
+        Returns:
+            dict: Data sent to the ARK with the ARK returned
+        """
+        data = self.create_metadata(who, what, when, where).encode('utf-8')
+        response = await self.send('POST', self.url, data=data)
+        return self.parse_create_response(who, what, when, where, response.content.decode('utf-8'))
+
+    async def create_ark_from_row(self, row):
+        """Create an ARK for a CSV row without letting a failed request escape."""
+        try:
+            return await self.create_ark(row['who'], row['what'], row['when'], row['where'])
+        except httpx.HTTPError as e:
+            return self.failed_result(row, e)
+
+    async def mint_row(self, item):
+        """Mint one numbered CSV row, reusing its journaled result when resuming
+        and, with skip_existing, the ARK its target got from the registry or an
+        earlier row of this batch."""
+        index, row = item
+        claim = asyncio.get_running_loop().create_future()
+        earlier = self.claim_target(row, claim)
+        result = None
+        try:
+            result = self.journaled_result(index, row) or self.existing_result(row)
+            if result is None and earlier is not claim:
+                # Shielded so cancelling this row doesn't cancel the earlier row's claim
+                result = self.claimed_result(row, await asyncio.shield(earlier))
+            if result is None:
+                result = await self.create_ark_from_row(row)
+                self.record_result(index, result)
+            return result
+        finally:
+            if earlier is claim and not claim.done():
+                claim.set_result(result)
+
+    async def process_csv(self, input_file):
+        """Process CSV file and create ARKs for each row concurrently, keeping input order."""
+        with open(input_file, 'r', newline='') as csvfile:
+            rows = enumerate(csv.DictReader(csvfile))
+            async for result in async_ordered_map(self.mint_row, rows, self.max_in_flight * 2):
+                self.completed.append(result)
+
+    async def create_batch_from_csv(self, input_file, output_file, resume=False):
+        """Main method to process input and save results, journaling rows as they finish."""
+        journal = self.open_journal(output_file, resume=resume)
+        try:
+            await self.process_csv(input_file)
+        finally:
+            journal.close()
+        self.save_results(output_file)
+        for _ in self.register_results(self.completed, output_file):
+            pass
+        journal.finish()
+        return self.completed
+
+    async def get_ark(self, ark):
+        """Return the raw ANVL metadata EZID holds for an ARK."""
+        response = await self.send('GET', self.id_url(ark))
+        return response.content.decode("utf-8")
+
+    async def fetch_ark(self, ark):
+        """Fetch and parse the metadata EZID holds for an ARK."""
+        try:
+            response = await self.send('GET', self.id_url(ark))
+        except httpx.HTTPError as e:
+            self.measure_row('failure', type(e).__name__)
+            return {'ark': ark, 'error': str(e)}
+        return self.parse_metadata_response(ark, response.content.decode("utf-8"))
+
+    async def switch_status(self, ark, status="public"):
+        """Switches the Status of a Single ARK
+
+        Returns:
+            tuple: bool, message (str)
+        """
+        data = self.create_status_metadata(status).encode('utf-8')
+        response = await self.send('POST', self.id_url(ark), data=data)
+        full_message = response.content.decode('utf-8')
+        return self.parse_status_response(ark, status, full_message, response.status_code)
+
+    async def switch_row(self, item, status="public"):
+        """Switch the status of one numbered ARK, reusing its journaled outcome when resuming."""
+        index, ark = item
+        result = self.journaled_status(index, ark)
+        if result is None:
+            try:
+                success, message = await self.switch_status(ark, status)
+            except httpx.HTTPError as e:
+                self.measure_row('failure', type(e).__name__)
+                success, message = False, f"{ark} status failed with {e}"
+            result = {'ark': ark, 'success': success, 'message': message}
+            self.record_result(index, result)
+        return result
+
+    async def batch_switch_status(self, input_csv, status="public", output_csv=None, resume=False):
+        """Switch the status of every ARK in a CSV, journaling outcomes as they finish.
+
+        Returns:
+            str: Path of the output CSV
+        """
+        output_csv = output_csv or self.status_output_path(input_csv)
+        journal = self.open_journal(f"{input_csv}.{status}", resume=resume)
+        try:
+            with open(output_csv, "w", newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=self.STATUS_FIELDS)
+                writer.writeheader()
+                results = async_ordered_map(
+                    lambda item: self.switch_row(item, status),
+                    enumerate(self.iter_arks(input_csv)),
+                    self.max_in_flight * 2
+                )
+                async for result in results:
+                    writer.writerow(self.status_row(result))
+                    f.flush()
+        finally:
+            journal.close()
+        journal.finish()
+        return output_csv
@@ -0,0 +1,417 @@
+import csv
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from ..metrics import error_class
+from ..net import RateLimiter, RetryPolicy
+from ..profiling import stage
+from .journal import Journal
+
+
+ANVL_ESCAPE = re.compile(r'%([0-9A-Fa-f]{2})')
+
+
+def escape_anvl(value):
+    """Percent-encode the characters EZID escapes in ANVL names and values."""
+    return value.replace('%', '%25').replace('\n', '%0A').replace('\r', '%0D')
+
+
+def unescape_anvl(value):
+    """Undo EZID's percent-encoding of ANVL names and values (%0A, %25, %3A, ...)."""
+    return ANVL_ESCAPE.sub(lambda match: chr(int(match.group(1), 16)), value)
+
+
+def parse_anvl(body):
+    """Parse an EZID ANVL response body into a dictionary.
+
+    The first line is EZID's status line (``success: ark:/...`` or
+    ``error: reason``) and is returned under the ``success``/``error`` key.
+
+    Args:
+        body (str): Response body from EZID
+
+    Returns:
+        dict: Field names mapped to their unescaped values
+    """
+    fields = {}
+    for line in body.splitlines():
+        if not line.strip():
+            continue
+        name, _, value = line.partition(':')
+        fields[unescape_anvl(name.strip())] = unescape_anvl(value.strip())
+    return fields
+
+
+class EZIDBase:
+    """Request building and response parsing shared by the sync and async EZID handlers.
+
+    Subclasses own the transport; everything here is free of network calls.
+    """
+
+    RESULT_FIELDS = ['who', 'what', 'when', 'where', 'message', 'ark']
+    STATUS_FIELDS = ['Success', 'Message']
+    METADATA_FIELDS = [
+        'ark', 'erc.who', 'erc.what', 'erc.when', '_target', '_status',
+        '_profile', '_owner', '_created', '_updated', '_export', 'error',
+    ]
+
+    DEFAULT_BASE_URL = 'https://ezid.cdlib.org'
+    DEFAULT_SHOULDER_URL = 'https://ezid.cdlib.org/shoulder/ark:/81423/d2'
+
+    SKIPPED_PREFIX = 'skipped:'
+
+    def __init__(self, shoulder_url=None, rate_limit=None, max_attempts=5, base_url=None, registry=None,
+                 skip_existing=False, metrics=None):
+        # EZID_SHOULDER_URL / EZID_BASE_URL point every command at another server, e.g. the fake one
+        self.url = shoulder_url or os.getenv("EZID_SHOULDER_URL", self.DEFAULT_SHOULDER_URL)
+        self.base_url = (base_url or os.getenv("EZID_BASE_URL", self.DEFAULT_BASE_URL)).rstrip('/')
+        self.headers = {'Content-Type': 'text/plain'}
+        self.auth = (os.getenv("EZID_USER"), os.getenv("EZID_PASSWORD"))
+        self.rate_limiter = RateLimiter(rate_limit) if rate_limit else None
+        self.retry_policy = RetryPolicy(max_attempts=max_attempts)
+        self.journal = None
+        self.completed = []
+        self.registry = registry
+        # Reuse the ARK the registry already holds for a row's target instead of minting another
+        self.skip_existing = skip_existing
+        self.skipped = 0
+        # With skip_existing, the claim of the first row of this run to mint each target, so a target listed
+        # twice gets one ARK; dropped once the result is in the registry (see release_claim)
+        self.claimed_targets = {}
+        self.target_lock = threading.Lock()
+        # Optional RunMetrics every request and row outcome is reported to
+        self.metrics = metrics
+
+    def backoff_for(self, attempt, status_code=None, retry_after=None):
+        """Decide whether a request should be retried and adapt the rate limiter.
+
+        Args:
+            attempt (int): Zero-based number of the attempt that just finished
+            status_code (int): Response status, or None when the connection failed
+            retry_after (str): Value of the Retry-After header, if any
+
+        Returns:
+            float: Seconds to wait before retrying, or None when the outcome is final
+        """
+        if status_code is not None and not self.retry_policy.should_retry(status_code):
+            if self.rate_limiter:
+                self.rate_limiter.reward()
+            return None
+        if self.rate_limiter and (status_code is None or self.retry_policy.is_throttled(status_code)):
+            self.rate_limiter.penalize()
+        if attempt + 1 >= self.retry_policy.max_attempts:
+            return None
+        if self.metrics is not None:
+            self.metrics.count('retries', reason='connection' if status_code is None else f"http_{status_code}")
+        return self.retry_policy.delay(attempt, retry_after)
+
+    def measure_request(self, method, status, started):
+        """Report a request that began at perf_counter() time started, if metrics are kept."""
+        if self.metrics is not None:
+            self.metrics.observe_request(method, status, time.perf_counter() - started)
+
+    def measure_row(self, outcome, error=None):
+        """Report one row's outcome, and its error class for failures, if metrics are kept."""
+        if self.metrics is not None:
+            self.metrics.row(outcome, error)
+
+    def create_metadata(self, who, what, when, where):
+        """Create metadata content string for EZID request.
+
+        Args:
+            who (str): the agent responsible for the resource — typically the creator, author, or contributor.
+            what (str): the title of the work
+            when (str): the date of publication for the original work
+            where (str): URL or current location of the resource
+
+        Returns:
+            dict: The data formatted for the Post and Creation of the Ark
+        """
+        # @TODO: _status: should not be assumed as reserved
+        return (
+            f'erc.who: {who}\n'
+            f'erc.what: {what}\n'
+            f'erc.when: {when}\n'
+            f'_target: {where}\n'
+            f'_status: reserved\n'
+        )
+
+    def create_status_metadata(self, status):
+        """Create the metadata content string for a status change."""
+        # @TODO: status should be limited to known values
+        return f'_status: {status}\n'
+
+    def id_url(self, ark):
+        """Return the EZID URL used to read or modify an ARK."""
+        return f"{self.base_url}/id/{ark}"
+
+    def parse_create_response(self, who, what, when, where, full_message):
+        """Build the result row for a mint request from EZID's response body.
+
+        Returns:
+            dict: Data sent to the ARK with the ARK returned
+        """
+        # https://n2t.net/ark:/81423/d2tg6j
+        ark = ""
+        if "success" in full_message:
+            ark = f"https://n2t.net/{full_message.split(' ')[-1]}"
+            self.measure_row('success')
+        else:
+            self.measure_row('failure', error_class(full_message))
+        return {
+            'who': who,
+            'what': what,
+            'when': when,
+            'where': where,
+            'message': full_message,
+            'ark': ark,
+        }
+
+    def parse_status_response(self, ark, status, full_message, status_code):
+        """Build the (success, message) tuple for a status change response."""
+        if "success" in full_message:
+            self.measure_row('success')
+            return True, f"{ark} status successfully changed to {status}"
+        else:
+            self.measure_row('failure', f"http_{status_code}")
+            return False, f"{ark} status failed with {status_code}"
+
+    def failed_result(self, row, error):
+        """Build the result row for a CSV row whose request raised an error."""
+        self.measure_row('failure', type(error).__name__)
+        return {
+            'who': row['who'],
+            'what': row['what'],
+            'when': row['when'],
+            'where': row['where'],
+            'message': f"error: {error}",
+            'ark': "",
+        }
+
+    def open_journal(self, output_file, resume=False):
+        """Open the journal kept next to an output CSV while a batch is running."""
+        self.journal = Journal(f"{output_file}.journal.jsonl", resume=resume)
+        return self.journal
+
+    def journaled_result(self, index, row):
+        """Return a row's result from a resumed journal if that row already has an ARK.
+
+        Args:
+            index (int): Zero-based row number in the input CSV
+            row (dict): CSV row, used to make sure the input has not shifted
+
+        Returns:
+            dict: The journaled result, or None when the row still needs minting
+        """
+        if self.journal is None:
+            return None
+        result = self.journal.get(index)
+        if result and result['ark'] and result['where'] == row['where']:
+            self.measure_row('resumed')
+            return result
+        return None
+
+    def existing_result(self, row):
+        """Return a result for a row whose target already has an ARK in the registry.
+
+        Only used with skip_existing; the result's message starts with SKIPPED_PREFIX.
+
+        Args:
+            row (dict): CSV row with who, what, when and where columns
+
+        Returns:
+            dict: Result carrying the existing ARK, or None when the row needs minting
+        """
+        if not self.skip_existing or self.registry is None or not row['where']:
+            return None
+        ark = self.registry.ark_for_target(row['where'])
+        if ark is None:
+            return None
+        return self.skipped_result(row, ark)
+
+    def skipped_result(self, row, ark):
+        """Build the result for a row that reuses the ARK its target already has."""
+        self.measure_row('skipped')
+        return {
+            'who': row['who'],
+            'what': row['what'],
+            'when': row['when'],
+            'where': row['where'],
+            'message': f"{self.SKIPPED_PREFIX} {row['where']} already has {ark}",
+            'ark': f"https://n2t.net/{ark}",
+        }
+
+    def claim_target(self, row, claim):
+        """Claim a row's target for this run, or return the claim an earlier row already holds on it.
+
+        The registry only learns about this run's ARKs once the batch is
+        done, so with skip_existing the rows of one batch are also checked
+        against each other. The first row to reach a target resolves its
+        claim with the result it ends up with (see claimed_result); later
+        rows wait on that claim instead of minting again.
+
+        Args:
+            row (dict): CSV row with a where column
+            claim: Unresolved future for this row's result
+
+        Returns:
+            claim itself when this row mints the target, or the earlier row's future
+        """
+        if not self.skip_existing or not row['where']:
+            return claim
+        with self.target_lock:
+            return self.claimed_targets.setdefault(row['where'], claim)
+
+    def release_claim(self, target):
+        """Forget a target's claim once it has resolved, leaving later rows to the registry.
+
+        Called as results are registered, so only the claims of rows still in
+        flight are held and memory stays flat however long the input is. A
+        claim that hasn't resolved yet belongs to a row still minting and is kept.
+        """
+        with self.target_lock:
+            claim = self.claimed_targets.get(target)
+            if claim is not None and claim.done():
+                del self.claimed_targets[target]
+
+    def claimed_result(self, row, earlier):
+        """Return a skipped result reusing the ARK an earlier row of this run got, or None if it got none."""
+        if not earlier or not earlier.get('ark'):
+            return None
+        return self.skipped_result(row, earlier['ark'].replace("https://n2t.net/", ""))
+
+    def record_result(self, index, result):
+        """Append a row's result to the journal, if one is open."""
+        if self.journal is not None:
+            with stage('journal'):
+                self.journal.append(index, result)
+
+    def register_results(self, results, batch):
+        """Pass mint results through, adding each new ARK to the registry, if one is set.
+
+        Rows skipped because their target already had an ARK are counted in skipped.
+        Once a result is registered, its target's claim is released.
+
+        Args:
+            results (iterable[dict]): Results of create_ark
+            batch (str): Name to file the ARKs under, normally the output CSV
+
+        Yields:
+            dict: Each result, unchanged
+        """
+        for result in results:
+            if result.get('message', '').startswith(self.SKIPPED_PREFIX):
+                self.skipped += 1
+            elif self.registry is not None and result.get('ark'):
+                with stage('registry'):
+                    self.registry.add(result['ark'].replace("https://n2t.net/", ""), 'ark', result['where'], batch)
+            if self.registry is not None and result.get('where'):
+                self.release_claim(result['where'])
+            yield result
+        if self.registry is not None:
+            with stage('registry'):
+                self.registry.commit()
+
+    def parse_metadata_response(self, ark, full_message):
+        """Turn EZID's ANVL answer to a GET into a flat metadata record for an ARK."""
+        fields = parse_anvl(full_message)
+        fields.pop('success', None)
+        if 'error' in fields:
+            self.measure_row('failure', error_class(full_message))
+        else:
+            self.measure_row('success')
+        return {'ark': ark, **fields}
+
+    def iter_arks(self, input_csv):
+        """Lazily read the ARKs from the ark column of a CSV, stripping the resolver prefix."""
+        with open(input_csv, 'r') as my_csv:
+            reader = csv.DictReader(my_csv)
+            for row in reader:
+                ark_url = row.get("ark")
+                if ark_url:
+                    yield ark_url.replace("https://n2t.net/", "")
+
+    def write_metadata(self, records, output_file):
+        """Stream metadata records to CSV, or to JSON Lines when the output ends in .jsonl.
+
+        Args:
+            records (iterable): Metadata dictionaries, consumed lazily
+            output_file (str): Path of the CSV or JSONL file to write
+
+        Returns:
+            int: Number of records written
+        """
+        count = 0
+        with open(output_file, 'w', newline='', encoding='utf-8') as f:
+            if output_file.endswith('.jsonl'):
+                for record in records:
+                    with stage('write_output'):
+                        f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                    count += 1
+            else:
+                writer = csv.DictWriter(f, fieldnames=self.METADATA_FIELDS, extrasaction='ignore')
+                writer.writeheader()
+                for record in records:
+                    with stage('write_output'):
+                        writer.writerow(record)
+                    count += 1
+        return count
+
+    def save_results(self, output_file):
+        """Save completed results to CSV file."""
+        with stage('write_output'), open(output_file, 'w', newline='') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=self.RESULT_FIELDS)
+            writer.writeheader()
+            for row in self.completed:
+                writer.writerow(row)
+
+    def status_output_path(self, input_csv):
+        """Default output path for a status batch: the input name with a timestamp."""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return f"{input_csv.replace('.csv', timestamp)}.csv"
+
+    def journaled_status(self, index, ark):
+        """Return a status outcome from a resumed journal if that ARK was already switched.
+
+        Args:
+            index (int): Zero-based row number in the input CSV
+            ark (str): The ARK on that row, used to make sure the input has not shifted
+
+        Returns:
+            dict: The journaled outcome, or None when the ARK still needs switching
+        """
+        if self.journal is None:
+            return None
+        result = self.journal.get(index)
+        if result and result['success'] and result['ark'] == ark:
+            self.measure_row('resumed')
+            return result
+        return None
+
+    def status_row(self, result):
+        """Map a status outcome to its row in the status output CSV."""
+        return {"Success": result['success'], "Message": result['message']}
+
+    def write_status_results(self, results, output_file):
+        """Stream status outcomes to a CSV, flushing each row as it arrives.
+
+        Args:
+            results (iterable): Dictionaries with ark, success and message keys
+            output_file (str): Path of the CSV to write
+
+        Returns:
+            int: Number of outcomes written
+        """
+        count = 0
+        with open(output_file, "w", newline='') as output_csv:
+            writer = csv.DictWriter(output_csv, fieldnames=self.STATUS_FIELDS)
+            writer.writeheader()
+            for result in results:
+                with stage('write_output'):
+                    writer.writerow(self.status_row(result))
+                    output_csv.flush()
+                count += 1
+        return count
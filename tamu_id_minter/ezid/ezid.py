@@ -1,37 +1,88 @@
 import csv
+import time
 import requests
-import os
-from datetime import datetime
+from concurrent.futures import Future
+from functools import partial
 from tqdm import tqdm
+from ..net import build_session
+from ..pool import ordered_map
+from ..profiling import stage, timed_iter
+from .base import EZIDBase
 
 
-class EZIDARKHandler:
-    def __init__(self, shoulder_url='https://ezid.cdlib.org/shoulder/ark:/81423/d2'):
-        self.url = shoulder_url
-        self.headers = {'Content-Type': 'text/plain'}
-        self.auth = (os.getenv("EZID_USER"), os.getenv("EZID_PASSWORD"))
-        self.completed = []
+class EZIDARKHandler(EZIDBase):
+    def __init__(self, shoulder_url=None,
+                 pool_size=10, max_retries=3, keep_alive=True, workers=1,
+                 rate_limit=None, max_attempts=5, base_url=None, registry=None,
+                 skip_existing=False, metrics=None):
+        """Initialize the handler and its pooled HTTP session.
 
-    def create_metadata(self, who, what, when, where):
-        """Create metadata content string for EZID request.
+        Args:
+            shoulder_url (str): EZID shoulder to mint new ARKs under (defaults to $EZID_SHOULDER_URL or ark:/81423/d2)
+            pool_size (int): Number of keep-alive connections to hold open to EZID
+            max_retries (int): Connection-level retries performed by the session adapter
+            keep_alive (bool): Reuse connections between requests
+            workers (int): Number of rows to mint in parallel when processing a CSV
+            rate_limit (float): Requests per second shared by all workers (unlimited when None)
+            max_attempts (int): Attempts per request when EZID answers 429/5xx or the connection fails
+            base_url (str): EZID server the /id/ endpoints live on
+            registry (IdentifierRegistry): Optional local registry every minted ARK is recorded in
+            skip_existing (bool): Don't mint rows whose target already has an ARK in the registry
+            metrics (RunMetrics): Optional collector for request, retry and row outcome metrics
+        """
+        super().__init__(shoulder_url, rate_limit=rate_limit, max_attempts=max_attempts, base_url=base_url,
+                         registry=registry, skip_existing=skip_existing, metrics=metrics)
+        self.workers = max(1, workers)
+        # Every worker needs its own connection or they queue on the pool
+        self.session = build_session(
+            pool_size=max(pool_size, self.workers),
+            max_retries=max_retries,
+            keep_alive=keep_alive
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Close the pooled HTTP session and release its connections."""
+        self.session.close()
+
+    def send(self, method, url, data=None):
+        """Send a request through the pooled session with rate limiting and retries.
 
         Args:
-            who (str): the agent responsible for the resource — typically the creator, author, or contributor.
-            what (str): the title of the work
-            when (str): the date of publication for the original work
-            where (str): URL or current location of the resource
+            method (str): Session method to call (get or post)
+            url (str): Request URL
+            data (bytes): Request body
 
         Returns:
-            dict: The data formatted for the Post and Creation of the Ark
+            requests.Response: The final response, retried on 429/5xx until attempts run out
         """
-        # @TODO: _status: should not be assumed as reserved
-        return (
-            f'erc.who: {who}\n'
-            f'erc.what: {what}\n'
-            f'erc.when: {when}\n'
-            f'_target: {where}\n'
-            f'_status: reserved\n'
-        )
+        attempt = 0
+        while True:
+            if self.rate_limiter:
+                with stage('rate_limit'):
+                    self.rate_limiter.acquire()
+            started = time.perf_counter()
+            try:
+                with stage('http'):
+                    response = getattr(self.session, method)(url, data=data, headers=self.headers, auth=self.auth)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.measure_request(method, type(e).__name__, started)
+                delay = self.backoff_for(attempt)
+                if delay is None:
+                    raise
+            else:
+                self.measure_request(method, response.status_code, started)
+                delay = self.backoff_for(attempt, response.status_code, response.headers.get('Retry-After'))
+                if delay is None:
+                    return response
+            with stage('backoff'):
+                time.sleep(delay)
+            attempt += 1
 
     def create_ark(self, who, what, when, where):
         """Create a single ARK identifier.
@@ -48,20 +99,67 @@ class EZIDARKHandler:
         metadata_content = self.create_metadata(who, what, when, where)
         data = metadata_content.encode('utf-8')
 
-        response = requests.post(self.url, data=data, headers=self.headers, auth=self.auth)
-        # https://n2t.net/ark:/81423/d2tg6j
+        response = self.send('post', self.url, data=data)
         full_message = response.content.decode('utf-8')
-        ark = ""
-        if "success" in  full_message:
-            ark = f"https://n2t.net/{full_message.split(' ')[-1]}"
-        return {
-            'who': who,
-            'what': what,
-            'when': when,
-            'where': where,
-            'message': full_message,
-            'ark': ark,
-        }
+        return self.parse_create_response(who, what, when, where, full_message)
+
+    def create_ark_from_row(self, row):
+        """Create an ARK for a CSV row without letting a failed request escape.
+
+        Args:
+            row (dict): CSV row with who, what, when and where columns
+
+        Returns:
+            dict: Result of create_ark, or the row with the error as its message
+        """
+        try:
+            return self.create_ark(row['who'], row['what'], row['when'], row['where'])
+        except requests.RequestException as e:
+            return self.failed_result(row, e)
+
+    def mint_row(self, item):
+        """Mint one numbered CSV row, reusing its journaled result when resuming
+        and, with skip_existing, the ARK its target got from the registry or an
+        earlier row of this batch.
+
+        Args:
+            item (tuple): Zero-based row number and the CSV row
+
+        Returns:
+            dict: Result for the row
+        """
+        index, row = item
+        claim = Future()
+        earlier = self.claim_target(row, claim)
+        result = None
+        try:
+            result = self.journaled_result(index, row) or self.existing_result(row)
+            if result is None and earlier is not claim:
+                # Rows are handed to the pool in order, so the earlier row is already running
+                result = self.claimed_result(row, earlier.result())
+            if result is None:
+                result = self.create_ark_from_row(row)
+                self.record_result(index, result)
+            return result
+        finally:
+            if earlier is claim:
+                claim.set_result(result)
+
+    def iter_results(self, input_file):
+        """Lazily mint every row of a CSV, yielding results in input order.
+
+        With more than one worker, rows are minted through a thread pool that
+        only reads a few rows ahead of the results already yielded.
+
+        Args:
+            input_file (str): The CSV that contains your ARK information with appropriate headings.
+
+        Yields:
+            dict: Result for each row
+        """
+        with open(input_file, 'r', newline='') as csvfile:
+            rows = timed_iter('read_csv', enumerate(csv.DictReader(csvfile)))
+            yield from ordered_map(self.mint_row, rows, workers=self.workers)
 
     def process_csv(self, input_file):
         """Process CSV file and create ARKs for each row.
@@ -70,38 +168,97 @@ class EZIDARKHandler:
 
             input_file (str): The CSV that contains your ARK information with appropriate headings.
         """
-        with open(input_file, 'r', newline='') as csvfile:
-            reader = csv.DictReader(csvfile)
-
-            for row in reader:
-                result = self.create_ark(
-                    row['who'],
-                    row['what'],
-                    row['when'],
-                    row['where']
-                )
-                self.completed.append(result)
-
-    def save_results(self, output_file):
-        """Save completed results to CSV file."""
-        fieldnames = ['who', 'what', 'when', 'where', 'message', 'ark']
-        with open(output_file, 'w', newline='') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            for row in self.completed:
-                writer.writerow(row)
-
-    def create_batch_from_csv(self, input_file, output_file):
-        """Main method to process input and save results."""
-        self.process_csv(input_file)
+        self.completed.extend(self.iter_results(input_file))
+
+    def create_batch_from_csv(self, input_file, output_file, resume=False):
+        """Main method to process input and save results.
+
+        Every result is journaled next to the output file as it arrives, so a
+        crashed run can be resumed; the journal is removed once the output is saved.
+
+        Args:
+            input_file (str): The CSV that contains your ARK information
+            output_file (str): The CSV to write results to
+            resume (bool): Skip rows the journal of an unfinished run already minted
+        """
+        journal = self.open_journal(output_file, resume=resume)
+        try:
+            self.process_csv(input_file)
+        finally:
+            journal.close()
         self.save_results(output_file)
+        for _ in self.register_results(self.completed, output_file):
+            pass
+        journal.finish()
         return self.completed
 
+    def stream_batch_from_csv(self, input_file, output_file, resume=False):
+        """Mint every row of a CSV, writing each result to the output as soon as it is ready.
+
+        Unlike create_batch_from_csv, results are not kept in self.completed, so
+        memory use does not grow with the size of the input.
+
+        Args:
+            input_file (str): The CSV that contains your ARK information
+            output_file (str): The CSV to write results to
+            resume (bool): Skip rows the journal of an unfinished run already minted
+
+        Returns:
+            int: Number of rows processed
+        """
+        journal = self.open_journal(output_file, resume=resume)
+        count = 0
+        try:
+            with open(output_file, 'w', newline='') as csvfile:
+                writer = csv.DictWriter(csvfile, fieldnames=self.RESULT_FIELDS)
+                writer.writeheader()
+                results = self.register_results(self.iter_results(input_file), output_file)
+                for result in tqdm(results, unit='row'):
+                    with stage('write_output'):
+                        writer.writerow(result)
+                        csvfile.flush()
+                    count += 1
+        finally:
+            journal.close()
+        journal.finish()
+        return count
+
     def get_ark(self, ark):
         """Prints Metadata About an ARK"""
-        response = requests.get(f"https://ezid.cdlib.org/id/{ark}", headers=self.headers, auth=self.auth)
+        response = self.send('get', self.id_url(ark))
         print(response.content.decode("utf-8"))
 
+    def fetch_ark(self, ark):
+        """Fetch and parse the metadata EZID holds for an ARK.
+
+        Args:
+            ark (str): The ARK to look up (i.e. ark:/81423/d2h03s)
+
+        Returns:
+            dict: Parsed ANVL fields (erc.who, _target, _status, ...), with an error key on failure
+        """
+        try:
+            response = self.send('get', self.id_url(ark))
+        except requests.RequestException as e:
+            self.measure_row('failure', type(e).__name__)
+            return {'ark': ark, 'error': str(e)}
+        return self.parse_metadata_response(ark, response.content.decode("utf-8"))
+
+    def get_arks(self, input_csv, output_file):
+        """Fetch metadata for every ARK in a CSV and stream it to a CSV or JSONL file.
+
+        ARKs are fetched concurrently by the handler's workers over its pooled session.
+
+        Args:
+            input_csv (str): CSV with an ark column
+            output_file (str): Output path; .jsonl writes JSON Lines, anything else CSV
+
+        Returns:
+            int: Number of ARKs written
+        """
+        records = ordered_map(self.fetch_ark, timed_iter('read_csv', self.iter_arks(input_csv)), workers=self.workers)
+        return self.write_metadata(tqdm(records, unit='ark'), output_file)
+
     def switch_status(self, ark, status="public"):
         """Switches the Status of a Single ARK
         
@@ -117,40 +274,62 @@ class EZIDARKHandler:
 
             (True, "ark:/81423/d2h03s status successfully changed to public")
         """
-        # @TODO: status should be limited to known values
-        metadata_content = (
-            f'_status: {status}\n'
-        )
-        data = metadata_content.encode('utf-8')
-        response = requests.post(
-            f"https://ezid.cdlib.org/id/{ark}", 
-            data=data, 
-            headers=self.headers,
-            auth=self.auth
-        )
+        data = self.create_status_metadata(status).encode('utf-8')
+        response = self.send('post', self.id_url(ark), data=data)
         full_message = response.content.decode('utf-8')
-        if "success" in  full_message:
-            return True, f"{ark} status successfully changed to {status}"
-        else:
-            return False, f"{ark} status failed with {response.status_code}"
-
-    def batch_switch_status(self, input_csv, status="public"):
-        arks = []
-        messages = []
-        with open(input_csv, 'r') as my_csv:
-            reader = csv.DictReader(my_csv)
-            for row in reader:
-                ark_url = row.get("ark")
-                arks.append(ark_url.replace("https://n2t.net/", ""))
-        for ark in tqdm(arks):
-            x = self.switch_status(ark, status)
-            messages.append(x)
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        with open(f"{input_csv.replace(".csv", timestamp)}.csv", "w") as output_csv:
-            writer = csv.DictWriter(output_csv, fieldnames=["Success", "Message"])
-            writer.writeheader()
-            for msg in messages:
-                writer.writerow({"Success": msg[0], "Message": msg[1]})
+        return self.parse_status_response(ark, status, full_message, response.status_code)
+
+    def switch_row(self, item, status="public"):
+        """Switch the status of one numbered ARK, reusing its journaled outcome when resuming.
+
+        Args:
+            item (tuple): Zero-based row number and the ARK
+            status (str): The status to switch to
+
+        Returns:
+            dict: The ark with its success flag and message
+        """
+        index, ark = item
+        result = self.journaled_status(index, ark)
+        if result is None:
+            try:
+                success, message = self.switch_status(ark, status)
+            except requests.RequestException as e:
+                self.measure_row('failure', type(e).__name__)
+                success, message = False, f"{ark} status failed with {e}"
+            result = {'ark': ark, 'success': success, 'message': message}
+            self.record_result(index, result)
+        return result
+
+    def batch_switch_status(self, input_csv, status="public", output_csv=None, resume=False):
+        """Switch the status of every ARK in a CSV.
+
+        ARKs are switched by the handler's workers and each outcome is written to
+        the output CSV and a journal as soon as it finishes, so an interrupted run
+        can be resumed without repeating ARKs that were already switched.
+
+        Args:
+            input_csv (str): CSV with an ark column
+            status (str): The status to switch to. (public by default)
+            output_csv (str): Where to write outcomes (defaults to a timestamped name next to the input)
+            resume (bool): Skip ARKs the journal of an unfinished run already switched
+
+        Returns:
+            str: Path of the output CSV
+        """
+        output_csv = output_csv or self.status_output_path(input_csv)
+        journal = self.open_journal(f"{input_csv}.{status}", resume=resume)
+        try:
+            results = ordered_map(
+                partial(self.switch_row, status=status),
+                enumerate(timed_iter('read_csv', self.iter_arks(input_csv))),
+                workers=self.workers
+            )
+            self.write_status_results(tqdm(results, unit='ark'), output_csv)
+        finally:
+            journal.close()
+        journal.finish()
+        return output_csv
 
 
 if __name__ == "__main__":
@@ -160,6 +339,6 @@ if __name__ == "__main__":
     # results = generator.run(input_csv, output_csv)
     # print(f"Processed {len(results)} records")
     ark = "ark:/81423/d2h03s"
-    handler = EZIDARKHandler()
-    results = handler.switch_status(ark)
+    with EZIDARKHandler() as handler:
+        results = handler.switch_status(ark)
     print(results)
@@ -0,0 +1,196 @@
+import itertools
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+import click
+from ..net import RateLimiter
+from .base import escape_anvl, parse_anvl
+
+
+class FakeEZIDServer:
+    """Local stand-in for EZID for load and integration testing.
+
+    Implements the three endpoints the handlers use — POST /shoulder/<shoulder>,
+    GET /id/<ark> and POST /id/<ark> — with ANVL bodies, keep-alive connections
+    and optional latency, random server errors and 429 throttling.
+
+    Example:
+        >>> with FakeEZIDServer(latency=0.05, throttle_rate=100) as server:
+        ...     handler = EZIDARKHandler(shoulder_url=server.shoulder_url, base_url=server.url)
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, shoulder='ark:/99999/fk4', latency=0.0,
+                 error_rate=0.0, throttle_rate=None, retry_after=1, seed=None):
+        """Configure the server; it listens once started.
+
+        Args:
+            host (str): Interface to bind
+            port (int): Port to bind (0 picks a free one)
+            shoulder (str): Shoulder new ARKs are minted under
+            latency (float): Seconds each request sleeps before answering
+            error_rate (float): Fraction of requests answered with a 500
+            throttle_rate (float): Requests per second allowed before answering 429 (unlimited when None)
+            retry_after (int): Retry-After seconds sent with 429 responses
+            seed (int): Seed for the error-rate random generator
+        """
+        self.shoulder = shoulder
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle = RateLimiter(throttle_rate) if throttle_rate else None
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.records = {}
+        self.counter = itertools.count()
+        self.lock = threading.Lock()
+        self.stats = {'requests': 0, 'minted': 0, 'updated': 0, 'throttled': 0, 'errors': 0}
+        self.httpd = ThreadingHTTPServer((host, port), self.request_handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        """Base URL of the running server."""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def shoulder_url(self):
+        """Shoulder URL to hand to EZIDARKHandler."""
+        return f"{self.url}/shoulder/{self.shoulder}"
+
+    def start(self):
+        """Serve requests on a background thread."""
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the listening socket."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def count(self, stat):
+        with self.lock:
+            self.stats[stat] += 1
+
+    def mint(self, fields):
+        """Store a new record under the shoulder and return its ARK."""
+        ark = f"{self.shoulder}{next(self.counter)}"
+        now = str(int(time.time()))
+        with self.lock:
+            self.records[ark] = {'_created': now, '_updated': now, **fields}
+        self.count('minted')
+        return ark
+
+    def update(self, ark, fields):
+        """Merge fields into an existing record; returns False when the ARK is unknown."""
+        with self.lock:
+            if ark not in self.records:
+                return False
+            self.records[ark].update(fields, _updated=str(int(time.time())))
+        self.count('updated')
+        return True
+
+    def request_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body go out in separate writes; without this Nagle adds ~40ms per response
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def respond(self, status, body, headers=None):
+                data = body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/plain; charset=UTF-8')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def read_fields(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                return parse_anvl(self.rfile.read(length).decode('utf-8'))
+
+            def admit(self):
+                """Apply latency, throttling and random errors; returns False if already answered."""
+                server.count('requests')
+                if server.latency:
+                    time.sleep(server.latency)
+                if server.throttle and not server.throttle.try_acquire():
+                    server.count('throttled')
+                    self.respond(429, "error: too many requests", {'Retry-After': str(server.retry_after)})
+                    return False
+                if server.error_rate and server.random.random() < server.error_rate:
+                    server.count('errors')
+                    self.respond(500, "error: internal server error")
+                    return False
+                return True
+
+            def do_GET(self):
+                if not self.admit():
+                    return
+                ark = unquote(self.path[len('/id/'):]) if self.path.startswith('/id/') else None
+                with server.lock:
+                    fields = dict(server.records[ark]) if ark in server.records else None
+                if fields is None:
+                    self.respond(400, "error: bad request - no such identifier")
+                    return
+                lines = [f"success: {ark}"]
+                lines += [f"{escape_anvl(name)}: {escape_anvl(value)}" for name, value in fields.items()]
+                self.respond(200, "\n".join(lines) + "\n")
+
+            def do_POST(self):
+                fields = self.read_fields()
+                if not self.admit():
+                    return
+                if self.path.startswith('/shoulder/'):
+                    ark = server.mint(fields)
+                    self.respond(201, f"success: {ark}")
+                elif self.path.startswith('/id/'):
+                    ark = unquote(self.path[len('/id/'):])
+                    if server.update(ark, fields):
+                        self.respond(200, f"success: {ark}")
+                    else:
+                        self.respond(400, "error: bad request - no such identifier")
+                else:
+                    self.respond(404, "error: not found")
+
+        return Handler
+
+
+@click.command(help="Run a local fake EZID server for load and integration testing")
+@click.option("--host", default="127.0.0.1", help="Interface to bind")
+@click.option("--port", default=8080, type=int, help="Port to listen on")
+@click.option("--shoulder", default="ark:/99999/fk4", help="Shoulder to mint ARKs under")
+@click.option("--latency", default=0.0, type=float, help="Seconds to wait before answering each request")
+@click.option("--error_rate", default=0.0, type=float, help="Fraction of requests answered with a 500")
+@click.option("--throttle_rate", type=float, help="Requests per second allowed before answering 429")
+def main(host, port, shoulder, latency, error_rate, throttle_rate):
+    server = FakeEZIDServer(host=host, port=port, shoulder=shoulder, latency=latency,
+                            error_rate=error_rate, throttle_rate=throttle_rate)
+    print(f"Fake EZID listening on {server.url}")
+    print(f"export EZID_BASE_URL={server.url} EZID_SHOULDER_URL={server.shoulder_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(server.stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import json
+import os
+import threading
+
+
+class Journal:
+    """Append-only JSONL log of finished rows, written as each result arrives.
+
+    Each line holds the zero-based row number and the result for that row, so
+    a crashed run can be resumed without repeating work that already reached EZID.
+    """
+
+    def __init__(self, path, resume=False):
+        """Open a journal.
+
+        Args:
+            path (str): Path of the JSONL journal file
+            resume (bool): Load existing entries instead of refusing to touch them
+
+        Raises:
+            FileExistsError: When a journal from an unfinished run exists and resume is False
+        """
+        self.path = path
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.handle = None
+        if os.path.exists(path):
+            if not resume:
+                raise FileExistsError(
+                    f"Journal {path} exists from an unfinished run. Resume it or delete it first."
+                )
+            self.entries = self.load()
+
+    def load(self):
+        """Read every complete entry in the journal.
+
+        A line cut short by a crash is ignored; the row it described is simply done again.
+
+        Returns:
+            dict: Result dictionaries keyed by row number
+        """
+        entries = {}
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                entries[entry['row']] = entry['result']
+        return entries
+
+    def get(self, row):
+        """Return the journaled result for a row, or None."""
+        return self.entries.get(row)
+
+    def append(self, row, result):
+        """Record the result of a row and flush it to disk."""
+        line = json.dumps({'row': row, 'result': result}, ensure_ascii=False)
+        with self.lock:
+            if self.handle is None:
+                self.handle = open(self.path, 'a', encoding='utf-8')
+            self.handle.write(line + '\n')
+            self.handle.flush()
+
+    def close(self):
+        """Close the journal file if it was opened."""
+        with self.lock:
+            if self.handle is not None:
+                self.handle.close()
+                self.handle = None
+
+    def finish(self):
+        """Close and delete the journal once its results are safely in the output file."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,180 @@
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+# Upper bounds, in seconds, of the HTTP latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+PROMETHEUS_PREFIX = 'tamu_mint'
+
+COUNTER_HELP = {
+    'rows': 'Rows processed in the last run, by outcome and error class',
+    'http_requests': 'HTTP requests sent in the last run, by method and status',
+    'retries': 'Requests retried in the last run, by reason',
+    'duplicates': 'Duplicate DOIs and resources flagged in the last run, by kind',
+}
+
+
+def error_class(message):
+    """Short label for an error message, e.g. 'error: bad request - no such shoulder' -> 'bad_request'."""
+    text = message.split(':', 1)[-1].split(' - ', 1)[0].strip().lower()
+    return re.sub(r'[^a-z0-9]+', '_', text).strip('_')[:40] or 'unknown'
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+class RunMetrics:
+    """Counters and an HTTP latency histogram for one command run.
+
+    Handlers report to it from any thread. When the run ends it is saved as
+    JSON or, for a path ending in .prom, in the Prometheus text format read
+    by node-exporter's textfile collector.
+    """
+
+    def __init__(self, command):
+        """Start measuring a run.
+
+        Args:
+            command (str): Name of the command, added as a label to every metric
+        """
+        self.command = command
+        self.started = datetime.now(timezone.utc)
+        self.start_time = time.perf_counter()
+        self.duration = None
+        self.success = None
+        self.counters = {}
+        self.latency_buckets = [0] * len(LATENCY_BUCKETS)
+        self.latency_sum = 0.0
+        self.latency_count = 0
+        self.lock = threading.Lock()
+
+    def count(self, name, value=1, **labels):
+        """Add value to the counter name with the given labels."""
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe_request(self, method, status, seconds):
+        """Count one HTTP request and add its latency to the histogram.
+
+        Args:
+            method (str): HTTP method
+            status (int or str): Response status, or the exception name when no response came back
+            seconds (float): Time the request took
+        """
+        self.count('http_requests', method=method.upper(), status=status)
+        with self.lock:
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    self.latency_buckets[index] += 1
+            self.latency_sum += seconds
+            self.latency_count += 1
+
+    def row(self, outcome, error=None):
+        """Count one processed row; failures are labelled with their error class."""
+        if error is None:
+            self.count('rows', outcome=outcome)
+        else:
+            self.count('rows', outcome=outcome, error=error)
+
+    def total(self, name):
+        """Sum of a counter over all its labels."""
+        with self.lock:
+            return sum(value for (counter, _), value in self.counters.items() if counter == name)
+
+    def finish(self, success=True):
+        """Stop the clock and record whether the command succeeded."""
+        self.duration = time.perf_counter() - self.start_time
+        self.success = success
+
+    def throughput(self):
+        """Rows processed per second of the run."""
+        duration = self.duration if self.duration is not None else time.perf_counter() - self.start_time
+        return self.total('rows') / duration if duration else 0.0
+
+    def as_dict(self):
+        """Return every metric as a JSON-serializable dictionary."""
+        counters = {}
+        with self.lock:
+            for (name, labels), value in sorted(self.counters.items(), key=lambda item: repr(item[0])):
+                counters.setdefault(name, []).append(dict(labels, value=value))
+            buckets = {str(bound): count for bound, count in zip(LATENCY_BUCKETS, self.latency_buckets)}
+            buckets['+Inf'] = self.latency_count
+            latency = {'buckets': buckets, 'sum': self.latency_sum, 'count': self.latency_count}
+        return {
+            'command': self.command,
+            'started': self.started.isoformat(timespec='seconds'),
+            'duration_seconds': self.duration,
+            'success': self.success,
+            'rows': self.total('rows'),
+            'throughput_rows_per_second': self.throughput(),
+            'counters': counters,
+            'http_request_duration_seconds': latency,
+        }
+
+    def to_prometheus(self):
+        """Return the metrics in the Prometheus text exposition format."""
+        data = self.as_dict()
+        command = f'command="{escape_label(self.command)}"'
+        lines = []
+
+        def gauge(name, help_text, value):
+            lines.extend([
+                f"# HELP {PROMETHEUS_PREFIX}_{name} {help_text}",
+                f"# TYPE {PROMETHEUS_PREFIX}_{name} gauge",
+                f"{PROMETHEUS_PREFIX}_{name}{{{command}}} {value}",
+            ])
+
+        gauge('last_run_timestamp_seconds', 'When the last run started', self.started.timestamp())
+        gauge('last_run_success', 'Whether the last run finished without an error', int(bool(self.success)))
+        gauge('last_run_duration_seconds', 'Duration of the last run', data['duration_seconds'] or 0)
+        gauge('last_run_rows_per_second', 'Rows processed per second in the last run', data['throughput_rows_per_second'])
+
+        for name, series in data['counters'].items():
+            metric = f"{PROMETHEUS_PREFIX}_{name}"
+            lines.append(f"# HELP {metric} {COUNTER_HELP.get(name, name)}")
+            lines.append(f"# TYPE {metric} gauge")
+            for entry in series:
+                labels = "".join(f',{key}="{escape_label(value)}"' for key, value in entry.items() if key != 'value')
+                lines.append(f"{metric}{{{command}{labels}}} {entry['value']}")
+
+        metric = f"{PROMETHEUS_PREFIX}_http_request_duration_seconds"
+        latency = data['http_request_duration_seconds']
+        lines.append(f"# HELP {metric} Latency of HTTP requests in the last run")
+        lines.append(f"# TYPE {metric} histogram")
+        for bound, count in latency['buckets'].items():
+            lines.append(f'{metric}_bucket{{{command},le="{bound}"}} {count}')
+        lines.append(f"{metric}_sum{{{command}}} {latency['sum']}")
+        lines.append(f"{metric}_count{{{command}}} {latency['count']}")
+        return "\n".join(lines) + "\n"
+
+    def save(self, path):
+        """Write the metrics to path: Prometheus text for .prom files, JSON otherwise.
+
+        The file is replaced atomically so a collector never reads half of it,
+        and gets the permissions a plain open() would give it.
+        """
+        if path.endswith('.prom'):
+            content = self.to_prometheus()
+        else:
+            content = json.dumps(self.as_dict(), indent=2) + "\n"
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.metrics-', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(content)
+            # mkstemp creates the file 0600, which a collector running as another user can't read
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(temp_path, 0o666 & ~umask)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
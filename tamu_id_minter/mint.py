@@ -1,10 +1,81 @@
 import click
-from tamu_id_minter import EZIDARKHandler
-from tamu_id_minter.crossref import CrossrefDepositHandler
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+# Handlers are imported inside each command so that `tamu_mint --help` and
+# commands that need one backend don't pay for the others
 
 @click.group()
-def cli() -> None:
-    pass
+@click.option(
+    "--profile",
+    is_flag=True,
+    help="Print how long each pipeline stage took when the command exits",
+)
+@click.option(
+    "--profile_stats",
+    type=click.Path(dir_okay=False),
+    help="Also dump cProfile statistics to this file (implies --profile)",
+)
+@click.option(
+    "--trace_memory",
+    is_flag=True,
+    help="Also report peak memory and the largest allocations with tracemalloc (implies --profile)",
+)
+@click.pass_context
+def cli(ctx, profile, profile_stats, trace_memory) -> None:
+    if profile or profile_stats or trace_memory:
+        from tamu_id_minter.profiling import Profiler
+        profiler = Profiler(stats_file=profile_stats, trace_memory=trace_memory).start()
+        ctx.call_on_close(profiler.finish)
+
+def default_registry_path():
+    """Default --registry, resolved only when a command runs."""
+    from tamu_id_minter.registry import default_registry_path
+    return default_registry_path()
+
+def open_registry(path, enabled=True):
+    """Return the identifier registry at path, or a no-op context when there is none."""
+    from tamu_id_minter.registry import IdentifierRegistry
+    return IdentifierRegistry(path) if path and enabled else nullcontext()
+
+def registry_options(command):
+    """Add the --registry and --no_registry options shared by commands that mint or deposit."""
+    command = click.option(
+        "--no_registry",
+        is_flag=True,
+        help="Do not record identifiers in the local registry",
+    )(command)
+    return click.option(
+        "--registry",
+        default=default_registry_path,
+        show_default="$TAMU_ID_REGISTRY or ~/.tamu_id_minter/identifiers.sqlite3",
+        help="SQLite registry that minted and deposited identifiers are recorded in",
+    )(command)
+
+def metrics_option(command):
+    """Add the --metrics_file option shared by batch commands."""
+    return click.option(
+        "--metrics_file",
+        type=click.Path(dir_okay=False),
+        help="Write run metrics here when the command ends: Prometheus textfile format for .prom, JSON otherwise",
+    )(command)
+
+@contextmanager
+def run_metrics(command, path):
+    """Yield the RunMetrics of a command, saved to path when it ends (even by an error), or None without a path."""
+    if not path:
+        yield None
+        return
+    from tamu_id_minter.metrics import RunMetrics
+    metrics = RunMetrics(command)
+    try:
+        yield metrics
+    except BaseException:
+        metrics.finish(success=False)
+        metrics.save(path)
+        raise
+    metrics.finish(success=True)
+    metrics.save(path)
 
 @cli.command(
     "create_arks", help="Creates ARKs from a CSV with Metadata"
@@ -20,12 +91,71 @@ def cli() -> None:
     help="The path to the CSV to write ARK info from EZID",
     default="output.csv",
 )
-def create_arks(input_csv, output_csv):
-    generator = EZIDARKHandler()
-    results = generator.create_batch_from_csv(
-        input_csv, output_csv
-    )
-    print(f"Processed {len(results)} records")
+@click.option(
+    "--pool_size",
+    help="Number of keep-alive connections to hold open to EZID",
+    default=10,
+    type=int,
+)
+@click.option(
+    "--workers",
+    "-w",
+    help="Number of ARKs to mint in parallel",
+    default=1,
+    type=int,
+)
+@click.option(
+    "--rate_limit",
+    help="Maximum requests per second to send to EZID (unlimited by default)",
+    type=float,
+)
+@click.option(
+    "--max_attempts",
+    help="Attempts per request when EZID throttles (429) or fails (5xx)",
+    default=5,
+    type=int,
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    help="Resume an interrupted run, skipping rows its journal shows were already minted",
+)
+@click.option(
+    "--stream",
+    is_flag=True,
+    help="Write each row to the output as soon as it is minted instead of holding the batch in memory",
+)
+@click.option(
+    "--skip_existing",
+    is_flag=True,
+    help="Don't mint rows whose target already has an ARK in the registry; reuse that ARK instead",
+)
+@registry_options
+@metrics_option
+def create_arks(input_csv, output_csv, pool_size, workers, rate_limit, max_attempts, resume, stream,
+                skip_existing, registry, no_registry, metrics_file):
+    from tamu_id_minter.ezid.ezid import EZIDARKHandler
+    if skip_existing and no_registry:
+        raise click.UsageError("--skip_existing needs the registry; drop --no_registry")
+    with run_metrics('create_arks', metrics_file) as metrics, \
+            open_registry(registry, not no_registry) as registry_db, \
+            EZIDARKHandler(pool_size=pool_size, workers=workers, rate_limit=rate_limit,
+                           max_attempts=max_attempts, registry=registry_db,
+                           skip_existing=skip_existing, metrics=metrics) as generator:
+        try:
+            if stream:
+                processed = generator.stream_batch_from_csv(
+                    input_csv, output_csv, resume=resume
+                )
+            else:
+                processed = len(generator.create_batch_from_csv(
+                    input_csv, output_csv, resume=resume
+                ))
+        except FileExistsError as e:
+            raise click.ClickException(str(e))
+    print(f"Processed {processed} records")
+    if skip_existing:
+        print(f"Skipped {generator.skipped} rows whose target already had an ARK")
 
 
 @cli.command(
@@ -37,8 +167,39 @@ def create_arks(input_csv, output_csv):
     help="The ARK as ark:/99999/fk4cz3dh0"
 )
 def get_ark(ark):
-    handler = EZIDARKHandler()
-    handler.get_ark(ark)
+    from tamu_id_minter.ezid.ezid import EZIDARKHandler
+    with EZIDARKHandler() as handler:
+        handler.get_ark(ark)
+
+@cli.command(
+    "get_arks", help="Get metadata about every ARK in a CSV"
+)
+@click.option(
+    "--input_csv",
+    "-i",
+    required=True,
+    help="The path to a CSV with an ark column",
+)
+@click.option(
+    "--output_file",
+    "-o",
+    help="Where to write the metadata: .csv or .jsonl",
+    default="metadata.csv",
+)
+@click.option(
+    "--workers",
+    "-w",
+    help="Number of ARKs to fetch in parallel",
+    default=8,
+    type=int,
+)
+@metrics_option
+def get_arks(input_csv, output_file, workers, metrics_file):
+    from tamu_id_minter.ezid.ezid import EZIDARKHandler
+    with run_metrics('get_arks', metrics_file) as metrics, \
+            EZIDARKHandler(workers=workers, metrics=metrics) as handler:
+        count = handler.get_arks(input_csv, output_file)
+    print(f"Fetched {count} records")
 
 @cli.command(
     "switch_statuses", help="Switch status for all items in a CSV"
@@ -54,9 +215,54 @@ def get_ark(ark):
     "-i",
     help="The path to the CSV including ARK metadata",
 )
-def switch_statuses(status, input_csv):
-    handler = EZIDARKHandler()
-    handler.batch_switch_status(input_csv, status)
+@click.option(
+    "--pool_size",
+    help="Number of keep-alive connections to hold open to EZID",
+    default=10,
+    type=int,
+)
+@click.option(
+    "--rate_limit",
+    help="Maximum requests per second to send to EZID (unlimited by default)",
+    type=float,
+)
+@click.option(
+    "--max_attempts",
+    help="Attempts per request when EZID throttles (429) or fails (5xx)",
+    default=5,
+    type=int,
+)
+@click.option(
+    "--output_csv",
+    "-o",
+    help="The path to write outcomes to (default: the input name with a timestamp)",
+)
+@click.option(
+    "--workers",
+    "-w",
+    help="Number of ARKs to switch in parallel",
+    default=1,
+    type=int,
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    help="Resume an interrupted run, skipping ARKs its journal shows were already switched",
+)
+@metrics_option
+def switch_statuses(status, input_csv, pool_size, rate_limit, max_attempts, output_csv, workers, resume,
+                    metrics_file):
+    from tamu_id_minter.ezid.ezid import EZIDARKHandler
+    with run_metrics('switch_statuses', metrics_file) as metrics, \
+            EZIDARKHandler(pool_size=pool_size, workers=workers, rate_limit=rate_limit,
+                           max_attempts=max_attempts, metrics=metrics) as handler:
+        try:
+            result_file = handler.batch_switch_status(
+                input_csv, status, output_csv=output_csv, resume=resume
+            )
+        except FileExistsError as e:
+            raise click.ClickException(str(e))
+    print(f"Wrote status results to {result_file}")
 
 
 @cli.command(
@@ -72,14 +278,14 @@ def switch_statuses(status, input_csv):
 @click.option(
     "--output_xml",
     "-o",
-    help="Path for output XML file (default: crossref-deposit-{type}-{timestamp}.xml)",
+    help="Path for output XML file (default: crossref-deposit-{type}-{timestamp}.xml, .txt for resource_update)",
 )
 @click.option(
     "--content_type",
     "-t",
-    type=click.Choice(['pending_publication', 'report'], case_sensitive=False),
+    type=click.Choice(['pending_publication', 'report', 'resource_update'], case_sensitive=False),
     required=True,
-    help="Type of content: pending_publication or report",
+    help="Type of content: pending_publication, report, or resource_update (a URL update file from DOI and Resource columns)",
 )
 @click.option(
     "--depositor_name",
@@ -96,20 +302,290 @@ def switch_statuses(status, input_csv):
     default="Texas A&M University",
     help="Registrant organization name",
 )
+@click.option(
+    "--compact",
+    is_flag=True,
+    help="Write the XML without indentation",
+)
+@click.option(
+    "--max_records",
+    type=int,
+    help="Split the deposit into files of at most this many records",
+)
+@click.option(
+    "--max_bytes",
+    type=int,
+    help="Split the deposit into files of at most this many bytes",
+)
+@click.option(
+    "--processes",
+    "-p",
+    default=1,
+    type=int,
+    help="Number of processes used to render records",
+)
+@click.option(
+    "--name_authority",
+    type=click.Path(exists=True, dir_okay=False),
+    help="CSV of curated contributor names (name, given_name, surname)",
+)
+@click.option(
+    "--name_cache_size",
+    default=4096,
+    type=int,
+    help="Number of parsed contributor strings to keep in memory",
+)
+@click.option(
+    "--date_order",
+    type=click.Choice(['MM/DD/YYYY', 'DD/MM/YYYY']),
+    help="Order of slash dates in the CSV (detected from the first rows by default)",
+)
+@click.option(
+    "--deposit_cache",
+    type=click.Path(dir_okay=False),
+    help="SQLite cache of each DOI's content hash and rendered record, reused for unchanged rows",
+)
+@click.option(
+    "--incremental",
+    is_flag=True,
+    help="Only deposit rows that are new or changed since they were cached (requires --deposit_cache; not for resource_update)",
+)
+@click.option(
+    "--check_registry",
+    is_flag=True,
+    help="Warn about DOIs already in an earlier generated deposit (skipped for resource_update)",
+)
+@registry_options
+@metrics_option
 def generate_crossref_deposit(input_csv, output_xml, content_type,
-                              depositor_name, depositor_email, registrant):
+                              depositor_name, depositor_email, registrant, compact,
+                              max_records, max_bytes, processes, name_authority, name_cache_size,
+                              date_order, deposit_cache, incremental, check_registry,
+                              registry, no_registry, metrics_file):
     """Generate Crossref XML deposit file from CSV metadata."""
-    handler = CrossrefDepositHandler(
-        depositor_name=depositor_name,
-        depositor_email=depositor_email,
-        registrant=registrant
-    )
-
-    result_file = handler.create_batch_from_csv(
-        input_csv,
-        output_xml,
-        content_type
-    )
-
-    print(f"Generated Crossref deposit XML: {result_file}")
-    print(f"Processed {len(handler.completed)} records")
\ No newline at end of file
+    from tamu_id_minter.crossref.crossref import CrossrefDepositHandler
+    from tamu_id_minter.crossref.fingerprints import DepositCache
+    if incremental and not deposit_cache:
+        raise click.UsageError("--incremental requires --deposit_cache")
+    if incremental and content_type == 'resource_update':
+        raise click.UsageError("--incremental can't be used with resource_update: URL update files are never confirmed")
+    if check_registry and no_registry:
+        raise click.UsageError("--check_registry needs the registry; drop --no_registry")
+    cache = DepositCache(deposit_cache) if deposit_cache else nullcontext()
+    with run_metrics('generate_crossref_deposit', metrics_file) as metrics, \
+            open_registry(registry, not no_registry) as registry_db, cache as cache_db:
+        handler = CrossrefDepositHandler(
+            depositor_name=depositor_name,
+            depositor_email=depositor_email,
+            registrant=registrant,
+            processes=processes,
+            name_authority=name_authority,
+            name_cache_size=name_cache_size,
+            date_order=date_order,
+            registry=registry_db,
+            deposit_cache=cache_db,
+            incremental=incremental,
+            check_registry=check_registry
+        )
+
+        result_file = handler.create_batch_from_csv(
+            input_csv,
+            output_xml,
+            content_type,
+            indent=None if compact else "  ",
+            max_records=max_records,
+            max_bytes=max_bytes
+        )
+
+        if metrics is not None:
+            metrics.count('rows', handler.record_count, outcome='deposited')
+            metrics.count('rows', handler.unchanged, outcome='unchanged')
+            for duplicate in handler.duplicates:
+                metrics.count('duplicates', kind=duplicate['kind'], column=duplicate['column'])
+
+        if max_records or max_bytes:
+            print(f"Generated {len(handler.deposit_files)} Crossref deposit files, manifest: {result_file}")
+        else:
+            print(f"Generated Crossref {'URL update file' if content_type == 'resource_update' else 'deposit XML'}: "
+                  f"{result_file}")
+        print(f"Processed {handler.record_count} records")
+        if incremental:
+            print(f"Skipped {handler.unchanged} unchanged records")
+        if deposit_cache:
+            print(f"Reused {handler.reused_fragments} cached records")
+        for duplicate in handler.duplicates:
+            print(f"Warning: row {duplicate['row']}: {duplicate['reason']}")
+        if processes == 1 and content_type != 'resource_update':
+            stats = handler.contributor_cache.stats()
+            print(f"Contributor cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.1%} hit rate)")
+        dates = handler.date_parser.stats()
+        if dates['conflict']:
+            print(f"Warning: the batch has dates in both MM/DD/YYYY and DD/MM/YYYY order; "
+                  f"parsed as {dates['slash_order']} (pass --date_order to choose)")
+        if dates['mismatched_rows']:
+            print(f"Warning: {dates['mismatched_rows']} rows have dates that don't fit {dates['slash_order']} "
+                  f"and were read in the other order: {', '.join(dates['mismatched_dates'])}")
+        if dates['ambiguous_rows']:
+            print(f"Warning: {dates['ambiguous_rows']} rows have dates that read as MM/DD or DD/MM, "
+                  f"parsed as {dates['slash_order'] or 'MM/DD/YYYY'} (pass --date_order to choose): "
+                  f"{', '.join(dates['ambiguous_dates'])}")
+
+@cli.command(
+    "submit_crossref_deposit",
+    help="Upload Crossref deposit files and collect per-DOI results from their submission logs"
+)
+@click.option(
+    "--input_xml",
+    "-i",
+    required=True,
+    multiple=True,
+    help="Deposit XML file, or manifest of a split deposit (repeat for several)",
+)
+@click.option(
+    "--output_csv",
+    "-o",
+    help="Path for the per-DOI results CSV (default: crossref-submission-{timestamp}.csv)",
+)
+@click.option(
+    "--workers",
+    "-w",
+    default=4,
+    type=int,
+    help="Number of files to upload and poll in parallel",
+)
+@click.option(
+    "--poll_interval",
+    default=5.0,
+    type=float,
+    help="Seconds before the first status check; doubled after each pending answer",
+)
+@click.option(
+    "--max_poll_interval",
+    default=60.0,
+    type=float,
+    help="Longest wait between two status checks",
+)
+@click.option(
+    "--max_polls",
+    default=60,
+    type=int,
+    help="Status checks per file before giving up on its submission log",
+)
+@click.option(
+    "--deposit_cache",
+    type=click.Path(dir_okay=False),
+    help="Deposit cache the files were generated with; DOIs Crossref accepts are confirmed in it",
+)
+@metrics_option
+def submit_crossref_deposit(input_xml, output_csv, workers, poll_interval, max_poll_interval, max_polls,
+                            deposit_cache, metrics_file):
+    """Submit deposits to $CROSSREF_DEPOSIT_URL with $CROSSREF_USERNAME / $CROSSREF_PASSWORD."""
+    from tamu_id_minter.crossref.fingerprints import DepositCache
+    from tamu_id_minter.crossref.submit import CrossrefSubmissionHandler
+    output_csv = output_csv or f"crossref-submission-{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    cache = DepositCache(deposit_cache) if deposit_cache else nullcontext()
+    with run_metrics('submit_crossref_deposit', metrics_file) as metrics, cache as cache_db, \
+            CrossrefSubmissionHandler(workers=workers, poll_interval=poll_interval, max_poll_interval=max_poll_interval,
+                                      max_polls=max_polls, metrics=metrics, deposit_cache=cache_db) as handler:
+        summary = handler.submit(input_xml, output_csv)
+    print(f"Wrote submission results to {output_csv}")
+    print(", ".join(f"{count} {status}" for status, count in sorted(summary.items())) or "No results")
+    if deposit_cache:
+        print(f"Confirmed {handler.confirmed} DOIs in the deposit cache")
+
+@cli.command(
+    "validate_crossref_csv",
+    help="Check every row of a Crossref metadata CSV and report all errors"
+)
+@click.option(
+    "--input_csv",
+    "-i",
+    required=True,
+    help="Path to CSV file with metadata (Title, Contributor, Acceptance date, DOI, Resource)",
+)
+@click.option(
+    "--output_csv",
+    "-o",
+    help="Path to write the error report (row, column, reason)",
+)
+@click.option(
+    "--date_order",
+    type=click.Choice(['MM/DD/YYYY', 'DD/MM/YYYY']),
+    help="Order of slash dates in the CSV (detected from the first rows by default)",
+)
+@click.option(
+    "--registry",
+    help="SQLite registry of deposited DOIs to check for duplicates",
+)
+def validate_crossref_csv(input_csv, output_csv, date_order, registry):
+    """Validate a Crossref metadata CSV without generating XML."""
+    from tamu_id_minter.crossref.crossref import CrossrefDepositHandler
+    with open_registry(registry) as registry_db:
+        handler = CrossrefDepositHandler(date_order=date_order, registry=registry_db)
+        errors = handler.validate_csv(input_csv)
+    if output_csv:
+        handler.save_validation_report(errors, output_csv)
+        print(f"Wrote validation report to {output_csv}")
+    else:
+        for error in errors:
+            print(f"Row {error['row']}, {error['column']}: {error['reason']}")
+    if errors:
+        raise click.ClickException(f"{len(errors)} errors found in {handler.validated_rows} rows")
+    print(f"Validated {handler.validated_rows} rows: no errors found")
+
+@cli.command(
+    "seed_registry",
+    help="Add the ARKs in past create_arks output CSVs to the local registry"
+)
+@click.option(
+    "--input_csv",
+    "-i",
+    required=True,
+    multiple=True,
+    help="Output CSV of an earlier create_arks run (repeat for several)",
+)
+@click.option(
+    "--registry",
+    default=default_registry_path,
+    show_default="$TAMU_ID_REGISTRY or ~/.tamu_id_minter/identifiers.sqlite3",
+    help="SQLite registry to add the ARKs to",
+)
+def seed_registry(input_csv, registry):
+    from tamu_id_minter.registry import IdentifierRegistry
+    with IdentifierRegistry(registry) as registry_db:
+        for path in input_csv:
+            added = registry_db.seed_from_csv(path)
+            print(f"Added {added} ARKs from {path}")
+
+@cli.command(
+    "lookup",
+    help="Look up identifiers in the local registry by ARK, DOI, target URL or batch"
+)
+@click.option("--ark", help="ARK to look up (with or without https://n2t.net/)")
+@click.option("--doi", help="DOI to look up")
+@click.option("--target", help="Target or resource URL to find identifiers for")
+@click.option("--batch", help="Output CSV or doi_batch_id to list the identifiers of")
+@click.option(
+    "--registry",
+    default=default_registry_path,
+    show_default="$TAMU_ID_REGISTRY or ~/.tamu_id_minter/identifiers.sqlite3",
+    help="SQLite registry to search",
+)
+def lookup(ark, doi, target, batch, registry):
+    """Answer "do we already have an identifier for this?" from the local registry."""
+    from tamu_id_minter.registry import IdentifierRegistry
+    queries = [
+        ('identifier', ark.replace("https://n2t.net/", "") if ark else None),
+        ('identifier', doi),
+        ('target', target),
+        ('batch', batch),
+    ]
+    queries = [(column, value) for column, value in queries if value]
+    if len(queries) != 1:
+        raise click.UsageError("Give exactly one of --ark, --doi, --target or --batch")
+    with IdentifierRegistry(registry) as registry_db:
+        entries = registry_db.find(*queries[0])
+    for entry in entries:
+        print(f"{entry['identifier']}\t{entry['target'] or ''}\t{entry['batch'] or ''}\t{entry['recorded']}")
+    if not entries:
+        raise click.ClickException("No identifiers found")
@@ -0,0 +1,159 @@
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def build_session(pool_size=10, max_retries=3, keep_alive=True):
+    """Build a pooled requests session shared by every call a handler makes.
+
+    Args:
+        pool_size (int): Number of connections kept open per host
+        max_retries (int): Connection-level retries performed by the adapter
+        keep_alive (bool): Reuse connections between requests (close them when False)
+
+    Returns:
+        requests.Session: Session with an HTTP(S) adapter mounted
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=max_retries,
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    if not keep_alive:
+        session.headers['Connection'] = 'close'
+    return session
+
+
+class RateLimiter:
+    """Thread-safe token bucket shared by every worker of a handler.
+
+    The bucket refills at the current rate. When the server throttles us,
+    ``penalize`` halves that rate; each success then adds back a small
+    step until the configured ceiling is reached again.
+    """
+
+    def __init__(self, rate, burst=None, min_rate=0.5):
+        """Initialize the bucket.
+
+        Args:
+            rate (float): Maximum requests per second
+            burst (int): Tokens that can be spent at once (defaults to one second of traffic)
+            min_rate (float): Floor the adaptive rate never drops below
+        """
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.min_rate = min(float(min_rate), self.max_rate)
+        self.capacity = float(burst or max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """Take a token and return how many seconds the caller must wait before using it."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def try_acquire(self):
+        """Take a token if one is available right now, without going into debt.
+
+        Returns:
+            bool: True when a token was taken
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+    def acquire(self):
+        """Block until a token is available."""
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+
+    def penalize(self):
+        """Halve the rate after the server throttled a request."""
+        with self.lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+
+    def reward(self):
+        """Creep the rate back toward the ceiling after a successful request."""
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter for throttled and failing requests."""
+
+    RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+    THROTTLE_STATUSES = frozenset({429, 503})
+
+    def __init__(self, max_attempts=5, base_delay=0.5, max_delay=60.0):
+        """Initialize the policy.
+
+        Args:
+            max_attempts (int): Total attempts per request, including the first
+            base_delay (float): Delay ceiling in seconds for the first retry
+            max_delay (float): Upper bound on any single delay, Retry-After included
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def should_retry(self, status_code):
+        """Return True when a response status is worth retrying."""
+        return status_code in self.RETRY_STATUSES
+
+    def is_throttled(self, status_code):
+        """Return True when a response status means the server wants us to slow down."""
+        return status_code in self.THROTTLE_STATUSES
+
+    def delay(self, attempt, retry_after=None):
+        """Seconds to wait before the next attempt.
+
+        Args:
+            attempt (int): Zero-based number of the attempt that just failed
+            retry_after (str): Value of the Retry-After header, if any
+
+        Returns:
+            float: Delay in seconds
+        """
+        backoff = random.uniform(0, self.base_delay * (2 ** attempt))
+        return min(self.max_delay, max(backoff, parse_retry_after(retry_after)))
+
+
+def parse_retry_after(value):
+    """Parse a Retry-After header given in seconds or as an HTTP date.
+
+    Returns:
+        float: Seconds to wait, or 0.0 when the header is missing or unreadable
+    """
+    if not value:
+        return 0.0
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return 0.0
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
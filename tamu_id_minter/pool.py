@@ -0,0 +1,44 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+
+
+def chunked(items, size):
+    """Lazily group items into lists of at most size items."""
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def ordered_map(fn, items, workers=1, window=None, processes=False):
+    """Lazily apply a function to items on a thread pool, yielding results in input order.
+
+    Only ``window`` items are in flight at once, so memory stays flat however
+    long ``items`` is and the input is never read further ahead than needed.
+
+    Args:
+        fn (callable): Function to call with each item
+        items (iterable): Items to process, consumed lazily
+        workers (int): Number of threads (1 runs everything in the calling thread)
+        window (int): Maximum items submitted but not yet yielded (defaults to twice the workers)
+        processes (bool): Use a process pool instead of threads, for CPU-bound work
+            (fn and the items must then be picklable)
+
+    Yields:
+        The result of fn for each item, in the order the items were read
+    """
+    if workers <= 1:
+        for item in items:
+            yield fn(item)
+        return
+
+    window = window or workers * 2
+    executor_class = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    with executor_class(max_workers=workers) as executor:
+        pending = deque()
+        for item in items:
+            pending.append(executor.submit(fn, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
@@ -0,0 +1,185 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# Timer the handlers report their stages to; None unless a command runs with --profile
+_active = None
+
+
+class _NullStage:
+    """Context manager that does nothing, returned by stage when profiling is off."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+NULL_STAGE = _NullStage()
+
+
+def stage(name):
+    """Time a block as a pipeline stage when profiling is on.
+
+    Example:
+        >>> with stage('http'):
+        ...     response = session.post(url, data=data)
+    """
+    timer = _active
+    return NULL_STAGE if timer is None else timer.stage(name)
+
+
+def timed_iter(name, iterable):
+    """Time every step of an iterable as a pipeline stage when profiling is on."""
+    timer = _active
+    return iterable if timer is None else timer.wrap(name, iterable)
+
+
+class StageTimer:
+    """Accumulate the time spent in each named pipeline stage.
+
+    Stages nest: time spent in an inner stage is not counted again in the
+    stage around it, so the totals add up to the time actually timed. Each
+    thread keeps its own stack and totals, so timing worker threads needs
+    no locking; with several workers, stage totals can exceed wall time.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.local = threading.local()
+        self.thread_totals = []
+        self.lock = threading.Lock()
+
+    def state(self):
+        """Return this thread's stage stack and totals, creating them on first use."""
+        local = self.local
+        if not hasattr(local, 'stack'):
+            local.stack = []
+            local.totals = {}
+            with self.lock:
+                self.thread_totals.append(local.totals)
+        return local.stack, local.totals
+
+    def charge(self, totals, name, seconds, calls=0):
+        entry = totals.get(name)
+        if entry is None:
+            entry = totals[name] = [0, 0.0]
+        entry[0] += calls
+        entry[1] += seconds
+
+    @contextmanager
+    def stage(self, name):
+        """Time a block as the stage name, pausing the stage it runs inside."""
+        stack, totals = self.state()
+        now = time.perf_counter()
+        if stack:
+            parent = stack[-1]
+            self.charge(totals, parent[0], now - parent[1])
+        frame = [name, now]
+        stack.append(frame)
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            stack.pop()
+            self.charge(totals, name, now - frame[1], calls=1)
+            if stack:
+                stack[-1][1] = now
+
+    def wrap(self, name, iterable):
+        """Yield from an iterable, timing each step as the stage name."""
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def totals(self):
+        """Return {stage: (calls, seconds)} summed over every thread."""
+        merged = {}
+        with self.lock:
+            for totals in self.thread_totals:
+                for name, (calls, seconds) in list(totals.items()):
+                    entry = merged.setdefault(name, [0, 0.0])
+                    entry[0] += calls
+                    entry[1] += seconds
+        return {name: tuple(entry) for name, entry in merged.items()}
+
+    def report(self):
+        """Return the stage breakdown as a table, slowest stage first."""
+        wall = time.perf_counter() - self.started
+        lines = [f"{'Stage':<20} {'Calls':>9} {'Seconds':>10} {'% wall':>7}"]
+        for name, (calls, seconds) in sorted(self.totals().items(), key=lambda item: -item[1][1]):
+            lines.append(f"{name:<20} {calls:>9} {seconds:>10.3f} {seconds / wall if wall else 0:>7.1%}")
+        lines.append(f"{'wall':<20} {'':>9} {wall:>10.3f}")
+        return "\n".join(lines)
+
+
+class Profiler:
+    """Stage timers for one command, with optional cProfile and tracemalloc.
+
+    Start it before the command runs and call finish when it exits. cProfile
+    only sees the thread that started it, so worker threads show up as time
+    spent waiting on their results.
+    """
+
+    def __init__(self, stats_file=None, trace_memory=False, top_allocations=10):
+        """Configure the profiler.
+
+        Args:
+            stats_file (str): Where to dump cProfile statistics (not profiled when None)
+            trace_memory (bool): Trace allocations and report the peak and the largest allocation sites
+            top_allocations (int): Allocation sites to list with trace_memory
+        """
+        self.stats_file = stats_file
+        self.trace_memory = trace_memory
+        self.top_allocations = top_allocations
+        self.timer = None
+        self.profile = None
+
+    def start(self):
+        """Install the stage timer and start the optional profilers."""
+        global _active
+        self.timer = StageTimer()
+        _active = self.timer
+        if self.trace_memory:
+            import tracemalloc
+            tracemalloc.start()
+        if self.stats_file:
+            import cProfile
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        return self
+
+    def finish(self):
+        """Stop profiling and print the stage breakdown and memory peak."""
+        global _active
+        if self.profile is not None:
+            self.profile.disable()
+        _active = None
+
+        print("Stage timings:")
+        print(self.timer.report())
+
+        if self.profile is not None:
+            self.profile.dump_stats(self.stats_file)
+            print(f"Wrote cProfile stats to {self.stats_file} (view with: python -m pstats {self.stats_file})")
+
+        if self.trace_memory:
+            import tracemalloc
+            _, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+                tracemalloc.Filter(False, "*/cProfile.py"),
+                tracemalloc.Filter(False, tracemalloc.__file__),
+            ])
+            tracemalloc.stop()
+            print(f"Peak traced memory: {peak / 1024 / 1024:.1f} MiB")
+            print("Largest allocations still held at exit:")
+            for statistic in snapshot.statistics('lineno')[:self.top_allocations]:
+                print(f"  {statistic}")
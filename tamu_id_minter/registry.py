@@ -0,0 +1,188 @@
+import csv
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS identifiers (
+    identifier TEXT PRIMARY KEY,
+    scheme TEXT NOT NULL,
+    target TEXT,
+    batch TEXT,
+    recorded TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS identifiers_target ON identifiers (target);
+CREATE INDEX IF NOT EXISTS identifiers_batch ON identifiers (batch);
+"""
+
+# Columns identifiers can be looked up by, each backed by an index
+LOOKUP_COLUMNS = ['identifier', 'target', 'batch']
+
+
+def default_registry_path():
+    """Registry used by the CLI: $TAMU_ID_REGISTRY, or identifiers.sqlite3 under ~/.tamu_id_minter."""
+    return os.getenv(
+        'TAMU_ID_REGISTRY',
+        os.path.join(os.path.expanduser('~'), '.tamu_id_minter', 'identifiers.sqlite3')
+    )
+
+
+# Resolver prefixes a DOI may be written with in a spreadsheet
+DOI_PREFIXES = ('https://doi.org/', 'http://doi.org/')
+
+
+def strip_doi_prefix(doi):
+    """Return a DOI without surrounding whitespace or a leading https://doi.org/ resolver prefix."""
+    doi = doi.strip()
+    for prefix in DOI_PREFIXES:
+        if doi.lower().startswith(prefix):
+            return doi[len(prefix):].strip()
+    return doi
+
+
+def normalize_identifier(identifier, scheme):
+    """Return the form an identifier is stored under; DOIs lose any resolver prefix and are case-insensitive."""
+    if scheme == 'doi':
+        return strip_doi_prefix(identifier).lower()
+    return identifier.strip()
+
+
+class IdentifierRegistry:
+    """Local SQLite registry of minted ARKs and deposited DOIs.
+
+    The connection is opened on first use. Writes made with add are held in
+    a transaction until commit, so a failed batch can be rolled back.
+    """
+
+    def __init__(self, path):
+        """Initialize the registry.
+
+        Args:
+            path (str): Path of the SQLite database, created if missing
+        """
+        self.path = path
+        self.connection = None
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        self.close()
+
+    def connect(self):
+        """Return the open connection, creating the database schema on first use."""
+        if self.connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.connection = sqlite3.connect(self.path, check_same_thread=False)
+            self.connection.executescript(SCHEMA)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+        return self.connection
+
+    def add(self, identifier, scheme, target=None, batch=None):
+        """Record an identifier, replacing any earlier entry for it.
+
+        Args:
+            identifier (str): The ARK or DOI
+            scheme (str): 'ark' or 'doi'
+            target (str): Target or resource URL the identifier resolves to
+            batch (str): Output file or doi_batch_id the identifier was created in
+        """
+        recorded = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        with self.lock:
+            self.connect().execute(
+                "INSERT OR REPLACE INTO identifiers VALUES (?, ?, ?, ?, ?)",
+                (normalize_identifier(identifier, scheme), scheme, target, batch, recorded)
+            )
+
+    def commit(self):
+        if self.connection is not None:
+            with self.lock:
+                self.connection.commit()
+
+    def rollback(self):
+        if self.connection is not None:
+            with self.lock:
+                self.connection.rollback()
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def get(self, identifier, scheme='doi'):
+        """Return the registry entry for an identifier, or None."""
+        with self.lock:
+            cursor = self.connect().execute(
+                "SELECT * FROM identifiers WHERE identifier = ?",
+                (normalize_identifier(identifier, scheme),)
+            )
+            row = cursor.fetchone()
+            return self.as_dict(cursor, row) if row else None
+
+    def contains(self, identifier, scheme='doi'):
+        """Return True if the identifier has been recorded."""
+        return self.get(identifier, scheme) is not None
+
+    def find(self, column, value):
+        """Return every entry whose identifier, target or batch equals value.
+
+        Args:
+            column (str): One of identifier, target or batch
+            value (str): Value to match; identifiers match ARKs exactly and DOIs in any case
+
+        Returns:
+            list[dict]: Matching entries, oldest first
+        """
+        if column not in LOOKUP_COLUMNS:
+            raise ValueError(f"Invalid lookup column: {column}. Must be one of {', '.join(LOOKUP_COLUMNS)}")
+        values = [value.strip()]
+        if column == 'identifier':
+            values.append(normalize_identifier(value, 'doi'))
+        placeholders = ",".join("?" * len(values))
+        with self.lock:
+            cursor = self.connect().execute(
+                f"SELECT * FROM identifiers WHERE {column} IN ({placeholders}) ORDER BY recorded, rowid",
+                values
+            )
+            return [self.as_dict(cursor, row) for row in cursor.fetchall()]
+
+    def ark_for_target(self, target):
+        """Return the first ARK recorded for a target URL, or None."""
+        with self.lock:
+            row = self.connect().execute(
+                "SELECT identifier FROM identifiers WHERE target = ? AND scheme = 'ark' "
+                "ORDER BY recorded, rowid LIMIT 1",
+                (target.strip(),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def seed_from_csv(self, path):
+        """Record the ARKs in an output CSV of create_arks (ark and where columns), filed under its path.
+
+        Targets that already have an ARK in the registry keep it.
+
+        Returns:
+            int: Number of ARKs added
+        """
+        added = 0
+        with open(path, 'r', newline='') as csvfile:
+            for row in csv.DictReader(csvfile):
+                ark = (row.get('ark') or '').replace("https://n2t.net/", "").strip()
+                target = (row.get('where') or '').strip()
+                if ark and not self.contains(ark, 'ark') and (not target or not self.ark_for_target(target)):
+                    self.add(ark, 'ark', target or None, path)
+                    added += 1
+        self.commit()
+        return added
+
+    @staticmethod
+    def as_dict(cursor, row):
+        return {column[0]: value for column, value in zip(cursor.description, row)}
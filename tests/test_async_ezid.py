@@ -0,0 +1,173 @@
+import asyncio
+import csv
+import os
+import tempfile
+import unittest
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+from tamu_id_minter.ezid.async_ezid import AsyncEZIDARKHandler, async_ordered_map
+
+
+@unittest.skipIf(httpx is None, "httpx is not installed")
+class TestAsyncEZID(unittest.IsolatedAsyncioTestCase):
+
+    ''' Testcases for the asyncio EZID handler. '''
+
+    def make_handler(self, handler_fn, **kwargs):
+        self.requests_seen = []
+
+        def record(request):
+            self.requests_seen.append(request)
+            return handler_fn(request)
+
+        return AsyncEZIDARKHandler(transport=httpx.MockTransport(record), **kwargs)
+
+    # -------------------------------------- #
+
+    async def test_create_ark_success(self):
+        '''
+        Test that an ARK is created through the async client.
+        The request body must be the same ANVL the sync handler sends.
+        '''
+        handler = self.make_handler(lambda request: httpx.Response(201, content=b'success: ark:/81423/d2tg6j'))
+
+        async with handler:
+            result = await handler.create_ark("Dummy name", "Dummy title", "2025", "http://example.com/resource")
+
+        self.assertEqual(result['ark'], 'https://n2t.net/ark:/81423/d2tg6j')
+        self.assertEqual(self.requests_seen[0].method, 'POST')
+        self.assertIn(b"_target: http://example.com/resource", self.requests_seen[0].content)
+
+    # -------------------------------------- #
+
+    async def test_switch_status(self):
+        '''
+        Test that status changes parse success and failure responses like the sync handler.
+        '''
+        def respond(request):
+            if request.url.path.endswith('good'):
+                return httpx.Response(200, content=b'success: ark:/81423/good')
+            return httpx.Response(400, content=b'error: bad request')
+
+        async with self.make_handler(respond) as handler:
+            good = await handler.switch_status("ark:/81423/good", "public")
+            bad = await handler.switch_status("ark:/81423/bad", "public")
+
+        self.assertEqual(good, (True, "ark:/81423/good status successfully changed to public"))
+        self.assertEqual(bad, (False, "ark:/81423/bad status failed with 400"))
+        self.assertEqual(self.requests_seen[0].content, b'_status: public\n')
+
+    # -------------------------------------- #
+
+    async def test_create_batch_from_csv_keeps_order_and_isolates_errors(self):
+        '''
+        Test that a batch mints every row, keeps input order and records transport errors.
+        '''
+        def respond(request):
+            if b'/3\n' in request.content:
+                raise httpx.ConnectError("connection refused", request=request)
+            target = request.content.decode().split('_target: ')[1].split('\n')[0]
+            return httpx.Response(201, content=f"success: ark:/81423/{target[-1]}".encode())
+
+        with tempfile.TemporaryDirectory() as tmp:
+            input_csv = os.path.join(tmp, 'input.csv')
+            output_csv = os.path.join(tmp, 'output.csv')
+            with open(input_csv, 'w') as f:
+                f.write("who,what,when,where\n")
+                for i in range(6):
+                    f.write(f"Name {i},Doc {i},2025,http://example.com/{i}\n")
+
+            async with self.make_handler(respond, max_in_flight=2, max_attempts=1) as handler:
+                results = await handler.create_batch_from_csv(input_csv, output_csv)
+
+            self.assertTrue(os.path.exists(output_csv))
+
+        self.assertEqual([r['where'][-1] for r in results], list("012345"))
+        self.assertEqual(results[3]['ark'], "")
+        self.assertIn("connection refused", results[3]['message'])
+        self.assertEqual(results[5]['ark'], 'https://n2t.net/ark:/81423/5')
+
+
+    # -------------------------------------- #
+
+    async def test_skip_existing_mints_repeated_targets_once(self):
+        '''
+        Test that with skip_existing concurrent rows sharing a target wait for the first one's ARK.
+        '''
+        def respond(request):
+            who = request.content.decode().split('erc.who: ')[1].split('\n')[0]
+            return httpx.Response(201, content=f"success: ark:/81423/{who[-1]}".encode())
+
+        with tempfile.TemporaryDirectory() as tmp:
+            input_csv = os.path.join(tmp, 'input.csv')
+            with open(input_csv, 'w') as f:
+                f.write("who,what,when,where\n")
+                for i, target in enumerate(['a', 'a', 'b', 'a']):
+                    f.write(f"Name {i},Doc {i},2025,http://example.com/{target}\n")
+
+            async with self.make_handler(respond, max_in_flight=4, skip_existing=True) as handler:
+                results = await handler.create_batch_from_csv(input_csv, os.path.join(tmp, 'output.csv'))
+
+        self.assertEqual(len(self.requests_seen), 2)
+        self.assertEqual([r['ark'][-1] for r in results], ['0', '0', '2', '0'])
+        self.assertEqual(handler.skipped, 2)
+
+    # -------------------------------------- #
+
+    async def test_async_ordered_map_bounds_tasks_and_reads_lazily(self):
+        '''
+        Test that only a window of tasks is alive at once and input is read just ahead of the results.
+        '''
+        read = []
+        alive = 0
+        most_alive = 0
+
+        def items():
+            for i in range(50):
+                read.append(i)
+                yield i
+
+        async def work(i):
+            nonlocal alive, most_alive
+            alive += 1
+            most_alive = max(most_alive, alive)
+            await asyncio.sleep(0.001 * (i % 3))
+            alive -= 1
+            return i * 2
+
+        results = []
+        async for result in async_ordered_map(work, items(), window=4):
+            results.append(result)
+            self.assertLessEqual(len(read), len(results) + 4)
+
+        self.assertEqual(results, [i * 2 for i in range(50)])
+        self.assertLessEqual(most_alive, 4)
+
+    # -------------------------------------- #
+
+    async def test_batch_switch_status_streams_outcomes_in_order(self):
+        '''
+        Test that a status batch writes every outcome in input order.
+        '''
+        with tempfile.TemporaryDirectory() as tmp:
+            input_csv = os.path.join(tmp, 'arks.csv')
+            with open(input_csv, 'w') as f:
+                f.write("ark\n")
+                for i in range(30):
+                    f.write(f"https://n2t.net/ark:/81423/d{i}\n")
+
+            async with self.make_handler(lambda request: httpx.Response(200, content=b'success: ok'),
+                                         max_in_flight=3) as handler:
+                output_csv = await handler.batch_switch_status(input_csv, 'public', os.path.join(tmp, 'out.csv'))
+            with open(output_csv, newline='') as f:
+                rows = list(csv.DictReader(f))
+
+        self.assertEqual([row['Message'].split(' ')[0] for row in rows], [f"ark:/81423/d{i}" for i in range(30)])
+        self.assertEqual({row['Success'] for row in rows}, {'True'})
+
+if __name__ == '__main__':
+    unittest.main()
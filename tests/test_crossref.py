@@ -1,3 +1,6 @@
+import json
+import os
+import tempfile
 import unittest
 from xml.etree import ElementTree as ET
 from unittest.mock import Mock, patch, mock_open
@@ -5,9 +8,14 @@ from tamu_id_minter.crossref.crossref import (
     CrossrefDepositHandler
 )
 
+from tamu_id_minter.crossref.fingerprints import DepositCache, fingerprint
+from tamu_id_minter.crossref.dates import DateParser, DAY_FIRST, MONTH_FIRST
+from tamu_id_minter.crossref.names import ContributorCache
+from tamu_id_minter.registry import IdentifierRegistry
 from tamu_id_minter.crossref.templates import (
     PendingPublicationTemplate,
-    ReportTemplate
+    ReportTemplate,
+    ResourceUpdateTemplate
 )
 
 class TestCrossref(unittest.TestCase):
@@ -240,12 +248,10 @@ class TestCrossref(unittest.TestCase):
 
     def test_create_batch_from_csv_full_flow(self):
         with patch.object(
-            self.handler, "process_csv", return_value=[{"id": 1}]
-        ) as mock_process, patch.object(
-            self.handler, "generate_deposit_xml", return_value="<xml />"
-        ) as mock_generate, patch.object(
-            self.handler, "save_xml"
-        ) as mock_save:
+            self.handler, "iter_csv", return_value=iter([{"id": 1}])
+        ) as mock_iter, patch.object(
+            self.handler, "write_deposit_xml", return_value=1
+        ) as mock_write:
             
             result = self.handler.create_batch_from_csv(
                 input_file="input.csv",
@@ -254,9 +260,11 @@ class TestCrossref(unittest.TestCase):
             )
 
         self.assertEqual(result, "out.xml")
-        mock_process.assert_called_once()
-        mock_generate.assert_called_once()
-        mock_save.assert_called_once()
+        self.assertEqual(self.handler.record_count, 1)
+        mock_iter.assert_called_once_with("input.csv", "report")
+        mock_write.assert_called_once()
+        self.assertEqual(mock_write.call_args[0][0], "report")
+        self.assertEqual(mock_write.call_args[0][2], "out.xml")
 
     # -------------------------------------- #
 
@@ -266,12 +274,10 @@ class TestCrossref(unittest.TestCase):
         mock_datetime.now.return_value.strftime.return_value = "20260105_123456"
 
         with patch.object(
-            self.handler, "process_csv", return_value=[{"id": 1}]
-        ) as mock_process, patch.object(
-            self.handler, "generate_deposit_xml", return_value="<xml />"
-        ) as mock_generate, patch.object(
-            self.handler, "save_xml"
-        ) as mock_save, patch(
+            self.handler, "iter_csv", return_value=iter([{"id": 1}])
+        ) as mock_iter, patch.object(
+            self.handler, "write_deposit_xml", return_value=1
+        ) as mock_write, patch(
             "tamu_id_minter.crossref.crossref.datetime"
         ) as mock_datetime:
 
@@ -285,9 +291,642 @@ class TestCrossref(unittest.TestCase):
 
         expected_filename = "crossref-deposit-pending_publication-20260105_123456.xml"
         self.assertEqual(result, expected_filename)
-        mock_process.assert_called_once()
-        mock_generate.assert_called_once()
-        mock_save.assert_called_once()
+        mock_iter.assert_called_once()
+        mock_write.assert_called_once()
+        self.assertEqual(mock_write.call_args[0][2], expected_filename)
     
+    # ---------------- TESTING SPLIT DEPOSITS ---------------------- #
+
+    def write_sample_csv(self, path, rows):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("Title,Contributor,Acceptance date,DOI,Resource\n")
+            for i in range(rows):
+                f.write(f"Title {i},Jane Doe,2025-01-01,10.1234/example.{i},https://example.com/{i}\n")
+
+    def test_split_by_max_records(self):
+        '''
+        Test that max_records splits the deposit into complete files with unique batch IDs and a manifest.
+        '''
+        with tempfile.TemporaryDirectory() as tmp:
+            input_csv = os.path.join(tmp, 'input.csv')
+            self.write_sample_csv(input_csv, 7)
+
+            manifest_file = self.handler.create_batch_from_csv(
+                input_csv, os.path.join(tmp, 'deposit.xml'), 'report', max_records=3
+            )
+
+            with open(manifest_file) as f:
+                manifest = json.load(f)
+            roots = [ET.parse(part['file']).getroot() for part in manifest['files']]
+
+        ns = {'cr': 'http://www.crossref.org/schema/5.4.0'}
+        self.assertEqual(manifest_file, os.path.join(tmp, 'deposit-manifest.json'))
+        self.assertEqual(manifest['records'], 7)
+        self.assertEqual(self.handler.record_count, 7)
+        self.assertEqual([(p['first_record'], p['last_record'], p['records']) for p in manifest['files']],
+                         [(1, 3, 3), (4, 6, 3), (7, 7, 1)])
+        self.assertEqual([os.path.basename(p['file']) for p in manifest['files']],
+                         ['deposit-001.xml', 'deposit-002.xml', 'deposit-003.xml'])
+        batch_ids = [root.find('cr:head/cr:doi_batch_id', ns).text for root in roots]
+        self.assertEqual(len(set(batch_ids)), 3)
+        self.assertTrue(batch_ids[0].endswith('-001'))
+        self.assertEqual([len(root.findall('cr:body/cr:report-paper', ns)) for root in roots], [3, 3, 1])
+
+    # -------------------------------------- #
+
+    def test_split_by_max_bytes(self):
+        '''
+        Test that max_bytes keeps every file under the limit, as reported in the manifest.
+        '''
+        with tempfile.TemporaryDirectory() as tmp:
+            input_csv = os.path.join(tmp, 'input.csv')
+            self.write_sample_csv(input_csv, 20)
+
+            files = self.handler.write_split_deposits(
+                'pending_publication', self.handler.iter_csv(input_csv),
+                os.path.join(tmp, 'deposit.xml'), max_bytes=4000
+            )
+            sizes = [os.path.getsize(part['file']) for part in files]
+
+        self.assertGreater(len(files), 1)
+        self.assertEqual(sum(part['records'] for part in files), 20)
+        self.assertEqual(sizes, [part['bytes'] for part in files])
+        self.assertTrue(all(size <= 4000 for size in sizes))
+
+    # -------------------------------------- #
+
+    def test_process_pool_output_matches_single_process(self):
+        '''
+        Test that rendering in worker processes produces the same records in the same order.
+        '''
+        with tempfile.TemporaryDirectory() as tmp:
+            input_csv = os.path.join(tmp, 'input.csv')
+            self.write_sample_csv(input_csv, 25)
+            template = self.handler.create_template('report')
+
+            serial = list(self.handler.iter_fragments(template, 'report', self.handler.iter_csv(input_csv)))
+            pooled_handler = CrossrefDepositHandler(processes=2, chunk_size=4)
+            pooled = list(pooled_handler.iter_fragments(template, 'report', pooled_handler.iter_csv(input_csv)))
+
+        self.assertEqual(len(serial), 25)
+        self.assertEqual(pooled, serial)
+
+    # -------------------------------------- #
+
+    def test_contributor_cache_reuses_parsed_names(self):
+        '''
+        Test that repeated contributor strings are answered from the cache without sharing mutable lists.
+        '''
+        template = self.handler.create_template('report')
+        first = template.parse_contributors('Smith, John and Jane  Doe')
+        first.append(('Extra', 'Name'))
+        second = template.parse_contributors('Smith, John and Jane Doe')
+
+        self.assertEqual(second, [('John', 'Smith'), ('Jane', 'Doe')])
+        self.assertEqual(self.handler.contributor_cache.hits, 1)
+        self.assertEqual(self.handler.contributor_cache.misses, 1)
+
+    # -------------------------------------- #
+
+    def test_contributor_cache_parses_normalized_string(self):
+        '''
+        Test that a string whose separator is only whitespace-equivalent parses the same whichever spelling comes first.
+        '''
+        template = self.handler.create_template('report')
+        first = template.parse_contributors('Jane Doe and\tJohn Roe')
+        second = template.parse_contributors('Jane Doe and John Roe')
+
+        self.assertEqual(first, [('Jane', 'Doe'), ('John', 'Roe')])
+        self.assertEqual(second, first)
+
+    # -------------------------------------- #
+
+    def test_contributor_cache_is_bounded(self):
+        '''
+        Test that the least recently used contributor string is evicted once the cache is full.
+        '''
+        cache = ContributorCache(maxsize=2)
+        cache.put('a', [('A', 'A')])
+        cache.put('b', [('B', 'B')])
+        cache.get('a')
+        cache.put('c', [('C', 'C')])
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), (('A', 'A'),))
+        self.assertEqual(len(cache.entries), 2)
+
+    # -------------------------------------- #
+
+    def test_name_authority_overrides_default_split(self):
+        '''
+        Test that curated names from an authority file replace the "First Last" guess.
+        '''
+        with tempfile.TemporaryDirectory() as tmp:
+            authority = os.path.join(tmp, 'names.csv')
+            with open(authority, 'w', encoding='utf-8') as f:
+                f.write('name,given_name,surname\nMaria de la Cruz,Maria,de la Cruz\n')
+            handler = CrossrefDepositHandler(name_authority=authority)
+            template = handler.create_template('pending_publication')
+            contributors = template.parse_contributors('Maria de la Cruz and Bob Jones')
+
+            exported = os.path.join(tmp, 'exported.csv')
+            template.parse_contributors('Ann Lee')
+            handler.contributor_cache.save_authority(exported)
+            reloaded = ContributorCache(authority_file=exported)
+
+        self.assertEqual(contributors, [('Maria', 'de la Cruz'), ('Bob', 'Jones')])
+        self.assertEqual(reloaded.lookup_authority('Maria de la Cruz'), ('Maria', 'de la Cruz'))
+        self.assertEqual(reloaded.lookup_authority('Ann Lee'), ('Ann', 'Lee'))
+
+    # -------------------------------------- #
+
+    def test_date_parser_formats(self):
+        '''
+        Test that the supported date formats parse to unpadded (month, day, year) strings.
+        '''
+        parser = DateParser()
+
+        self.assertEqual(parser.parse('2025-01-05'), ('1', '5', '2025'))
+        self.assertEqual(parser.parse(' 2025/12/31 '), ('12', '31', '2025'))
+        self.assertEqual(parser.parse('12/25/2025'), ('12', '25', '2025'))
+        self.assertEqual(parser.parse('25/12/2025'), ('12', '25', '2025'))
+        for bad in ['2025-02-30', 'January 5, 2025', '']:
+            with self.assertRaises(ValueError) as context:
+                parser.parse(bad)
+            self.assertIn('Unable to parse date', str(context.exception))
+
+    # -------------------------------------- #
+
+    def test_date_parser_detects_day_first_batches(self):
+        '''
+        Test that a batch proven to be DD/MM reads ambiguous dates day first and does not report them.
+        '''
+        parser = DateParser()
+        rows = [{'acceptance_date': '25/12/2025'}, {'acceptance_date': '03/04/2025'}]
+
+        self.assertEqual(list(parser.detect(iter(rows))), rows)
+        self.assertEqual(parser.slash_order, DAY_FIRST)
+        self.assertEqual(parser.parse('03/04/2025'), ('4', '3', '2025'))
+        self.assertEqual(parser.stats()['ambiguous_rows'], 0)
+
+    # -------------------------------------- #
+
+    def test_date_parser_reports_ambiguous_dates(self):
+        '''
+        Test that ambiguous dates in an undecided batch are read month first and counted per row.
+        '''
+        parser = DateParser()
+        list(parser.detect([{'acceptance_date': '03/04/2025'}]))
+
+        self.assertIsNone(parser.slash_order)
+        self.assertEqual(parser.parse('03/04/2025'), ('3', '4', '2025'))
+        parser.parse('03/04/2025')
+        parser.parse('05/05/2025')
+        self.assertEqual(parser.stats()['ambiguous_rows'], 2)
+        self.assertEqual(parser.stats()['ambiguous_dates'], ['03/04/2025'])
+        self.assertEqual(DateParser(slash_order=MONTH_FIRST).parse('13/04/2025'), ('4', '13', '2025'))
+
+    # -------------------------------------- #
+
+    def test_date_parser_reports_conflicting_orders(self):
+        '''
+        Test that a batch with dates proving both orders is a conflict and rows read against the detected order are counted.
+        '''
+        parser = DateParser()
+        rows = [{'acceptance_date': '05/14/2024'}, {'acceptance_date': '06/15/2024'}, {'acceptance_date': '13/05/2024'}]
+        list(parser.detect(rows))
+
+        self.assertEqual(parser.slash_order, MONTH_FIRST)
+        for row in rows:
+            parser.parse(row['acceptance_date'])
+        self.assertEqual(parser.parse('13/05/2024'), ('5', '13', '2024'))
+        parser.parse('03/04/2024')
+        stats = parser.stats()
+
+        self.assertTrue(stats['conflict'])
+        self.assertEqual(stats['mismatched_rows'], 2)
+        self.assertEqual(stats['mismatched_dates'], ['13/05/2024'])
+        self.assertEqual(stats['ambiguous_dates'], ['03/04/2024'])
+
+    # -------------------------------------- #
+
+    def test_date_parser_counts_survive_cache_clears(self):
+        '''
+        Test that an ambiguous date parsed again after the cache was cleared keeps its earlier rows.
+        '''
+        parser = DateParser(cache_size=1)
+        for date_string in ['03/04/2025', '2025-01-01', '03/04/2025', '2025-01-02', '03/04/2025']:
+            parser.parse(date_string)
+
+        self.assertEqual(parser.stats()['ambiguous_rows'], 3)
+
+    # -------------------------------------- #
+
+    def test_process_pool_reports_ambiguous_dates(self):
+        '''
+        Test that dates rendered by worker processes still show up in the parent's ambiguity report.
+        '''
+        with tempfile.TemporaryDirectory() as tmp:
+            input_csv = os.path.join(tmp, 'input.csv')
+            with open(input_csv, 'w', encoding='utf-8') as f:
+                f.write("Title,Contributor,Acceptance date,DOI,Resource\n")
+                for i in range(6):
+                    f.write(f"Title {i},Jane Doe,03/04/2025,10.1234/example.{i},https://example.com/{i}\n")
+            handler = CrossrefDepositHandler(processes=2, chunk_size=2)
+            template = handler.create_template('report')
+            fragments = list(handler.iter_fragments(template, 'report', handler.iter_csv(input_csv)))
+
+        self.assertEqual(len(fragments), 6)
+        self.assertEqual(handler.date_parser.stats()['ambiguous_rows'], 6)
+
+    # -------------------------------------- #
+
+    def test_validate_csv_reports_every_error(self):
+        '''
+        Test that validation checks every row and reports row, column and reason without stopping.
+        '''
+        sample_csv = (
+            "Title,Contributor,Acceptance date,DOI,Resource\n"
+            "Good,\"Smith, John\",2025-01-01,10.1234/good,https://example.com/good\n"
+            ",Jane Doe,2025-13-01,doi:bad,example.com/x\n"
+            ",,,,\n"
+            "No People,,01/02/2025,10.1234/people,http://example.com/p\n"
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            input_csv = os.path.join(tmp, 'input.csv')
+            with open(input_csv, 'w', encoding='utf-8') as f:
+                f.write(sample_csv)
+            errors = self.handler.validate_csv(input_csv)
+            report = os.path.join(tmp, 'errors.csv')
+            self.handler.save_validation_report(errors, report)
+            with open(report, encoding='utf-8') as f:
+                report_lines = f.read().splitlines()
+
+        self.assertEqual(
+            [(error['row'], error['column']) for error in errors],
+            [(3, 'Title'), (3, 'DOI'), (3, 'Resource'), (3, 'Acceptance date'), (5, 'Contributor')]
+        )
+        self.assertIn('Unable to parse date', errors[3]['reason'])
+        self.assertEqual(self.handler.validated_rows, 3)
+        self.assertEqual(report_lines[0], 'row,column,reason')
+        self.assertEqual(len(report_lines), 6)
+
+    # -------------------------------------- #
+
+    def test_validate_csv_reports_missing_columns(self):
+        '''
+        Test that a CSV missing required columns is reported against the header row.
+        '''
+        with patch("builtins.open", mock_open(read_data="Title,DOI\nA,10.1234/a\n")):
+            errors = self.handler.validate_csv('input.csv')
+
+        self.assertEqual([error['column'] for error in errors], ['Contributor', 'Acceptance date', 'Resource'])
+        self.assertTrue(all(error['row'] == 1 for error in errors))
+
+    # -------------------------------------- #
+
+    def test_duplicate_doi_in_batch_raises(self):
+        '''
+        Test that a DOI repeated within a batch stops processing, ignoring DOI case.
+        '''
+        sample_csv = (
+            "Title,Contributor,Acceptance date,DOI,Resource\n"
+            "A,Ann Lee,2025-01-01,10.1234/ABC,https://example.com/a\n"
+            "B,Bo Li,2025-01-01,10.1234/abc,https://example.com/b\n"
+        )
+        with patch("builtins.open", mock_open(read_data=sample_csv)):
+            with self.assertRaises(ValueError) as context:
+                self.handler.process_csv("input.csv")
+
+        self.assertIn("Duplicate DOI 10.1234/abc (first seen in row 2)", str(context.exception))
+
+    # -------------------------------------- #
+
+    def test_doi_resolver_prefix_is_normalized(self):
+        '''
+        Test that a DOI written as a doi.org URL validates and counts as the same DOI as the bare form.
+        '''
+        sample_csv = (
+            "Title,Contributor,Acceptance date,DOI,Resource\n"
+            "A,Ann Lee,2025-01-01,https://doi.org/10.1234/abc,https://example.com/a\n"
+            "B,Bo Li,2025-01-01,10.1234/ABC,https://example.com/b\n"
+        )
+        with patch("builtins.open", mock_open(read_data=sample_csv)):
+            errors = self.handler.validate_csv('input.csv')
+
+        self.assertEqual([(e['row'], e['column']) for e in errors], [(3, 'DOI')])
+        self.assertIn('Duplicate DOI 10.1234/ABC (first seen in row 2)', errors[0]['reason'])
+
+    # -------------------------------------- #
+
+    def test_duplicate_resources_and_registry_dois_are_flagged(self):
+        '''
+        Test that a resource under two DOIs and a DOI in an earlier deposit are collected as duplicates.
+        '''
+        sample_csv = (
+            "Title,Contributor,Acceptance date,DOI,Resource\n"
+            "A,Ann Lee,2025-01-01,10.1234/a,https://example.com/same\n"
+            "B,Bo Li,2025-01-01,10.1234/b,https://example.com/same\n"
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            input_csv = os.path.join(tmp, 'input.csv')
+            with open(input_csv, 'w', encoding='utf-8') as f:
+                f.write(sample_csv)
+            with IdentifierRegistry(os.path.join(tmp, 'registry.sqlite3')) as registry:
+                registry.add('10.1234/A', 'doi', 'https://example.com/same', 'OLD-BATCH')
+                registry.commit()
+                handler = CrossrefDepositHandler(registry=registry, check_registry=True)
+                handler.process_csv(input_csv)
+                errors = handler.validate_csv(input_csv)
+
+        self.assertEqual([(d['row'], d['column'], d['kind']) for d in handler.duplicates],
+                         [(2, 'DOI', 'registry'), (3, 'Resource', 'batch')])
+        self.assertIn('already in generated deposit batch OLD-BATCH', handler.duplicates[0]['reason'])
+        self.assertEqual([(e['row'], e['column']) for e in errors], [(2, 'DOI'), (3, 'Resource')])
+
+    # -------------------------------------- #
+
+    def test_registry_check_is_opt_in_and_skips_resent_dois(self):
+        '''
+        Test that registry DOIs are only flagged with check_registry, and never for URL updates or cached DOIs.
+        '''
+        sample_csv = (
+            "Title,Contributor,Acceptance date,DOI,Resource\n"
+            "A,Ann Lee,2025-01-01,10.1234/a,https://example.com/a\n"
+            "B,Bo Li,2025-01-01,10.1234/b,https://example.com/b\n"
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            input_csv = os.path.join(tmp, 'input.csv')
+            with open(input_csv, 'w', encoding='utf-8') as f:
+                f.write(sample_csv)
+            with IdentifierRegistry(os.path.join(tmp, 'registry.sqlite3')) as registry, \
+                    DepositCache(os.path.join(tmp, 'cache.sqlite3')) as cache:
+                registry.add('10.1234/a', 'doi', 'https://example.com/a', 'OLD-BATCH')
+                registry.add('10.1234/b', 'doi', 'https://example.com/b', 'OLD-BATCH')
+                cache.put('10.1234/a', 'report', 'hash', [], '<report/>', 'OLD-BATCH')
+
+                default = CrossrefDepositHandler(registry=registry)
+                list(default.iter_csv(input_csv, 'report'))
+                checked = CrossrefDepositHandler(registry=registry, deposit_cache=cache, check_registry=True)
+                list(checked.iter_csv(input_csv, 'report'))
+                updates = CrossrefDepositHandler(registry=registry, check_registry=True)
+                list(updates.iter_csv(input_csv, 'resource_update'))
+
+        self.assertEqual(default.duplicates, [])
+        self.assertEqual([(d['row'], d['kind']) for d in checked.duplicates], [(3, 'registry')])
+        self.assertEqual(updates.duplicates, [])
+
+    # -------------------------------------- #
+
+    def test_deposit_is_recorded_in_registry(self):
+        '''
+        Test that a successful deposit adds its DOIs to the registry under the batch ID.
+        '''
+        with tempfile.TemporaryDirectory() as tmp:
+            input_csv = os.path.join(tmp, 'input.csv')
+            self.write_sample_csv(input_csv, 3)
+            with IdentifierRegistry(os.path.join(tmp, 'registry.sqlite3')) as registry:
+                handler = CrossrefDepositHandler(registry=registry)
+                handler.create_batch_from_csv(input_csv, os.path.join(tmp, 'out.xml'), 'report')
+                recorded = registry.find('batch', handler.batch_id)
+                entry = registry.get(recorded[0]['identifier'])
+
+        self.assertEqual(len(recorded), 3)
+        self.assertEqual(entry['batch'], handler.batch_id)
+        self.assertEqual(entry['scheme'], 'doi')
+
+    # -------------------------------------- #
+
+    def test_fingerprint_ignores_whitespace_and_doi_case(self):
+        '''
+        Test that reformatting a row keeps its fingerprint while editing its content changes it.
+        '''
+        metadata = {'title': 'A  Title', 'contributor': 'Jane Doe', 'acceptance_date': '2025-01-01',
+                    'doi': '10.1234/ABC', 'resource': 'https://example.com/a'}
+        reformatted = dict(metadata, title=' A Title ', doi='10.1234/abc')
+        edited = dict(metadata, title='A New Title')
+
+        self.assertEqual(fingerprint('report', metadata), fingerprint('report', reformatted))
+        self.assertNotEqual(fingerprint('report', metadata), fingerprint('report', edited))
+        self.assertNotEqual(fingerprint('report', metadata), fingerprint('pending_publication', metadata))
+
+    # -------------------------------------- #
+
+    def test_incremental_deposit_contains_only_new_and_changed_rows(self):
+        '''
+        Test that a second incremental run deposits the edited, added and unconfirmed rows.
+        '''
+        ns = {'cr': 'http://www.crossref.org/schema/5.4.0'}
+        with tempfile.TemporaryDirectory() as tmp:
+            input_csv = os.path.join(tmp, 'input.csv')
+            self.write_sample_csv(input_csv, 4)
+            with DepositCache(os.path.join(tmp, 'cache.sqlite3')) as cache:
+                first = CrossrefDepositHandler(deposit_cache=cache, incremental=True)
+                first.create_batch_from_csv(input_csv, os.path.join(tmp, 'first.xml'), 'report')
+                # Crossref accepted every DOI but example.3
+                for i in range(3):
+                    self.assertTrue(cache.confirm(f'10.1234/example.{i}', first.batch_id))
+                cache.commit()
+
+                with open(input_csv, encoding='utf-8') as f:
+                    lines = f.read().replace('Title 1,', 'Title 1 (revised),')
+                with open(input_csv, 'w', encoding='utf-8') as f:
+                    f.write(lines + "Title 9,Jane Doe,2025-01-01,10.1234/example.9,https://example.com/9\n")
+
+                second = CrossrefDepositHandler(deposit_cache=cache, incremental=True)
+                second.create_batch_from_csv(input_csv, os.path.join(tmp, 'second.xml'), 'report')
+                root = ET.parse(os.path.join(tmp, 'second.xml')).getroot()
+
+        self.assertEqual(first.record_count, 4)
+        self.assertEqual(second.record_count, 3)
+        self.assertEqual(second.unchanged, 2)
+        self.assertEqual([doi.text for doi in root.iterfind('.//cr:doi_data/cr:doi', ns)],
+                         ['10.1234/example.1', '10.1234/example.3', '10.1234/example.9'])
+
+    # -------------------------------------- #
+
+    def test_deposit_cache_is_not_reused_across_date_orders(self):
+        '''
+        Test that a record cached from a month-first batch is rendered again, and reported, once the batch reads day first.
+        '''
+        ns = {'cr': 'http://www.crossref.org/schema/5.4.0'}
+        with tempfile.TemporaryDirectory() as tmp:
+            input_csv = os.path.join(tmp, 'input.csv')
+            row = "A,Ann Lee,03/04/2025,10.1234/a,https://example.com/a\n"
+            with open(input_csv, 'w', encoding='utf-8') as f:
+                f.write("Title,Contributor,Acceptance date,DOI,Resource\n" + row)
+            with DepositCache(os.path.join(tmp, 'cache.sqlite3')) as cache:
+                CrossrefDepositHandler(deposit_cache=cache).create_batch_from_csv(
+                    input_csv, os.path.join(tmp, 'first.xml'), 'report')
+                repeat = CrossrefDepositHandler(deposit_cache=cache)
+                repeat.create_batch_from_csv(input_csv, os.path.join(tmp, 'repeat.xml'), 'report')
+                with open(input_csv, 'a', encoding='utf-8') as f:
+                    f.write("B,Bo Li,13/04/2025,10.1234/b,https://example.com/b\n")
+                second = CrossrefDepositHandler(deposit_cache=cache)
+                second.create_batch_from_csv(input_csv, os.path.join(tmp, 'second.xml'), 'report')
+                third = CrossrefDepositHandler(deposit_cache=cache)
+                third.create_batch_from_csv(input_csv, os.path.join(tmp, 'third.xml'), 'report')
+            root = ET.parse(os.path.join(tmp, 'second.xml')).getroot()
+
+        first_date = root.find('.//cr:publication_date', ns)
+        self.assertEqual(repeat.reused_fragments, 1)
+        self.assertEqual(repeat.date_parser.stats()['ambiguous_rows'], 1)
+        self.assertEqual(second.reused_fragments, 0)
+        self.assertEqual((first_date.find('cr:month', ns).text, first_date.find('cr:day', ns).text), ('4', '3'))
+        self.assertEqual(third.reused_fragments, 2)
+        self.assertEqual(third.date_parser.stats()['slash_order'], DAY_FIRST)
+
+    # -------------------------------------- #
+
+    def test_deposit_cache_confirms_only_the_generated_batch(self):
+        '''
+        Test that cache entries start pending and are confirmed only by a result for the batch, or a part of it, they were generated in.
+        '''
+        with tempfile.TemporaryDirectory() as tmp:
+            with DepositCache(os.path.join(tmp, 'cache.sqlite3')) as cache:
+                cache.put('10.1234/A', 'report', 'hash-a', '  ', '<a/>', 'TAMU-REPORT-20250101000000')
+                cache.put('10.1234/b', 'report', 'hash-b', '  ', '<b/>', 'TAMU-REPORT-20250101000000')
+                pending = cache.get('10.1234/a')['confirmed']
+                stale = cache.confirm('10.1234/a', 'TAMU-REPORT-20240101000000')
+                part = cache.confirm('10.1234/a', 'TAMU-REPORT-20250101000000-002')
+                whole = cache.confirm('https://doi.org/10.1234/b', 'TAMU-REPORT-20250101000000')
+
+                self.assertEqual((pending, stale, part, whole), (False, False, True, True))
+                self.assertTrue(cache.get('10.1234/a')['confirmed'])
+
+    # -------------------------------------- #
+
+    def test_deposit_cache_reuses_rendered_records(self):
+        '''
+        Test that a full deposit reuses cached records, in process and on a pool, without changing the output.
+        '''
+        with tempfile.TemporaryDirectory() as tmp:
+            input_csv = os.path.join(tmp, 'input.csv')
+            self.write_sample_csv(input_csv, 10)
+            self.handler.create_batch_from_csv(input_csv, os.path.join(tmp, 'plain.xml'), 'report')
+            with DepositCache(os.path.join(tmp, 'cache.sqlite3')) as cache:
+                CrossrefDepositHandler(deposit_cache=cache).create_batch_from_csv(
+                    input_csv, os.path.join(tmp, 'first.xml'), 'report')
+                handler = CrossrefDepositHandler(deposit_cache=cache)
+                with patch('tamu_id_minter.crossref.crossref.render_record') as render:
+                    handler.create_batch_from_csv(input_csv, os.path.join(tmp, 'cached.xml'), 'report')
+                pooled = CrossrefDepositHandler(deposit_cache=cache, processes=2, chunk_size=3)
+                pooled.create_batch_from_csv(input_csv, os.path.join(tmp, 'pooled.xml'), 'report')
+                compact = CrossrefDepositHandler(deposit_cache=cache)
+                compact.create_batch_from_csv(input_csv, os.path.join(tmp, 'compact.xml'), 'report', indent=None)
+            bodies = [ET.tostring(ET.parse(os.path.join(tmp, name)).getroot()[1])
+                      for name in ('plain.xml', 'cached.xml', 'pooled.xml', 'compact.xml')]
+
+        render.assert_not_called()
+        self.assertEqual(handler.reused_fragments, 10)
+        self.assertEqual(pooled.reused_fragments, 10)
+        self.assertEqual(compact.reused_fragments, 0)
+        self.assertEqual(bodies[1], bodies[0])
+        self.assertEqual(bodies[2], bodies[0])
+
+    # -------------------------------------- #
+
+    def test_incremental_requires_deposit_cache(self):
+        '''
+        Test that incremental mode without a deposit cache is rejected.
+        '''
+        with self.assertRaises(ValueError):
+            CrossrefDepositHandler(incremental=True)
+
+    # -------------------------------------- #
+
+    def test_resource_update_deposit(self):
+        '''
+        Test that a DOI,URL CSV becomes split bulk URL update files, each with a header and one DOI per line.
+        '''
+        with tempfile.TemporaryDirectory() as tmp:
+            input_csv = os.path.join(tmp, 'moved.csv')
+            with open(input_csv, 'w', encoding='utf-8') as f:
+                f.write("DOI,Resource\n")
+                for i in range(5):
+                    f.write(f"https://doi.org/10.1234/example.{i},https://new.example.com/{i}\n")
+
+            manifest_file = self.handler.create_batch_from_csv(
+                input_csv, os.path.join(tmp, 'moved.txt'), 'resource_update', max_records=2
+            )
+            with open(manifest_file) as f:
+                manifest = json.load(f)
+            parts = []
+            for part in manifest['files']:
+                with open(part['file'], encoding='utf-8') as f:
+                    parts.append(f.read().splitlines())
+                self.assertEqual(os.path.getsize(part['file']), part['bytes'])
+
+            single = self.handler.create_batch_from_csv(input_csv, os.path.join(tmp, 'all.txt'), 'resource_update')
+            with open(single, encoding='utf-8') as f:
+                lines = f.read().splitlines()
+
+        self.assertIsInstance(self.handler.create_template('resource_update'), ResourceUpdateTemplate)
+        self.assertEqual(manifest['records'], 5)
+        self.assertEqual([part['file'][-7:] for part in manifest['files']], ['001.txt', '002.txt', '003.txt'])
+        self.assertEqual([len(part) for part in parts], [3, 3, 2])
+        self.assertTrue(all(part[0] == 'H: email=depositor@library.tamu.edu;fromPrefix=10.1234' for part in parts))
+        self.assertEqual(parts[2][1], '10.1234/example.4\thttps://new.example.com/4')
+        self.assertEqual(lines[1:], [f'10.1234/example.{i}\thttps://new.example.com/{i}' for i in range(5)])
+        self.assertEqual(self.handler.record_count, 5)
+
+    # -------------------------------------- #
+
+    def test_resource_update_rejects_mixed_prefixes_and_xml(self):
+        '''
+        Test that a URL update file only takes one DOI prefix and that resource_update can't be rendered as XML.
+        '''
+        with tempfile.TemporaryDirectory() as tmp:
+            input_csv = os.path.join(tmp, 'moved.csv')
+            with open(input_csv, 'w', encoding='utf-8') as f:
+                f.write("DOI,Resource\n10.1234/a,https://example.com/a\n10.5678/b,https://example.com/b\n")
+            with self.assertRaisesRegex(ValueError, 'one DOI prefix: 10.5678/b is not under 10.1234'):
+                self.handler.create_batch_from_csv(input_csv, os.path.join(tmp, 'moved.txt'), 'resource_update')
+            with self.assertRaisesRegex(ValueError, 'one DOI prefix'):
+                self.handler.create_batch_from_csv(input_csv, os.path.join(tmp, 'split.txt'), 'resource_update',
+                                                   max_records=1)
+            left_behind = os.listdir(tmp)
+
+        self.assertEqual(left_behind, ['moved.csv'])
+        with self.assertRaisesRegex(ValueError, 'URL update file'):
+            self.handler.generate_deposit_xml('resource_update', [{'doi': '10.1234/a', 'resource': 'https://x'}])
+
+    # -------------------------------------- #
+
+    def test_resource_update_bypasses_deposit_cache(self):
+        '''
+        Test that a URL update file leaves cached records alone and can't be generated incrementally.
+        '''
+        with tempfile.TemporaryDirectory() as tmp:
+            input_csv = os.path.join(tmp, 'moved.csv')
+            with open(input_csv, 'w', encoding='utf-8') as f:
+                f.write("DOI,Resource\n10.1234/a,https://example.com/a\n")
+            with DepositCache(os.path.join(tmp, 'cache.sqlite3')) as cache:
+                cache.put('10.1234/a', 'report', 'hash', [], '<report/>', 'OLD-BATCH')
+                cache.commit()
+                CrossrefDepositHandler(deposit_cache=cache).create_batch_from_csv(
+                    input_csv, os.path.join(tmp, 'moved.txt'), 'resource_update')
+                cached = cache.get('10.1234/a')
+                incremental = CrossrefDepositHandler(deposit_cache=cache, incremental=True)
+                with self.assertRaisesRegex(ValueError, "can't be deposited incrementally"):
+                    incremental.create_batch_from_csv(input_csv, os.path.join(tmp, 'again.txt'), 'resource_update')
+
+        self.assertEqual(cached['fragment'], '<report/>')
+
+    # -------------------------------------- #
+
+    def test_resource_update_requires_only_doi_and_resource(self):
+        '''
+        Test that resource_update CSVs need DOI and Resource columns but full deposits still need the rest.
+        '''
+        with tempfile.TemporaryDirectory() as tmp:
+            input_csv = os.path.join(tmp, 'moved.csv')
+            with open(input_csv, 'w', encoding='utf-8') as f:
+                f.write("DOI\n10.1234/a\n")
+            with self.assertRaisesRegex(ValueError, 'missing required columns: Resource'):
+                list(self.handler.iter_csv(input_csv, 'resource_update'))
+            with self.assertRaisesRegex(ValueError, 'Title'):
+                list(self.handler.iter_csv(input_csv, 'report'))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
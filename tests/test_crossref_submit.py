@@ -0,0 +1,145 @@
+import csv
+import io
+import os
+import tempfile
+import unittest
+from tamu_id_minter.crossref.crossref import CrossrefDepositHandler
+from tamu_id_minter.crossref.fake_server import FakeCrossrefServer
+from tamu_id_minter.crossref.submit import CrossrefSubmissionHandler, iter_submission_log, read_batch_id
+
+
+class TestCrossrefSubmit(unittest.TestCase):
+    ''' Testcases for submitting deposits and reading submission logs. '''
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.input_csv = os.path.join(self.tmp.name, 'input.csv')
+        with open(self.input_csv, 'w', encoding='utf-8') as f:
+            f.write("Title,Contributor,Acceptance date,DOI,Resource\n")
+            for i in range(12):
+                f.write(f"Title {i},Jane Doe,2025-01-01,10.1234/example.{i},https://example.com/{i}\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_handler(self, server, **kwargs):
+        return CrossrefSubmissionHandler(
+            deposit_url=server.deposit_url, status_url=server.status_url,
+            username='user', password='secret', poll_interval=0.01, **kwargs
+        )
+
+    # -------------------------------------- #
+
+    def test_iter_submission_log(self):
+        '''
+        Test that record diagnostics are streamed out of a submission log in order.
+        '''
+        log = io.BytesIO(
+            b'<?xml version="1.0" encoding="UTF-8"?>\n'
+            b'<doi_batch_diagnostic status="completed" sp="cs3">'
+            b'<submission_id>1</submission_id><batch_id>B</batch_id>'
+            b'<record_diagnostic status="Success"><doi>10.1234/a</doi><msg>Successfully added</msg></record_diagnostic>'
+            b'<record_diagnostic status="Failure"><doi>10.1234/b</doi><msg>Bad &amp; wrong</msg></record_diagnostic>'
+            b'<batch_data><record_count>2</record_count></batch_data>'
+            b'</doi_batch_diagnostic>'
+        )
+
+        self.assertEqual(list(iter_submission_log(log)), [
+            {'doi': '10.1234/a', 'status': 'Success', 'message': 'Successfully added'},
+            {'doi': '10.1234/b', 'status': 'Failure', 'message': 'Bad & wrong'},
+        ])
+
+    # -------------------------------------- #
+
+    def test_submit_split_deposit_against_fake_server(self):
+        '''
+        Test that every file of a split deposit is uploaded, polled until complete and reported per DOI.
+        '''
+        manifest = CrossrefDepositHandler().create_batch_from_csv(
+            self.input_csv, os.path.join(self.tmp.name, 'deposit.xml'), 'report', max_records=5
+        )
+        output_csv = os.path.join(self.tmp.name, 'results.csv')
+
+        with FakeCrossrefServer(polls_until_complete=2, failure_rate=0.5, seed=3) as server:
+            with self.make_handler(server, workers=3) as handler:
+                summary = handler.submit([manifest], output_csv)
+            stats = dict(server.stats)
+
+        with open(output_csv, newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+
+        self.assertEqual([row['doi'] for row in rows], [f"10.1234/example.{i}" for i in range(12)])
+        self.assertEqual(len({row['doi_batch_id'] for row in rows}), 3)
+        self.assertEqual(sum(summary.values()), 12)
+        self.assertGreater(summary['Failure'], 0)
+        self.assertEqual(stats['uploads'], 3)
+        self.assertEqual(stats['polls'], 9)
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, 'deposit-001-result.xml')))
+
+    # -------------------------------------- #
+
+    def test_failed_upload_and_pending_batches_are_reported(self):
+        '''
+        Test that a rejected upload and a batch whose log never completes each get a row.
+        '''
+        deposit = os.path.join(self.tmp.name, 'deposit.xml')
+        CrossrefDepositHandler().create_batch_from_csv(self.input_csv, deposit, 'report')
+        broken = os.path.join(self.tmp.name, 'broken.xml')
+        with open(broken, 'w') as f:
+            f.write('<doi_batch><head><doi_batch_id>X</doi_batch_id></head>')
+        output_csv = os.path.join(self.tmp.name, 'results.csv')
+
+        with FakeCrossrefServer(polls_until_complete=10) as server:
+            with self.make_handler(server, max_polls=2) as handler:
+                handler.submit([deposit, broken], output_csv)
+
+        with open(output_csv, newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+
+        self.assertEqual([(row['file'], row['status']) for row in rows],
+                         [(deposit, 'pending'), (broken, 'upload_failed')])
+        self.assertEqual(rows[0]['doi_batch_id'], read_batch_id(deposit))
+
+    # -------------------------------------- #
+
+    def test_status_pages_that_are_not_logs_get_a_row_per_file(self):
+        '''
+        Test that a non-XML body, an HTML page and a completed log without records each leave a row for the file.
+        '''
+        deposit = os.path.join(self.tmp.name, 'deposit.xml')
+        CrossrefDepositHandler().create_batch_from_csv(self.input_csv, deposit, 'report')
+        output_csv = os.path.join(self.tmp.name, 'results.csv')
+        cases = [
+            ('Service temporarily unavailable', 'invalid_log'),
+            ('<html><body><h2>Login failed</h2></body></html>', 'invalid_log'),
+            ('<?xml version="1.0"?>\n<doi_batch_diagnostic status="completed"/>', 'completed'),
+        ]
+
+        for body, status in cases:
+            with self.subTest(body=body):
+                with FakeCrossrefServer(status_body=body) as server:
+                    with self.make_handler(server) as handler:
+                        summary = handler.submit([deposit], output_csv)
+
+                with open(output_csv, newline='', encoding='utf-8') as f:
+                    rows = list(csv.DictReader(f))
+
+                self.assertEqual([(row['file'], row['doi'], row['status']) for row in rows], [(deposit, '', status)])
+                self.assertEqual(summary, {status: 1})
+                self.assertEqual(os.path.exists(os.path.join(self.tmp.name, 'deposit-result.xml')), status == 'completed')
+
+        self.assertIn('has no record diagnostics', rows[0]['message'])
+
+    # -------------------------------------- #
+
+    def test_poll_delay_backs_off(self):
+        '''
+        Test that waits between status checks double up to the maximum interval.
+        '''
+        handler = CrossrefSubmissionHandler(poll_interval=2, max_poll_interval=10)
+
+        self.assertEqual([handler.poll_delay(poll) for poll in range(5)], [2, 4, 8, 10, 10])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,16 @@
+import csv
+import json
+import os
+import tempfile
+import time
 import unittest
+import requests
 from unittest.mock import patch, MagicMock
 from tamu_id_minter.ezid.ezid import (
     EZIDARKHandler
 )
+from tamu_id_minter.ezid.base import parse_anvl
+from tamu_id_minter.registry import IdentifierRegistry
 
 class TestEZID(unittest.TestCase):
     
@@ -35,7 +43,7 @@ class TestEZID(unittest.TestCase):
     
     # -------------------------------------- #
 
-    @patch('tamu_id_minter.ezid.ezid.requests.post')
+    @patch('requests.Session.post')
     def test_create_ark_success(self, mock_post):
         '''
         Test that an ARK is created successfully.
@@ -117,7 +125,7 @@ class TestEZID(unittest.TestCase):
 
     # -------------------------------------- #
 
-    @patch('tamu_id_minter.ezid.ezid.requests.get')
+    @patch('requests.Session.get')
     @patch('builtins.print')
     def test_get_ark(self, mock_print, mock_get):
         '''
@@ -154,7 +162,7 @@ class TestEZID(unittest.TestCase):
 
     # -------------------------------------- #
 
-    @patch('tamu_id_minter.ezid.ezid.requests.post')
+    @patch('requests.Session.post')
     def test_switch_status_success(self, mock_post):
         '''
         Test that ARK status can be switched successfully.
@@ -173,31 +181,84 @@ class TestEZID(unittest.TestCase):
     # -------------------------------------- #
 
     @patch.object(EZIDARKHandler, 'switch_status')
-    @patch('builtins.open')
-    def test_batch_switch_status(self, mock_open, mock_switch):
+    def test_batch_switch_status(self, mock_switch):
         '''
         Test batch status switching from CSV.
         When I call batch_switch_status(), it should switch status for all ARKs in the CSV.
         '''
 
-        csv_content = "ark\nark:/81423/test1\nark:/81423/test2"
-        mock_input_file = MagicMock()
-        mock_input_file.__enter__.return_value = csv_content.splitlines(True)
-        
-        mock_output_file = MagicMock()
-        
-        mock_open.side_effect = [mock_input_file, mock_output_file]
-        
         mock_switch.return_value = (True, "success")
 
-        self.handler.batch_switch_status('arks.csv', 'public')
+        with tempfile.TemporaryDirectory() as tmp:
+            input_csv = os.path.join(tmp, 'arks.csv')
+            with open(input_csv, 'w') as f:
+                f.write("ark\nark:/81423/test1\nhttps://n2t.net/ark:/81423/test2\n")
+
+            output_csv = self.handler.batch_switch_status(input_csv, 'public')
+
+            with open(output_csv, newline='') as f:
+                rows = list(csv.DictReader(f))
 
         self.assertEqual(mock_switch.call_count, 2)
-        self.assertEqual(mock_open.call_count, 2)
+        mock_switch.assert_called_with('ark:/81423/test2', 'public')
+        self.assertEqual(rows, [{'Success': 'True', 'Message': 'success'}] * 2)
+
+    # -------------------------------------- #
+
+    def test_batch_switch_status_empty_input(self):
+        '''
+        Test that an input CSV without ARKs writes an empty result file instead of crashing.
+        '''
+        with tempfile.TemporaryDirectory() as tmp:
+            input_csv = os.path.join(tmp, 'arks.csv')
+            with open(input_csv, 'w') as f:
+                f.write("ark\n")
+
+            output_csv = self.handler.batch_switch_status(input_csv, 'public')
+
+            with open(output_csv) as f:
+                self.assertEqual(f.read().strip(), "Success,Message")
+
+    # -------------------------------------- #
+
+    @patch.object(EZIDARKHandler, 'switch_status')
+    def test_batch_switch_status_parallel_resume(self, mock_switch):
+        '''
+        Test that a resumed parallel run only switches ARKs that did not succeed before,
+        and that a request error on one ARK is recorded without stopping the others.
+        '''
+        def fake_switch(ark, status):
+            if ark.endswith('3'):
+                raise requests.ConnectionError("connection reset")
+            return True, f"{ark} status successfully changed to {status}"
+
+        mock_switch.side_effect = fake_switch
+
+        with tempfile.TemporaryDirectory() as tmp:
+            input_csv = os.path.join(tmp, 'arks.csv')
+            output_csv = os.path.join(tmp, 'out.csv')
+            with open(input_csv, 'w') as f:
+                f.write("ark\n" + "".join(f"ark:/81423/test{i}\n" for i in range(5)))
+            with open(f"{input_csv}.public.journal.jsonl", 'w') as f:
+                f.write('{"row": 0, "result": {"ark": "ark:/81423/test0", "success": true, "message": "done"}}\n')
+                f.write('{"row": 1, "result": {"ark": "ark:/81423/test1", "success": false, "message": "503"}}\n')
+
+            handler = EZIDARKHandler(workers=3)
+            handler.batch_switch_status(input_csv, 'public', output_csv=output_csv, resume=True)
+
+            with open(output_csv, newline='') as f:
+                rows = list(csv.DictReader(f))
+            self.assertFalse(os.path.exists(f"{input_csv}.public.journal.jsonl"))
+
+        switched = sorted(call.args[0] for call in mock_switch.call_args_list)
+        self.assertEqual(switched, [f"ark:/81423/test{i}" for i in range(1, 5)])
+        self.assertEqual([r['Success'] for r in rows], ['True', 'True', 'True', 'False', 'True'])
+        self.assertEqual(rows[0]['Message'], 'done')
+        self.assertIn("connection reset", rows[3]['Message'])
 
     # -------------------------------------- #
 
-    @patch('tamu_id_minter.ezid.ezid.requests.post')
+    @patch('requests.Session.post')
     def test_switch_status_failure(self, mock_post):
         '''
         Test that ARK status can be switched successfully.
@@ -213,5 +274,363 @@ class TestEZID(unittest.TestCase):
         self.assertIn("status failed with", message)
         mock_post.assert_called_once()
 
+    # -------------------------------------- #
+
+    def test_session_pool_configuration(self):
+        '''
+        Test that the handler mounts a pooled adapter on its session.
+        When I create a handler with a pool size, both adapters must use that pool size and retry count.
+        '''
+        handler = EZIDARKHandler(pool_size=4, max_retries=2)
+        adapter = handler.session.get_adapter('https://ezid.cdlib.org')
+
+        self.assertEqual(adapter._pool_maxsize, 4)
+        self.assertEqual(adapter.max_retries.total, 2)
+        self.assertEqual(handler.session.headers['Connection'], 'keep-alive')
+
+        closing = EZIDARKHandler(keep_alive=False)
+        self.assertEqual(closing.session.headers['Connection'], 'close')
+
+    # -------------------------------------- #
+
+    @patch('requests.Session.close')
+    def test_context_manager_closes_session(self, mock_close):
+        '''
+        Test that the handler closes its session when used as a context manager.
+        '''
+        with EZIDARKHandler() as handler:
+            self.assertIsInstance(handler, EZIDARKHandler)
+
+        mock_close.assert_called_once()
+
+    # -------------------------------------- #
+
+    @patch.object(EZIDARKHandler, 'create_ark')
+    @patch('builtins.open')
+    def test_process_csv_parallel_keeps_order(self, mock_open, mock_create_ark):
+        '''
+        Test that parallel minting keeps results in input order and survives failed rows.
+        When one row raises a request error, the other rows must still be minted and the failure recorded.
+        '''
+        csv_content = "who,what,when,where\n" + "".join(
+            f"Name {i},Doc {i},2025,http://example.com/{i}\n" for i in range(20)
+        )
+        mock_open.return_value.__enter__.return_value = csv_content.splitlines(True)
+
+        def fake_create_ark(who, what, when, where):
+            if where.endswith('/7'):
+                raise requests.ConnectionError("connection reset")
+            return {'who': who, 'what': what, 'when': when, 'where': where,
+                    'message': 'success', 'ark': f'ark:/81423/{where[-2:]}'}
+
+        mock_create_ark.side_effect = fake_create_ark
+
+        handler = EZIDARKHandler(workers=4)
+        handler.process_csv('test.csv')
+
+        self.assertEqual(len(handler.completed), 20)
+        self.assertEqual([r['where'] for r in handler.completed],
+                         [f"http://example.com/{i}" for i in range(20)])
+        self.assertEqual(handler.completed[7]['ark'], "")
+        self.assertIn("connection reset", handler.completed[7]['message'])
+        self.assertTrue(handler.completed[8]['ark'])
+
+    # -------------------------------------- #
+
+    @patch('tamu_id_minter.ezid.ezid.time.sleep')
+    @patch('requests.Session.post')
+    def test_send_retries_throttled_requests(self, mock_post, mock_sleep):
+        '''
+        Test that 429 responses are retried with the server's Retry-After before giving up.
+        When EZID throttles once and then succeeds, the ARK must still be minted.
+        '''
+        throttled = MagicMock(status_code=429, headers={'Retry-After': '2'}, content=b'error: too many requests')
+        success = MagicMock(status_code=201, headers={}, content=b'success: ark:/81423/d2tg6j')
+        mock_post.side_effect = [throttled, success]
+
+        handler = EZIDARKHandler(rate_limit=100)
+        result = handler.create_ark("Dummy name", "Dummy title", "2025", "http://example.com/resource")
+
+        self.assertEqual(result['ark'], 'https://n2t.net/ark:/81423/d2tg6j')
+        self.assertEqual(mock_post.call_count, 2)
+        self.assertGreaterEqual(mock_sleep.call_args[0][0], 2)
+        self.assertLess(handler.rate_limiter.rate, 100)
+
+    # -------------------------------------- #
+
+    @patch('tamu_id_minter.ezid.ezid.time.sleep')
+    @patch('requests.Session.post')
+    def test_send_gives_up_after_max_attempts(self, mock_post, mock_sleep):
+        '''
+        Test that connection errors are retried and re-raised once attempts run out.
+        '''
+        mock_post.side_effect = requests.ConnectionError("connection reset")
+
+        handler = EZIDARKHandler(max_attempts=3)
+        with self.assertRaises(requests.ConnectionError):
+            handler.switch_status("ark:/81423/d2test123", "public")
+
+        self.assertEqual(mock_post.call_count, 3)
+        self.assertEqual(mock_sleep.call_count, 2)
+
+    # -------------------------------------- #
+
+    @patch.object(EZIDARKHandler, 'create_ark')
+    def test_resume_skips_journaled_rows(self, mock_create_ark):
+        '''
+        Test that a resumed batch only mints rows the journal does not already have an ARK for.
+        '''
+        mock_create_ark.side_effect = lambda who, what, when, where: {
+            'who': who, 'what': what, 'when': when, 'where': where,
+            'message': 'success', 'ark': f'https://n2t.net/ark:/81423/new{where[-1]}',
+        }
+
+        with tempfile.TemporaryDirectory() as tmp:
+            input_csv = os.path.join(tmp, 'input.csv')
+            output_csv = os.path.join(tmp, 'output.csv')
+            with open(input_csv, 'w') as f:
+                f.write("who,what,when,where\n")
+                for i in range(3):
+                    f.write(f"Name {i},Doc {i},2025,http://example.com/{i}\n")
+
+            # A crashed run minted row 0 and failed row 1
+            with open(f"{output_csv}.journal.jsonl", 'w') as f:
+                f.write('{"row": 0, "result": {"who": "Name 0", "what": "Doc 0", "when": "2025", '
+                        '"where": "http://example.com/0", "message": "success", '
+                        '"ark": "https://n2t.net/ark:/81423/old0"}}\n')
+                f.write('{"row": 1, "result": {"who": "Name 1", "what": "Doc 1", "when": "2025", '
+                        '"where": "http://example.com/1", "message": "error: timeout", "ark": ""}}\n')
+
+            results = self.handler.create_batch_from_csv(input_csv, output_csv, resume=True)
+
+            with open(output_csv, newline='') as f:
+                saved = list(csv.DictReader(f))
+            self.assertFalse(os.path.exists(f"{output_csv}.journal.jsonl"))
+
+        self.assertEqual(mock_create_ark.call_count, 2)
+        self.assertEqual([r['ark'] for r in results], [
+            'https://n2t.net/ark:/81423/old0',
+            'https://n2t.net/ark:/81423/new1',
+            'https://n2t.net/ark:/81423/new2',
+        ])
+        self.assertEqual([r['ark'] for r in saved], [r['ark'] for r in results])
+
+    # -------------------------------------- #
+
+    @patch.object(EZIDARKHandler, 'create_ark')
+    def test_stream_batch_from_csv(self, mock_create_ark):
+        '''
+        Test that streaming writes every result in order without collecting them in memory.
+        '''
+        mock_create_ark.side_effect = lambda who, what, when, where: {
+            'who': who, 'what': what, 'when': when, 'where': where,
+            'message': 'success', 'ark': f'https://n2t.net/ark:/81423/{where[-1]}',
+        }
+
+        with tempfile.TemporaryDirectory() as tmp:
+            input_csv = os.path.join(tmp, 'input.csv')
+            output_csv = os.path.join(tmp, 'output.csv')
+            with open(input_csv, 'w') as f:
+                f.write("who,what,when,where\n")
+                for i in range(5):
+                    f.write(f"Name {i},Doc {i},2025,http://example.com/{i}\n")
+
+            handler = EZIDARKHandler(workers=3)
+            count = handler.stream_batch_from_csv(input_csv, output_csv)
+
+            with open(output_csv, newline='') as f:
+                saved = list(csv.DictReader(f))
+
+        self.assertEqual(count, 5)
+        self.assertEqual(handler.completed, [])
+        self.assertEqual([r['ark'][-1] for r in saved], list("01234"))
+
+    # -------------------------------------- #
+
+    @patch.object(EZIDARKHandler, 'create_ark')
+    def test_minted_arks_are_recorded_in_registry(self, mock_create_ark):
+        '''
+        Test that every ARK minted in a batch is added to the registry with its target, skipping failures.
+        '''
+        mock_create_ark.side_effect = lambda who, what, when, where: {
+            'who': who, 'what': what, 'when': when, 'where': where,
+            'message': 'success' if where[-1] != '1' else 'error: bad request',
+            'ark': f'https://n2t.net/ark:/81423/d{where[-1]}' if where[-1] != '1' else '',
+        }
+
+        with tempfile.TemporaryDirectory() as tmp:
+            input_csv = os.path.join(tmp, 'input.csv')
+            output_csv = os.path.join(tmp, 'output.csv')
+            with open(input_csv, 'w') as f:
+                f.write("who,what,when,where\n")
+                for i in range(3):
+                    f.write(f"Name {i},Doc {i},2025,http://example.com/{i}\n")
+
+            with IdentifierRegistry(os.path.join(tmp, 'registry.sqlite3')) as registry:
+                EZIDARKHandler(registry=registry).create_batch_from_csv(input_csv, output_csv)
+                minted = registry.find('batch', output_csv)
+                by_target = registry.find('target', 'http://example.com/2')
+
+        self.assertEqual([entry['identifier'] for entry in minted], ['ark:/81423/d0', 'ark:/81423/d2'])
+        self.assertEqual(by_target[0]['scheme'], 'ark')
+
+    # -------------------------------------- #
+
+    @patch.object(EZIDARKHandler, 'create_ark')
+    def test_skip_existing_reuses_registered_arks(self, mock_create_ark):
+        '''
+        Test that with skip_existing only rows whose target has no ARK yet are minted.
+        '''
+        mock_create_ark.side_effect = lambda who, what, when, where: {
+            'who': who, 'what': what, 'when': when, 'where': where,
+            'message': 'success', 'ark': f'https://n2t.net/ark:/81423/new{where[-1]}',
+        }
+
+        with tempfile.TemporaryDirectory() as tmp:
+            input_csv = os.path.join(tmp, 'input.csv')
+            with open(input_csv, 'w') as f:
+                f.write("who,what,when,where\n")
+                for i in range(3):
+                    f.write(f"Name {i},Doc {i},2025,http://example.com/{i}\n")
+
+            with IdentifierRegistry(os.path.join(tmp, 'registry.sqlite3')) as registry:
+                registry.add('ark:/81423/old1', 'ark', 'http://example.com/1', 'earlier.csv')
+                handler = EZIDARKHandler(registry=registry, skip_existing=True, workers=2)
+                results = handler.create_batch_from_csv(input_csv, os.path.join(tmp, 'output.csv'))
+                old_entry = registry.get('ark:/81423/old1', 'ark')
+
+        self.assertEqual(mock_create_ark.call_count, 2)
+        self.assertEqual([r['ark'] for r in results], [
+            'https://n2t.net/ark:/81423/new0',
+            'https://n2t.net/ark:/81423/old1',
+            'https://n2t.net/ark:/81423/new2',
+        ])
+        self.assertTrue(results[1]['message'].startswith('skipped:'))
+        self.assertEqual(handler.skipped, 1)
+        self.assertEqual(old_entry['batch'], 'earlier.csv')
+
+    # -------------------------------------- #
+
+    @patch.object(EZIDARKHandler, 'create_ark')
+    def test_skip_existing_mints_repeated_targets_once(self, mock_create_ark):
+        '''
+        Test that with skip_existing a target listed twice in one CSV is minted once, even with rows in flight together.
+        '''
+        def create_ark(who, what, when, where):
+            time.sleep(0.05)
+            return {'who': who, 'what': what, 'when': when, 'where': where,
+                    'message': 'success', 'ark': f'https://n2t.net/ark:/81423/{who[-1]}'}
+        mock_create_ark.side_effect = create_ark
+
+        with tempfile.TemporaryDirectory() as tmp:
+            input_csv = os.path.join(tmp, 'input.csv')
+            with open(input_csv, 'w') as f:
+                f.write("who,what,when,where\n")
+                for i, target in enumerate(['a', 'a', 'b', 'a']):
+                    f.write(f"Name {i},Doc {i},2025,http://example.com/{target}\n")
+
+            with IdentifierRegistry(os.path.join(tmp, 'registry.sqlite3')) as registry:
+                handler = EZIDARKHandler(registry=registry, skip_existing=True, workers=3)
+                results = handler.create_batch_from_csv(input_csv, os.path.join(tmp, 'output.csv'))
+                registered = registry.find('target', 'http://example.com/a')
+
+        self.assertEqual(mock_create_ark.call_count, 2)
+        self.assertEqual([r['ark'][-1] for r in results], ['0', '0', '2', '0'])
+        self.assertTrue(results[1]['message'].startswith('skipped:'))
+        self.assertEqual(handler.skipped, 2)
+        self.assertEqual([entry['identifier'] for entry in registered], ['ark:/81423/0'])
+
+    # -------------------------------------- #
+
+    @patch.object(EZIDARKHandler, 'create_ark')
+    def test_stream_skip_existing_releases_registered_claims(self, mock_create_ark):
+        '''
+        Test that streaming with skip_existing only holds claims for rows in flight, leaving repeats to the registry.
+        '''
+        mock_create_ark.side_effect = lambda who, what, when, where: {
+            'who': who, 'what': what, 'when': when, 'where': where,
+            'message': 'success', 'ark': f'https://n2t.net/ark:/81423/{who.split()[-1]}',
+        }
+        targets = [str(i) for i in range(20)] + ['0', '7']
+
+        with tempfile.TemporaryDirectory() as tmp:
+            input_csv = os.path.join(tmp, 'input.csv')
+            output_csv = os.path.join(tmp, 'output.csv')
+            with open(input_csv, 'w') as f:
+                f.write("who,what,when,where\n")
+                for i, target in enumerate(targets):
+                    f.write(f"Name {i},Doc {i},2025,http://example.com/{target}\n")
+
+            with IdentifierRegistry(os.path.join(tmp, 'registry.sqlite3')) as registry:
+                handler = EZIDARKHandler(registry=registry, skip_existing=True, workers=2)
+                count = handler.stream_batch_from_csv(input_csv, output_csv)
+
+            with open(output_csv, newline='') as f:
+                saved = list(csv.DictReader(f))
+
+        self.assertEqual(count, 22)
+        self.assertEqual(mock_create_ark.call_count, 20)
+        self.assertEqual([r['ark'] for r in saved[-2:]], ['https://n2t.net/ark:/81423/0', 'https://n2t.net/ark:/81423/7'])
+        self.assertEqual(handler.skipped, 2)
+        self.assertEqual(handler.claimed_targets, {})
+
+    # -------------------------------------- #
+
+    def test_parse_anvl(self):
+        '''
+        Test that ANVL bodies are split into fields and EZID's percent escapes are undone.
+        '''
+        fields = parse_anvl(
+            "success: ark:/81423/d2test123\n"
+            "erc.who: Doe, John\n"
+            "erc.what: Line one%0ALine two 100%25\n"
+            "_target: http://example.com/a?b=c\n"
+            "_status: public\n"
+        )
+
+        self.assertEqual(fields['success'], 'ark:/81423/d2test123')
+        self.assertEqual(fields['erc.who'], 'Doe, John')
+        self.assertEqual(fields['erc.what'], 'Line one\nLine two 100%')
+        self.assertEqual(fields['_target'], 'http://example.com/a?b=c')
+        self.assertEqual(fields['_status'], 'public')
+
+    # -------------------------------------- #
+
+    @patch('requests.Session.get')
+    def test_get_arks_writes_structured_output(self, mock_get):
+        '''
+        Test that get_arks fetches each ARK and writes parsed fields as CSV and JSONL.
+        '''
+        def respond(url, **kwargs):
+            ark = url.split('/id/')[1]
+            if ark.endswith('missing'):
+                return MagicMock(status_code=400, headers={}, content=b'error: bad request - no such identifier')
+            body = f"success: {ark}\nerc.who: John Doe\n_target: http://example.com/{ark[-1]}\n_status: public\n"
+            return MagicMock(status_code=200, headers={}, content=body.encode())
+
+        mock_get.side_effect = respond
+
+        with tempfile.TemporaryDirectory() as tmp:
+            input_csv = os.path.join(tmp, 'arks.csv')
+            with open(input_csv, 'w') as f:
+                f.write("ark\nhttps://n2t.net/ark:/81423/a1\nark:/81423/missing\nark:/81423/b2\n")
+
+            handler = EZIDARKHandler(workers=2)
+            count = handler.get_arks(input_csv, os.path.join(tmp, 'metadata.csv'))
+            handler.get_arks(input_csv, os.path.join(tmp, 'metadata.jsonl'))
+
+            with open(os.path.join(tmp, 'metadata.csv'), newline='') as f:
+                rows = list(csv.DictReader(f))
+            with open(os.path.join(tmp, 'metadata.jsonl')) as f:
+                lines = [json.loads(line) for line in f]
+
+        self.assertEqual(count, 3)
+        self.assertEqual([r['ark'] for r in rows], ['ark:/81423/a1', 'ark:/81423/missing', 'ark:/81423/b2'])
+        self.assertEqual(rows[0]['_target'], 'http://example.com/1')
+        self.assertEqual(rows[0]['erc.who'], 'John Doe')
+        self.assertEqual(rows[1]['error'], 'bad request - no such identifier')
+        self.assertEqual(lines[2], {'ark': 'ark:/81423/b2', 'erc.who': 'John Doe',
+                                    '_target': 'http://example.com/2', '_status': 'public'})
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,84 @@
+import csv
+import os
+import tempfile
+import unittest
+from tamu_id_minter.ezid.ezid import EZIDARKHandler
+from tamu_id_minter.ezid.fake_server import FakeEZIDServer
+
+
+class TestFakeEZIDServer(unittest.TestCase):
+
+    ''' Integration tests running EZIDARKHandler against the local fake EZID. '''
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.input_csv = os.path.join(self.tmp.name, 'input.csv')
+        with open(self.input_csv, 'w') as f:
+            f.write("who,what,when,where\n")
+            for i in range(20):
+                f.write(f"Name {i},Doc {i},2025,http://example.com/{i}\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def handler_for(self, server, **kwargs):
+        return EZIDARKHandler(shoulder_url=server.shoulder_url, base_url=server.url, **kwargs)
+
+    # -------------------------------------- #
+
+    def test_mint_fetch_and_publish(self):
+        '''
+        Test a full round trip: mint a batch, read the metadata back and publish it.
+        '''
+        output_csv = os.path.join(self.tmp.name, 'output.csv')
+        metadata_csv = os.path.join(self.tmp.name, 'metadata.csv')
+
+        with FakeEZIDServer() as server, self.handler_for(server, workers=4) as handler:
+            results = handler.create_batch_from_csv(self.input_csv, output_csv)
+            handler.get_arks(output_csv, metadata_csv)
+            status_csv = handler.batch_switch_status(output_csv, 'public')
+
+            self.assertEqual(server.stats['minted'], 20)
+            self.assertEqual(server.stats['updated'], 20)
+            self.assertTrue(all(record['_status'] == 'public' for record in server.records.values()))
+
+        self.assertTrue(all(r['ark'].startswith('https://n2t.net/ark:/99999/fk4') for r in results))
+        with open(metadata_csv, newline='') as f:
+            metadata = list(csv.DictReader(f))
+        self.assertEqual([m['_target'] for m in metadata], [r['where'] for r in results])
+        self.assertEqual({m['_status'] for m in metadata}, {'reserved'})
+        with open(status_csv, newline='') as f:
+            self.assertEqual({row['Success'] for row in csv.DictReader(f)}, {'True'})
+
+    # -------------------------------------- #
+
+    def test_throttled_and_failing_requests_are_retried(self):
+        '''
+        Test that throttling and server errors are retried until every row is minted.
+        '''
+        output_csv = os.path.join(self.tmp.name, 'output.csv')
+
+        with FakeEZIDServer(throttle_rate=200, error_rate=0.2, retry_after=0, seed=1) as server:
+            with self.handler_for(server, workers=8, max_attempts=10) as handler:
+                handler.retry_policy.base_delay = 0.01
+                results = handler.create_batch_from_csv(self.input_csv, output_csv)
+
+            self.assertGreater(server.stats['errors'] + server.stats['throttled'], 0)
+            self.assertEqual(server.stats['minted'], 20)
+
+        self.assertTrue(all(r['ark'] for r in results))
+
+    # -------------------------------------- #
+
+    def test_unknown_ark(self):
+        with FakeEZIDServer() as server, self.handler_for(server) as handler:
+            record = handler.fetch_ark('ark:/99999/fk4missing')
+            success, message = handler.switch_status('ark:/99999/fk4missing', 'public')
+
+        self.assertEqual(record['error'], 'bad request - no such identifier')
+        self.assertFalse(success)
+        self.assertIn("failed with 400", message)
+
+
+if __name__ == '__main__':
+    unittest.main()
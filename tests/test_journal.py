@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+from tamu_id_minter.ezid.journal import Journal
+
+
+class TestJournal(unittest.TestCase):
+
+    ''' Testcases for the append-only batch journal. '''
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'output.csv.journal.jsonl')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    # -------------------------------------- #
+
+    def test_append_and_resume(self):
+        '''
+        Test that appended results are read back when resuming.
+        '''
+        journal = Journal(self.path)
+        journal.append(0, {'ark': 'https://n2t.net/ark:/81423/a'})
+        journal.append(2, {'ark': 'https://n2t.net/ark:/81423/c'})
+        journal.close()
+
+        resumed = Journal(self.path, resume=True)
+        self.assertEqual(resumed.get(0), {'ark': 'https://n2t.net/ark:/81423/a'})
+        self.assertIsNone(resumed.get(1))
+        self.assertEqual(resumed.get(2), {'ark': 'https://n2t.net/ark:/81423/c'})
+
+    # -------------------------------------- #
+
+    def test_truncated_line_is_ignored(self):
+        '''
+        Test that a line cut short by a crash does not stop the journal from loading.
+        '''
+        with open(self.path, 'w') as f:
+            f.write('{"row": 0, "result": {"ark": "x"}}\n{"row": 1, "res')
+
+        resumed = Journal(self.path, resume=True)
+        self.assertEqual(resumed.entries, {0: {'ark': 'x'}})
+
+    # -------------------------------------- #
+
+    def test_existing_journal_requires_resume(self):
+        '''
+        Test that an unfinished run's journal is never silently overwritten.
+        '''
+        Journal(self.path).append(0, {'ark': 'x'})
+
+        with self.assertRaises(FileExistsError):
+            Journal(self.path)
+
+    # -------------------------------------- #
+
+    def test_finish_removes_journal(self):
+        journal = Journal(self.path)
+        journal.append(0, {'ark': 'x'})
+        journal.finish()
+
+        self.assertFalse(os.path.exists(self.path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+import json
+import os
+import tempfile
+import unittest
+from click.testing import CliRunner
+from tamu_id_minter.ezid.ezid import EZIDARKHandler
+from tamu_id_minter.ezid.fake_server import FakeEZIDServer
+from tamu_id_minter.metrics import RunMetrics, error_class
+from tamu_id_minter.mint import generate_crossref_deposit
+
+
+class TestMetrics(unittest.TestCase):
+    ''' Testcases for run metrics and their JSON / Prometheus export. '''
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    # -------------------------------------- #
+
+    def test_error_class(self):
+        '''
+        Test that error messages are reduced to short labels.
+        '''
+        self.assertEqual(error_class('error: bad request - no such identifier'), 'bad_request')
+        self.assertEqual(error_class('error: unauthorized'), 'unauthorized')
+        self.assertEqual(error_class(''), 'unknown')
+
+    # -------------------------------------- #
+
+    def test_json_and_prometheus_export(self):
+        '''
+        Test that counters and the latency histogram are saved in both formats.
+        '''
+        metrics = RunMetrics('create_arks')
+        metrics.observe_request('post', 201, 0.02)
+        metrics.observe_request('post', 503, 0.3)
+        metrics.count('retries', reason='http_503')
+        metrics.row('success')
+        metrics.row('failure', 'bad_request')
+        metrics.finish(success=True)
+
+        json_file = os.path.join(self.tmp.name, 'run.json')
+        prom_file = os.path.join(self.tmp.name, 'run.prom')
+        metrics.save(json_file)
+        metrics.save(prom_file)
+        with open(json_file) as f:
+            data = json.load(f)
+        with open(prom_file) as f:
+            prom = f.read()
+
+        self.assertEqual(data['rows'], 2)
+        self.assertTrue(data['success'])
+        self.assertEqual(data['http_request_duration_seconds']['buckets']['0.025'], 1)
+        self.assertEqual(data['http_request_duration_seconds']['buckets']['0.5'], 2)
+        self.assertIn({'outcome': 'failure', 'error': 'bad_request', 'value': 1}, data['counters']['rows'])
+        self.assertIn('tamu_mint_last_run_success{command="create_arks"} 1', prom)
+        self.assertIn('tamu_mint_http_requests{command="create_arks",method="POST",status="503"} 1', prom)
+        self.assertIn('tamu_mint_rows{command="create_arks",error="bad_request",outcome="failure"} 1', prom)
+        self.assertIn('tamu_mint_http_request_duration_seconds_bucket{command="create_arks",le="+Inf"} 2', prom)
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ['run.json', 'run.prom'])
+
+    # -------------------------------------- #
+
+    @unittest.skipIf(os.name == 'nt', 'POSIX file modes')
+    def test_saved_file_follows_umask(self):
+        '''
+        Test that the metrics file gets the umask's permissions rather than mkstemp's private 0600.
+        '''
+        path = os.path.join(self.tmp.name, 'run.prom')
+        previous = os.umask(0o022)
+        try:
+            RunMetrics('create_arks').save(path)
+        finally:
+            os.umask(previous)
+
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o644)
+
+    # -------------------------------------- #
+
+    def test_ezid_handler_reports_requests_retries_and_outcomes(self):
+        '''
+        Test that minting against a failing fake EZID counts retries, every request and the row outcomes.
+        '''
+        input_csv = os.path.join(self.tmp.name, 'input.csv')
+        with open(input_csv, 'w') as f:
+            f.write("who,what,when,where\n")
+            for i in range(20):
+                f.write(f"Name {i},Doc {i},2025,http://example.com/{i}\n")
+        metrics = RunMetrics('create_arks')
+
+        with FakeEZIDServer(error_rate=0.2, seed=1) as server:
+            with EZIDARKHandler(shoulder_url=server.shoulder_url, base_url=server.url, workers=4,
+                                max_attempts=10, metrics=metrics) as handler:
+                handler.retry_policy.base_delay = 0.01
+                handler.create_batch_from_csv(input_csv, os.path.join(self.tmp.name, 'output.csv'))
+                handler.fetch_ark('ark:/99999/fk4missing')
+            requests_seen = server.stats['requests']
+
+        data = metrics.as_dict()
+        self.assertEqual(metrics.total('http_requests'), requests_seen)
+        self.assertEqual(metrics.total('retries'), server.stats['errors'])
+        self.assertGreater(metrics.total('retries'), 0)
+        self.assertIn({'outcome': 'success', 'value': 20}, data['counters']['rows'])
+        self.assertIn({'outcome': 'failure', 'error': 'bad_request', 'value': 1}, data['counters']['rows'])
+
+    # -------------------------------------- #
+
+    def test_cli_writes_metrics_for_successful_and_failed_runs(self):
+        '''
+        Test that generate_crossref_deposit --metrics_file writes metrics, marking a failed run as unsuccessful.
+        '''
+        input_csv = os.path.join(self.tmp.name, 'input.csv')
+        bad_csv = os.path.join(self.tmp.name, 'bad.csv')
+        with open(input_csv, 'w', encoding='utf-8') as f:
+            f.write("Title,Contributor,Acceptance date,DOI,Resource\n"
+                    "A,Ann Lee,2025-01-01,10.1234/a,https://example.com/a\n"
+                    "B,Bo Li,2025-01-01,10.1234/b,https://example.com/a\n")
+        with open(bad_csv, 'w', encoding='utf-8') as f:
+            f.write("Title,DOI\nA,10.1234/a\n")
+        prom_file = os.path.join(self.tmp.name, 'metrics', 'deposit.prom')
+        runner = CliRunner()
+
+        result = runner.invoke(generate_crossref_deposit, [
+            '-i', input_csv, '-t', 'report', '-o', os.path.join(self.tmp.name, 'out.xml'),
+            '--no_registry', '--metrics_file', prom_file
+        ])
+        with open(prom_file) as f:
+            succeeded = f.read()
+        failed = runner.invoke(generate_crossref_deposit, [
+            '-i', bad_csv, '-t', 'report', '-o', os.path.join(self.tmp.name, 'bad.xml'),
+            '--no_registry', '--metrics_file', prom_file
+        ])
+        with open(prom_file) as f:
+            failure = f.read()
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('tamu_mint_rows{command="generate_crossref_deposit",outcome="deposited"} 2', succeeded)
+        self.assertIn('tamu_mint_duplicates{command="generate_crossref_deposit",column="Resource",kind="batch"} 1',
+                      succeeded)
+        self.assertIn('tamu_mint_last_run_success{command="generate_crossref_deposit"} 1', succeeded)
+        self.assertNotEqual(failed.exit_code, 0)
+        self.assertIn('tamu_mint_last_run_success{command="generate_crossref_deposit"} 0', failure)
+
+
+if __name__ == '__main__':
+    unittest.main()
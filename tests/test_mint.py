@@ -1,8 +1,13 @@
+import os
+import tempfile
 import unittest
 from unittest import result
 from unittest.mock import patch, MagicMock
 from click.testing import CliRunner
-from tamu_id_minter.mint import cli, create_arks, get_ark, switch_statuses, generate_crossref_deposit
+from tamu_id_minter.crossref.fake_server import FakeCrossrefServer
+from tamu_id_minter.mint import (cli, create_arks, get_ark, get_arks, switch_statuses, generate_crossref_deposit,
+                               submit_crossref_deposit, validate_crossref_csv, lookup)
+from tamu_id_minter.registry import IdentifierRegistry
 
 class TestMint(unittest.TestCase):
     
@@ -20,10 +25,11 @@ class TestMint(unittest.TestCase):
 
     # -------------------------------------- #
 
-    @patch('tamu_id_minter.mint.EZIDARKHandler')
+    @patch('tamu_id_minter.ezid.ezid.EZIDARKHandler')
     def test_create_arks_calls_handler(self, mock_handler_class):
         '''Test that create_arks command calls the handler.'''
         mock_handler = MagicMock()
+        mock_handler.__enter__.return_value = mock_handler
         mock_handler.create_batch_from_csv.return_value = []
         mock_handler_class.return_value = mock_handler
 
@@ -34,10 +40,28 @@ class TestMint(unittest.TestCase):
 
     # -------------------------------------- #
 
-    @patch('tamu_id_minter.mint.EZIDARKHandler')
+    @patch('tamu_id_minter.ezid.ezid.EZIDARKHandler')
+    def test_create_arks_stream_calls_handler(self, mock_handler_class):
+        '''Test that create_arks --stream uses the streaming handler method.'''
+        mock_handler = MagicMock()
+        mock_handler.__enter__.return_value = mock_handler
+        mock_handler.stream_batch_from_csv.return_value = 3
+        mock_handler_class.return_value = mock_handler
+
+        result = self.runner.invoke(create_arks, ['-i', 'test.csv', '--stream', '-w', '4'])
+
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn("Processed 3 records", result.output)
+        mock_handler.stream_batch_from_csv.assert_called_once_with('test.csv', 'output.csv', resume=False)
+        mock_handler.create_batch_from_csv.assert_not_called()
+
+    # -------------------------------------- #
+
+    @patch('tamu_id_minter.ezid.ezid.EZIDARKHandler')
     def test_get_ark_calls_handler(self, mock_handler_class):
         '''Test that get_ark command calls the handler.'''
         mock_handler = MagicMock()
+        mock_handler.__enter__.return_value = mock_handler
         mock_handler_class.return_value = mock_handler
 
         result = self.runner.invoke(get_ark, ['-a', 'ark:/81423/test'])
@@ -47,10 +71,28 @@ class TestMint(unittest.TestCase):
 
     # -------------------------------------- #
 
-    @patch('tamu_id_minter.mint.EZIDARKHandler')
+    @patch('tamu_id_minter.ezid.ezid.EZIDARKHandler')
+    def test_get_arks_calls_handler(self, mock_handler_class):
+        '''Test that get_arks command calls the handler with the requested workers.'''
+        mock_handler = MagicMock()
+        mock_handler.__enter__.return_value = mock_handler
+        mock_handler.get_arks.return_value = 2
+        mock_handler_class.return_value = mock_handler
+
+        result = self.runner.invoke(get_arks, ['-i', 'arks.csv', '-o', 'metadata.jsonl', '-w', '4'])
+
+        self.assertEqual(result.exit_code, 0)
+        mock_handler_class.assert_called_once_with(workers=4, metrics=None)
+        mock_handler.get_arks.assert_called_once_with('arks.csv', 'metadata.jsonl')
+        self.assertIn("Fetched 2 records", result.output)
+
+    # -------------------------------------- #
+
+    @patch('tamu_id_minter.ezid.ezid.EZIDARKHandler')
     def test_switch_statuses_calls_handler(self, mock_handler_class):
         '''Test that switch_statuses command calls the handler.'''
         mock_handler = MagicMock()
+        mock_handler.__enter__.return_value = mock_handler
         mock_handler_class.return_value = mock_handler
 
         result = self.runner.invoke(switch_statuses, ['-i', 'test.csv', '-s', 'public'])
@@ -60,12 +102,15 @@ class TestMint(unittest.TestCase):
 
     # -------------------------------------- #
 
-    @patch('tamu_id_minter.mint.CrossrefDepositHandler')
+    @patch('tamu_id_minter.crossref.crossref.CrossrefDepositHandler')
     def test_generate_crossref_deposit_calls_handler(self, mock_handler_class):
         '''Test that generate_crossref_deposit command calls the handler.'''
         mock_handler = MagicMock()
         mock_handler.create_batch_from_csv.return_value = 'output.xml'
         mock_handler.completed = []
+        mock_handler.contributor_cache.stats.return_value = {'hits': 3, 'misses': 1, 'hit_rate': 0.75}
+        mock_handler.date_parser.stats.return_value = {'slash_order': None, 'conflict': False, 'ambiguous_rows': 0, 'ambiguous_dates': [],
+                                                        'mismatched_rows': 0, 'mismatched_dates': []}
         mock_handler_class.return_value = mock_handler
 
         result = self.runner.invoke(generate_crossref_deposit, [
@@ -75,6 +120,93 @@ class TestMint(unittest.TestCase):
 
         self.assertEqual(result.exit_code, 0)
         mock_handler.create_batch_from_csv.assert_called_once()
+        self.assertIn('Contributor cache: 3 hits, 1 misses (75.0% hit rate)', result.output)
+
+    # -------------------------------------- #
+
+    def test_generate_crossref_deposit_incremental(self):
+        '''Test that an incremental rerun of generate_crossref_deposit skips unchanged rows once their submission succeeded.'''
+        with tempfile.TemporaryDirectory() as tmp:
+            input_csv = os.path.join(tmp, 'input.csv')
+            cache = os.path.join(tmp, 'cache.sqlite3')
+            deposit = os.path.join(tmp, 'out.xml')
+            with open(input_csv, 'w', encoding='utf-8') as f:
+                f.write("Title,Contributor,Acceptance date,DOI,Resource\n"
+                        "A,Ann Lee,2025-01-01,10.1234/a,https://example.com/a\n")
+            args = ['-i', input_csv, '-t', 'report', '-o', deposit, '--no_registry',
+                    '--deposit_cache', cache, '--incremental']
+            first = self.runner.invoke(generate_crossref_deposit, args)
+            unsubmitted = self.runner.invoke(generate_crossref_deposit, args)
+            with FakeCrossrefServer() as server, \
+                    patch.dict(os.environ, {'CROSSREF_DEPOSIT_URL': server.deposit_url,
+                                            'CROSSREF_STATUS_URL': server.status_url}):
+                submitted = self.runner.invoke(submit_crossref_deposit, [
+                    '-i', deposit, '-o', os.path.join(tmp, 'results.csv'), '--poll_interval', '0.01',
+                    '--deposit_cache', cache])
+            second = self.runner.invoke(generate_crossref_deposit, args)
+            no_cache = self.runner.invoke(generate_crossref_deposit, args[:-3] + ['--incremental'])
+
+        self.assertEqual(first.exit_code, 0)
+        self.assertIn('Processed 1 records', first.output)
+        self.assertIn('Processed 1 records', unsubmitted.output)
+        self.assertIn('Confirmed 1 DOIs in the deposit cache', submitted.output)
+        self.assertIn('Processed 0 records', second.output)
+        self.assertIn('Skipped 1 unchanged records', second.output)
+        self.assertEqual(no_cache.exit_code, 2)
+
+    # -------------------------------------- #
+
+    def test_generate_crossref_deposit_resource_update(self):
+        '''Test that a URL update file skips the contributor cache report and can't be generated incrementally.'''
+        with tempfile.TemporaryDirectory() as tmp:
+            input_csv = os.path.join(tmp, 'moved.csv')
+            with open(input_csv, 'w', encoding='utf-8') as f:
+                f.write("DOI,Resource\n10.1234/a,https://example.com/a\n")
+            args = ['-i', input_csv, '-t', 'resource_update', '-o', os.path.join(tmp, 'moved.txt'), '--no_registry']
+            generated = self.runner.invoke(generate_crossref_deposit, args)
+            incremental = self.runner.invoke(generate_crossref_deposit, args + [
+                '--deposit_cache', os.path.join(tmp, 'cache.sqlite3'), '--incremental'])
+
+        self.assertEqual(generated.exit_code, 0)
+        self.assertIn('Generated Crossref URL update file', generated.output)
+        self.assertNotIn('Contributor cache', generated.output)
+        self.assertEqual(incremental.exit_code, 2)
+        self.assertIn("--incremental can't be used with resource_update", incremental.output)
+
+    # -------------------------------------- #
+
+    def test_validate_crossref_csv_fails_with_errors(self):
+        '''Test that validate_crossref_csv prints every error and exits non-zero.'''
+        with tempfile.TemporaryDirectory() as tmp:
+            input_csv = os.path.join(tmp, 'input.csv')
+            with open(input_csv, 'w', encoding='utf-8') as f:
+                f.write("Title,Contributor,Acceptance date,DOI,Resource\n"
+                        "A,Ann Lee,2025-01-01,10.1234/a,https://example.com/a\n"
+                        "B,Bo Li,someday,10.1234/b,https://example.com/b\n")
+            result = self.runner.invoke(validate_crossref_csv, ['-i', input_csv])
+
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn('Row 3, Acceptance date: Unable to parse date: someday', result.output)
+        self.assertIn('1 errors found in 2 rows', result.output)
+
+    # -------------------------------------- #
+
+    def test_lookup_finds_registered_identifiers(self):
+        '''Test that lookup answers from the registry and needs exactly one query.'''
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'registry.sqlite3')
+            with IdentifierRegistry(path) as registry:
+                registry.add('ark:/81423/d2a', 'ark', 'https://example.com/a', 'output.csv')
+
+            found = self.runner.invoke(lookup, ['--ark', 'https://n2t.net/ark:/81423/d2a', '--registry', path])
+            missing = self.runner.invoke(lookup, ['--target', 'https://example.com/b', '--registry', path])
+            ambiguous = self.runner.invoke(lookup, ['--ark', 'a', '--doi', 'b', '--registry', path])
+
+        self.assertEqual(found.exit_code, 0)
+        self.assertIn('ark:/81423/d2a\thttps://example.com/a\toutput.csv', found.output)
+        self.assertEqual(missing.exit_code, 1)
+        self.assertIn('No identifiers found', missing.output)
+        self.assertEqual(ambiguous.exit_code, 2)
 
     # -------------------------------------- #
 
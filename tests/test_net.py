@@ -0,0 +1,75 @@
+import unittest
+from unittest.mock import patch
+from tamu_id_minter.net import (
+    RateLimiter,
+    RetryPolicy,
+    parse_retry_after,
+)
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    ''' Testcases for the shared token bucket. '''
+
+    @patch('tamu_id_minter.net.time.monotonic', return_value=100.0)
+    def test_reserve_spends_burst_then_waits(self, mock_monotonic):
+        '''
+        Test that the bucket allows a burst and then asks callers to wait.
+        '''
+        limiter = RateLimiter(rate=2, burst=2)
+
+        self.assertEqual(limiter.reserve(), 0.0)
+        self.assertEqual(limiter.reserve(), 0.0)
+        self.assertAlmostEqual(limiter.reserve(), 0.5)
+        self.assertAlmostEqual(limiter.reserve(), 1.0)
+
+    # -------------------------------------- #
+
+    def test_penalize_and_reward_adapt_rate(self):
+        '''
+        Test that throttling halves the rate and successes restore it up to the ceiling.
+        '''
+        limiter = RateLimiter(rate=10, min_rate=3)
+
+        limiter.penalize()
+        self.assertEqual(limiter.rate, 5)
+        limiter.penalize()
+        self.assertEqual(limiter.rate, 3)
+
+        for _ in range(50):
+            limiter.reward()
+        self.assertEqual(limiter.rate, 10)
+
+
+class TestRetryPolicy(unittest.TestCase):
+
+    ''' Testcases for retry decisions and backoff delays. '''
+
+    def test_should_retry(self):
+        policy = RetryPolicy()
+        for status in (429, 500, 502, 503, 504):
+            self.assertTrue(policy.should_retry(status))
+        for status in (200, 201, 400, 401, 404):
+            self.assertFalse(policy.should_retry(status))
+
+    # -------------------------------------- #
+
+    def test_delay_is_bounded_and_honors_retry_after(self):
+        policy = RetryPolicy(base_delay=1, max_delay=10)
+
+        for attempt in range(6):
+            self.assertLessEqual(policy.delay(attempt), min(10, 2 ** attempt))
+        self.assertGreaterEqual(policy.delay(0, retry_after="7"), 7)
+        self.assertEqual(policy.delay(0, retry_after="3600"), 10)
+
+    # -------------------------------------- #
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after(None), 0.0)
+        self.assertEqual(parse_retry_after("5"), 5.0)
+        self.assertEqual(parse_retry_after("not a date"), 0.0)
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
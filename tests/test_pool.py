@@ -0,0 +1,57 @@
+import threading
+import time
+import unittest
+from tamu_id_minter.pool import chunked, ordered_map
+
+
+class TestOrderedMap(unittest.TestCase):
+
+    ''' Testcases for the bounded, order-preserving thread pool map. '''
+
+    def test_results_keep_input_order(self):
+        '''
+        Test that results come back in input order even when later items finish first.
+        '''
+        def slow_for_small(n):
+            time.sleep(0.001 * (10 - n))
+            return n * n
+
+        self.assertEqual(list(ordered_map(slow_for_small, range(10), workers=4)),
+                         [n * n for n in range(10)])
+
+    # -------------------------------------- #
+
+    def test_reads_at_most_window_ahead(self):
+        '''
+        Test that the input is consumed lazily, never more than the window ahead of the caller.
+        '''
+        consumed = []
+        lock = threading.Lock()
+
+        def items():
+            for n in range(100):
+                with lock:
+                    consumed.append(n)
+                yield n
+
+        results = ordered_map(lambda n: n, items(), workers=2, window=4)
+        for n, result in enumerate(results):
+            self.assertEqual(result, n)
+            self.assertLessEqual(len(consumed), n + 5)
+
+    # -------------------------------------- #
+
+    def test_single_worker_runs_inline(self):
+        thread_ids = set(ordered_map(lambda n: threading.get_ident(), range(3), workers=1))
+        self.assertEqual(thread_ids, {threading.get_ident()})
+
+
+    # -------------------------------------- #
+
+    def test_chunked(self):
+        self.assertEqual(list(chunked(range(7), 3)), [[0, 1, 2], [3, 4, 5], [6]])
+        self.assertEqual(list(chunked([], 3)), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
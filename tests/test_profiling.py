@@ -0,0 +1,118 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+from click.testing import CliRunner
+from tamu_id_minter import profiling
+from tamu_id_minter.mint import cli
+from tamu_id_minter.profiling import NULL_STAGE, Profiler, StageTimer, stage, timed_iter
+
+
+class TestProfiling(unittest.TestCase):
+    ''' Testcases for stage timing and the --profile switch. '''
+
+    # -------------------------------------- #
+
+    def test_stages_are_no_ops_when_profiling_is_off(self):
+        '''
+        Test that stage and timed_iter cost nothing without an active profiler.
+        '''
+        items = [1, 2, 3]
+
+        self.assertIsNone(profiling._active)
+        self.assertIs(stage('http'), NULL_STAGE)
+        self.assertIs(timed_iter('read_csv', items), items)
+
+    # -------------------------------------- #
+
+    def test_nested_stages_are_not_counted_twice(self):
+        '''
+        Test that time in an inner stage is charged to it and not to the stage around it.
+        '''
+        timer = StageTimer()
+        with timer.stage('outer'):
+            time.sleep(0.02)
+            with timer.stage('inner'):
+                time.sleep(0.05)
+        totals = timer.totals()
+
+        self.assertEqual(totals['outer'][0], 1)
+        self.assertEqual(totals['inner'][0], 1)
+        self.assertGreaterEqual(totals['inner'][1], 0.05)
+        self.assertLess(totals['outer'][1], 0.045)
+
+    # -------------------------------------- #
+
+    def test_wrap_times_each_step_and_threads_are_summed(self):
+        '''
+        Test that wrapped iterables count one call per step and totals merge across threads.
+        '''
+        timer = StageTimer()
+
+        def work():
+            with timer.stage('http'):
+                time.sleep(0.01)
+
+        threads = [threading.Thread(target=work) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        items = list(timer.wrap('read_csv', iter(range(4))))
+        totals = timer.totals()
+
+        self.assertEqual(items, [0, 1, 2, 3])
+        self.assertEqual(totals['read_csv'][0], 5)
+        self.assertEqual(totals['http'][0], 3)
+        self.assertIn('http', timer.report())
+
+    # -------------------------------------- #
+
+    def test_profiler_writes_stats_and_memory_peak(self):
+        '''
+        Test that the profiler prints the breakdown, dumps cProfile stats and reports the memory peak.
+        '''
+        with tempfile.TemporaryDirectory() as tmp:
+            stats_file = os.path.join(tmp, 'run.prof')
+            profiler = Profiler(stats_file=stats_file, trace_memory=True).start()
+            try:
+                with stage('build_record'):
+                    [str(i) for i in range(1000)]
+            finally:
+                with patch('builtins.print') as mock_print:
+                    profiler.finish()
+            output = "\n".join(str(call.args[0]) for call in mock_print.call_args_list)
+            written = os.path.getsize(stats_file)
+
+        self.assertIsNone(profiling._active)
+        self.assertGreater(written, 0)
+        self.assertIn('build_record', output)
+        self.assertIn('Peak traced memory', output)
+
+    # -------------------------------------- #
+
+    def test_cli_profile_prints_stage_breakdown(self):
+        '''
+        Test that tamu_mint --profile prints each Crossref stage after the command's own output.
+        '''
+        with tempfile.TemporaryDirectory() as tmp:
+            input_csv = os.path.join(tmp, 'input.csv')
+            with open(input_csv, 'w', encoding='utf-8') as f:
+                f.write("Title,Contributor,Acceptance date,DOI,Resource\n"
+                        "A,Ann Lee,2025-01-01,10.1234/a,https://example.com/a\n")
+            result = CliRunner().invoke(cli, [
+                '--profile', 'generate_crossref_deposit', '-i', input_csv, '-t', 'report',
+                '-o', os.path.join(tmp, 'out.xml'), '--no_registry'
+            ])
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertLess(result.output.index('Processed 1 records'), result.output.index('Stage timings:'))
+        for name in ('read_csv', 'parse_contributors', 'parse_dates', 'build_record', 'serialize', 'write_xml'):
+            self.assertIn(name, result.output)
+        self.assertIsNone(profiling._active)
+
+
+if __name__ == '__main__':
+    unittest.main()
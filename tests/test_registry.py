@@ -0,0 +1,105 @@
+import os
+import tempfile
+import unittest
+from tamu_id_minter.registry import IdentifierRegistry
+
+
+class TestIdentifierRegistry(unittest.TestCase):
+    ''' Testcases for the local identifier registry. '''
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'registry.sqlite3')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    # -------------------------------------- #
+
+    def test_connection_is_opened_lazily(self):
+        '''
+        Test that creating a registry does not touch the database until it is used.
+        '''
+        registry = IdentifierRegistry(self.path)
+
+        self.assertFalse(os.path.exists(self.path))
+        self.assertFalse(registry.contains('10.1234/a'))
+        self.assertTrue(os.path.exists(self.path))
+        registry.close()
+
+    # -------------------------------------- #
+
+    def test_add_and_lookup_dois_case_insensitively(self):
+        '''
+        Test that DOIs are found whatever their case and that entries persist after commit.
+        '''
+        with IdentifierRegistry(self.path) as registry:
+            registry.add('10.1234/ABC', 'doi', 'https://example.com/abc', 'BATCH-1')
+
+        with IdentifierRegistry(self.path) as registry:
+            entry = registry.get('10.1234/abc')
+            found = registry.contains('10.1234/Abc')
+            missing = registry.contains('10.1234/other')
+
+        self.assertEqual(entry['target'], 'https://example.com/abc')
+        self.assertEqual(entry['batch'], 'BATCH-1')
+        self.assertTrue(found)
+        self.assertFalse(missing)
+
+    # -------------------------------------- #
+
+    def test_rollback_discards_uncommitted_entries(self):
+        '''
+        Test that entries added during a failed batch are not kept.
+        '''
+        registry = IdentifierRegistry(self.path)
+        registry.add('10.1234/a', 'doi')
+        registry.rollback()
+
+        self.assertFalse(registry.contains('10.1234/a'))
+        registry.close()
+
+
+    # -------------------------------------- #
+
+    def test_find_by_identifier_target_and_batch(self):
+        '''
+        Test that entries can be found by identifier, target URL or batch, and that other columns are refused.
+        '''
+        with IdentifierRegistry(self.path) as registry:
+            registry.add('ark:/81423/d2a', 'ark', 'https://example.com/a', 'output.csv')
+            registry.add('10.1234/A', 'doi', 'https://example.com/a', 'TAMU-REPORT-1')
+
+            self.assertEqual(registry.find('identifier', '10.1234/a')[0]['batch'], 'TAMU-REPORT-1')
+            self.assertEqual(registry.find('identifier', 'ark:/81423/d2a')[0]['scheme'], 'ark')
+            self.assertEqual(len(registry.find('target', 'https://example.com/a')), 2)
+            self.assertEqual(registry.find('batch', 'output.csv')[0]['identifier'], 'ark:/81423/d2a')
+            with self.assertRaises(ValueError):
+                registry.find('scheme', 'ark')
+
+    # -------------------------------------- #
+
+    def test_seed_from_output_csv(self):
+        '''
+        Test that ARKs from a create_arks output CSV are added once, keeping targets that already have an ARK.
+        '''
+        output_csv = os.path.join(self.tmp.name, 'output.csv')
+        with open(output_csv, 'w', newline='') as f:
+            f.write("who,what,when,where,message,ark\n")
+            f.write("A,a,2025,http://example.com/a,success: ark:/81423/d2a,https://n2t.net/ark:/81423/d2a\n")
+            f.write("B,b,2025,http://example.com/b,error: bad request,\n")
+            f.write("C,c,2025,http://example.com/c,success: ark:/81423/d2c,https://n2t.net/ark:/81423/d2c\n")
+
+        with IdentifierRegistry(self.path) as registry:
+            registry.add('ark:/81423/d2old', 'ark', 'http://example.com/c', 'older.csv')
+            added = registry.seed_from_csv(output_csv)
+            added_again = registry.seed_from_csv(output_csv)
+
+            self.assertEqual(added, 1)
+            self.assertEqual(added_again, 0)
+            self.assertEqual(registry.ark_for_target('http://example.com/a'), 'ark:/81423/d2a')
+            self.assertEqual(registry.ark_for_target('http://example.com/c'), 'ark:/81423/d2old')
+            self.assertIsNone(registry.ark_for_target('http://example.com/b'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import json
+import subprocess
+import sys
+import time
+import unittest
+
+# Modules only the command bodies need; loading the CLI must not import them
+HEAVY_MODULES = ['requests', 'tqdm', 'httpx', 'sqlite3', 'xml.etree.ElementTree', 'xml.dom.minidom']
+
+# Most `tamu_mint --help` may take beyond importing click itself
+STARTUP_BUDGET_S = 0.1
+
+
+def best_wall_time(code, runs=3):
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], check=True, capture_output=True)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+class TestStartup(unittest.TestCase):
+    ''' Regression tests for CLI startup cost. '''
+
+    # -------------------------------------- #
+
+    def test_cli_import_is_lazy(self):
+        '''
+        Test that importing the package and the CLI leaves the handlers' dependencies unloaded.
+        '''
+        code = (
+            "import json, sys, tamu_id_minter, tamu_id_minter.mint; "
+            f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+        )
+        output = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True).stdout
+
+        self.assertEqual(json.loads(output), [])
+
+    # -------------------------------------- #
+
+    def test_lazy_exports_still_resolve(self):
+        '''
+        Test that the package still exposes its handlers by name.
+        '''
+        import tamu_id_minter
+        from tamu_id_minter.ezid.ezid import EZIDARKHandler
+        from tamu_id_minter.crossref.crossref import CrossrefDepositHandler
+
+        self.assertIs(tamu_id_minter.EZIDARKHandler, EZIDARKHandler)
+        self.assertIs(tamu_id_minter.CrossrefDepositHandler, CrossrefDepositHandler)
+        self.assertIn('EZIDARKHandler', dir(tamu_id_minter))
+        with self.assertRaises(AttributeError):
+            tamu_id_minter.NoSuchHandler
+
+    # -------------------------------------- #
+
+    def test_help_within_budget(self):
+        '''
+        Test that `tamu_mint --help` costs little more than starting Python with click.
+        '''
+        baseline = best_wall_time("import click")
+        help_time = best_wall_time("from tamu_id_minter.mint import cli; cli(['--help'])")
+
+        self.assertLess(help_time - baseline, STARTUP_BUDGET_S)
+
+
+if __name__ == '__main__':
+    unittest.main()
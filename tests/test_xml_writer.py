@@ -0,0 +1,129 @@
+import io
+import unittest
+from unittest.mock import patch
+from xml.dom import minidom
+from xml.etree.ElementTree import Element, SubElement, tostring
+from tamu_id_minter.crossref.crossref import CrossrefDepositHandler
+from tamu_id_minter.crossref.writer import DepositXMLWriter, render_element
+
+
+def minidom_prettify(elem):
+    '''The tostring/minidom round-trip the writer replaces, used as the reference output.'''
+    return minidom.parseString(tostring(elem, encoding='utf-8')).toprettyxml(indent="  ", encoding='utf-8').decode('utf-8')
+
+
+class TestDepositXMLWriter(unittest.TestCase):
+
+    ''' Testcases for the streaming deposit writer. '''
+
+    def setUp(self):
+        self.handler = CrossrefDepositHandler()
+        self.metadata = [
+            {
+                'title': 'Rock & Roll <Live> "Quoted" Ünïcödé',
+                'contributor': 'Smith, Jane and Bob Q. Public and Cher',
+                'acceptance_date': '2025-01-31',
+                'doi': 'https://doi.org/10.1234/example.1',
+                'resource': 'https://example.com/item?a=1&b=2',
+            },
+            {
+                'title': 'Second Title',
+                'contributor': 'Doe, John',
+                'acceptance_date': '12/25/2024',
+                'doi': '10.1234/example.2',
+                'resource': 'https://example.com/item/2',
+            },
+        ]
+
+    # -------------------------------------- #
+
+    def test_render_matches_minidom(self):
+        '''
+        Test that rendering an element matches the minidom round-trip byte for byte,
+        including escaping, empty elements and text mixed with children.
+        '''
+        root = Element('root', {'a': 'x & "y" <z>', 'xmlns:q': 'urn:q', 'q:b': '1', 'xmlns': 'urn:default'})
+        SubElement(root, 'empty')
+        SubElement(root, 'blank').text = ''
+        SubElement(root, 'text').text = 'a < b & c > d "e"\r\nnext'
+        mixed = SubElement(root, 'mixed')
+        mixed.text = 'lead'
+        child = SubElement(mixed, 'child')
+        child.tail = 'tail'
+
+        expected = minidom_prettify(root)
+        actual = '<?xml version="1.0" encoding="utf-8"?>\n' + render_element(root)
+
+        self.assertEqual(actual, expected)
+
+    # -------------------------------------- #
+
+    def test_streamed_deposit_matches_in_memory_deposit(self):
+        '''
+        Test that the streamed file is identical to the whole-tree minidom output for both content types.
+        '''
+        for content_type in ('pending_publication', 'report'):
+            with patch('tamu_id_minter.crossref.templates.datetime') as mock_template_dt, \
+                    patch('tamu_id_minter.crossref.crossref.datetime') as mock_handler_dt:
+                mock_template_dt.now.return_value.strftime.return_value = '20260105123456'
+                mock_template_dt.strptime.side_effect = __import__('datetime').datetime.strptime
+                mock_handler_dt.now.return_value.strftime.return_value = '20260105123456'
+
+                template = self.handler.create_template(content_type)
+                root = template.create_doi_batch('TAMU Libraries', 'depositor@library.tamu.edu',
+                                                 'Texas A&M University', 'TAMU-BATCH-20260105123456')
+                body = SubElement(root, 'body')
+                for metadata in self.metadata:
+                    self.handler.add_record(template, content_type, body, metadata)
+                expected = minidom_prettify(root)
+
+                stream = io.StringIO()
+                writer = DepositXMLWriter(stream)
+                writer.start(template.create_doi_batch('TAMU Libraries', 'depositor@library.tamu.edu',
+                                                       'Texas A&M University', 'TAMU-BATCH-20260105123456'))
+                for metadata in self.metadata:
+                    writer.write_record(self.handler.build_record(template, content_type, metadata))
+                writer.close()
+
+            self.assertEqual(stream.getvalue(), expected)
+            self.assertEqual(writer.records, 2)
+
+    # -------------------------------------- #
+
+    def test_empty_deposit_matches_minidom(self):
+        root = Element('doi_batch', {'version': '5.4.0'})
+        SubElement(root, 'head')
+        SubElement(root, 'body')
+        expected = minidom_prettify(root)
+
+        stream = io.StringIO()
+        writer = DepositXMLWriter(stream)
+        writer.start(Element('doi_batch', {'version': '5.4.0'}))
+        writer.stream.write(render_element(Element('head'), 1))
+        writer.close()
+
+        self.assertEqual(stream.getvalue(), expected)
+
+    # -------------------------------------- #
+
+    def test_compact_output(self):
+        root = Element('doi_batch')
+        SubElement(root, 'head').text = 'h'
+
+        stream = io.StringIO()
+        writer = DepositXMLWriter(stream, indent=None)
+        writer.start(root)
+        record = Element('report-paper')
+        SubElement(record, 'titles').text = 'T'
+        writer.write_record(record)
+        writer.close()
+
+        self.assertEqual(
+            stream.getvalue(),
+            '<?xml version="1.0" encoding="utf-8"?><doi_batch><head>h</head>'
+            '<body><report-paper><titles>T</titles></report-paper></body></doi_batch>'
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()